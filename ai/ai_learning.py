@@ -1,39 +1,48 @@
 # FILE: ai/ai_learning.py
 # ============================================================
-# AI mokymosi būsena ir adaptacija (DB-only versija)
-# Atnaujinta: 2025-11-13 (JSON failų I/O logika pašalinta, reikalinga DB persistencija)
+# AI mokymosi būsena ir adaptacija (DB versija)
+# Atnaujinta: 2025-11-13 (JSON failų I/O logika pašalinta)
+# ------------------------------------------------------------
+# - Būsena saugoma DB lentelėje state_store (raktas "ai_learning"),
+#   kompaktiškai serializuota (core/state_store.py)
+# - Užkraunama tingiai — pirmą kartą kreipiantis
+# - Pakeitimai tik pažymi būseną "dirty"; įrašoma fone kas STATE_FLUSH_SEC
+#   ir išjungiant, todėl record_trade_for_learning() galima kviesti po
+#   kiekvieno uždarymo be papildomo DB laukimo
 # ============================================================
 
 import logging
 from datetime import datetime
 from typing import Any, Dict
 
-# IŠTRINTOS: Visos JSON failų konstantos ir pagalbinės funkcijos (_safe_load, _safe_dump).
-# Būsena dabar veikia tik atmintyje (RAM).
+from core.state_store import PersistentState
+
+STATE_KEY = "ai_learning"
 
 
 class AILearningState:
     """
     Aukštesnio lygio būsena adaptacijai.
-    PASTABA: Šios klasės duomenys šiuo metu nebus persistinami,
-    kadangi JSON I/O buvo pašalintas. Persistencijai reikia atnaujinti
-    įrašymą į DB.
+    Laikoma atmintyje, į DB įrašoma atidėtai (žr. core/state_store.py).
     """
     def __init__(self):
-        self._state: Dict[str, Any] = {}
-        logging.warning("[AILearningState] JSON failų naudojimas pašalintas. Būsena nepersistinama!")
+        self._store = PersistentState(STATE_KEY)
 
     def get(self) -> Dict[str, Any]:
-        """Grąžina dabartinę atminties būseną."""
-        return self._state
+        """Grąžina dabartinę atminties būseną (pirmą kartą — iš DB)."""
+        return self._store.get()
 
     def set_value(self, key: str, value: Any):
-        """Atnaujina būsenos reikšmę atmintyje."""
-        self._state[key] = value
+        """Atnaujina būsenos reikšmę atmintyje (įrašoma fone)."""
+        self._store.set_value(key, value)
+
+    def update(self, values: Dict[str, Any]):
+        """Kelios reikšmės vienu kartu."""
+        self._store.update(values)
 
     def save(self):
-        """Išsaugojimas į DB turi būti įgyvendintas čia, bet JSON logika pašalinta."""
-        pass
+        """Priverstinis įrašymas į DB (įprastai nereikia — įrašo fono thread'as)."""
+        return self._store.flush()
 
 # Globalus objektas
 AILearningState = AILearningState()
@@ -46,10 +55,20 @@ def record_trade_for_learning(symbol: str, action: str, entry_price: float, exit
                               pnl_pct: float, pnl_usd: float, confidence: float,
                               hold_time_h: float, market_state: str):
     """
-    Įrašo prekybos rezultatus į atminties būseną.
+    Įrašo prekybos rezultatus į mokymosi būseną (atmintyje; DB — atidėtai).
     Sandoriai į 'trades' DB lentelę įrašomi per OrderExecutor/ExitManager.
     """
-  
-    AILearningState.set_value("last_trade_ts", datetime.utcnow().isoformat())
-    AILearningState.set_value("last_pnl_pct", pnl_pct)
-    AILearningState.set_value("last_confidence", confidence)
\ No newline at end of file
+    try:
+        state = AILearningState.get()
+        AILearningState.update({
+            "trades_seen": int(state.get("trades_seen", 0)) + 1,
+            "last_trade_ts": datetime.utcnow().isoformat(),
+            "last_symbol": symbol,
+            "last_action": action,
+            "last_pnl_pct": pnl_pct,
+            "last_confidence": confidence,
+            "last_hold_time_h": hold_time_h,
+            "last_market_state": market_state,
+        })
+    except Exception as e:
+        logging.warning(f"[AILearningState] Nepavyko atnaujinti būsenos: {e}")
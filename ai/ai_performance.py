@@ -3,32 +3,19 @@
 # Suderinama su main.py: get_ai_performance() → klasės objektas
 # ============================================================
 from pathlib import Path
-import sqlite3
 import logging
 from datetime import datetime, timezone
-from core.db_manager import DB_PATH
+from core.db_manager import get_conn
+from core import ai_stats
 
 # ============================================================
-# Lentelės garantavimas (naudojame DB_PATH iš db_manager)
+# Lentelės garantavimas (jungtis iš db_manager)
 # ============================================================
 
 def _ensure_table():
+    # ai_metrics schema — core/db_migrations.py (get_conn() ją pritaiko)
     try:
-        conn = sqlite3.connect(DB_PATH)
-        cur = conn.cursor()
-        cur.execute("""
-            CREATE TABLE IF NOT EXISTS ai_metrics (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                ts TEXT,
-                symbol TEXT,
-                confidence REAL,
-                edge REAL,
-                pnl_usdc REAL,
-                hold_sec REAL
-            );
-        """)
-        conn.commit()
-        conn.close()
+        get_conn()
     except Exception as e:
         logging.error(f"[AI-PERF] Nepavyko sukurti ai_metrics lentelės: {e}")
 
@@ -49,23 +36,9 @@ class AIPerformance:
     def get_summary(self) -> dict:
         """Grąžina AI veiklos metrikų suvestinę (nuo starto)."""
         try:
-            conn = sqlite3.connect(DB_PATH)
-            cur = conn.cursor()
-
-            # ✅ PATAISYTA: Naudoti rowid vietoj id
-            cur.execute("""
-                SELECT
-                    COUNT(rowid),
-                    SUM(CASE WHEN pnl_usdc > 0 THEN 1 ELSE 0 END),
-                    AVG(confidence),
-                    AVG(edge),
-                    SUM(pnl_usdc)
-                FROM ai_metrics
-            """)
-            row = cur.fetchone()
-            conn.close()
-
-            if not row or row[0] == 0:
+            # Einamasis agregatas (core/ai_stats.py) — viena eilutė, be pilno skenavimo
+            s = ai_stats.summary()
+            if s["trades_count"] == 0:
                 return {
                     "win_rate": 0,
                     "total_trades": 0,
@@ -74,18 +47,12 @@ class AIPerformance:
                     "profit_usdc": 0,
                 }
 
-            total = row[0]
-            wins = row[1] or 0
-            conf = row[2] or 0
-            edge = row[3] or 0
-            profit = row[4] or 0
-
             return {
-                "win_rate": round(wins / total * 100, 2),
-                "total_trades": total,
-                "avg_confidence": round(conf, 3),
-                "avg_edge": round(edge, 5),
-                "profit_usdc": round(profit, 3),
+                "win_rate": round(s["win_rate"], 2),
+                "total_trades": s["trades_count"],
+                "avg_confidence": round(s["avg_confidence"], 3),
+                "avg_edge": round(s["avg_edge"], 5),
+                "profit_usdc": round(s["profit_usdc"], 3),
             }
 
         except Exception as e:
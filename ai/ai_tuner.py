@@ -3,46 +3,31 @@
 # ai/ai_tuner.py — Dieninis AI parametrų "tuningas" (DB-only)
 # ============================================================
 
-import sqlite3
-from datetime import datetime, timezone, timedelta
 import logging
 from statistics import mean
 
-from core.db_manager import DB_PATH
+from core import dao
+from core.timeutil import now_ms, DAY_MS
 
-def _read_trades(days: int = 2):
-    """Paima paskutinių N dienų uždarytus sandorius iš DB."""
+def _read_trades(days: int = 2) -> dict:
+    """Paskutinių N dienų uždaryti sandoriai — stulpeliai (pnl_pct, confidence, ...)."""
     try:
-        conn = sqlite3.connect(DB_PATH)
-        cur = conn.cursor()
-        since = (datetime.now(timezone.utc) - timedelta(days=days)).isoformat()
-
-        rows = cur.execute(
-            """
-            SELECT ts, pnl_pct, confidence
-            FROM trades
-            WHERE ts >= ? AND event='CLOSE'
-            ORDER BY ts DESC
-            """,
-            (since,)
-        ).fetchall()
-        conn.close()
-        return rows
+        return dao.closed_trades_since(now_ms() - days * DAY_MS)
     except Exception as e:
         logging.error(f"[AI-TUNER] Klaida skaitant trades iš DB: {e}")
-        return []
+        return {}
 
 def run_ai_tuner_daily(days: int = 7):
     """Apskaičiuoja metrikas ir logina patarimus."""
     logging.info(f"--- [AI-TUNER] Kasdienė metrikų analizė (per {days}d.) ---")
-    rows = _read_trades(days=days)
-    if not rows:
+    cols = _read_trades(days=days)
+    if not cols or not cols["id"]:
         logging.info("[AI-TUNER] Nėra pakankamai sandorių rekomendacijoms.")
         return
 
-    pnl_list = [float(r[1] or 0.0) for r in rows]
-    conf_list = [float(r[2] or 0.0) for r in rows]
-    total = len(rows)
+    pnl_list = [float(p or 0.0) for p in cols["pnl_pct"]]
+    conf_list = [float(c or 0.0) for c in cols["confidence"]]
+    total = len(pnl_list)
     wins = sum(1 for p in pnl_list if p > 0)
     win_rate = (wins * 100.0) / total if total > 0 else 0.0
     avg_pnl = mean(pnl_list) if pnl_list else 0.0
@@ -0,0 +1,91 @@
+# ============================================================
+# bench/bench_db.py — SQLite skaitymo greitis: nauja jungtis vs nuolatinė
+# ------------------------------------------------------------
+# Naudojimas:
+#   python -m bench.bench_db -n 2000
+# Laikina DB (ta pati schema kaip core.db), 8 atviros pozicijos, 5000 equity
+# įrašų. Kartojamos tipinės ciklo užklausos (atviros pozicijos, jų skaičius,
+# has_position, paskutinė equity):
+#   "prieš"  — sqlite3.connect + init_full_db kiekvienai užklausai (senas get_conn)
+#   "po"     — db_manager.get_conn() (nuolatinė thread'o jungtis)
+# ============================================================
+
+import sys
+import time
+import sqlite3
+import argparse
+import tempfile
+import logging
+from pathlib import Path
+
+from core import db_manager, db_init
+
+QUERIES = (
+    ("SELECT symbol, entry_price, qty, opened_at FROM positions WHERE qty > 0 AND state='OPEN'", ()),
+    ("SELECT COUNT(*) FROM positions WHERE state='OPEN' AND qty>0", ()),
+    ("SELECT 1 FROM positions WHERE symbol=? AND state='OPEN' AND qty>0 LIMIT 1", ("SYM3USDC",)),
+    ("SELECT equity FROM equity_history ORDER BY ts DESC LIMIT 1", ()),
+)
+
+
+def _seed(path: Path):
+    db_manager.DB_PATH = db_init.DB_PATH = path
+    db_init.init_full_db(force_recreate=True)
+    con = sqlite3.connect(path)
+    con.executemany(
+        "INSERT INTO positions (symbol, entry_price, qty, opened_at, state) VALUES (?, 1.0, 1.0, '2025-01-01T00:00:00', 'OPEN')",
+        [(f"SYM{i}USDC",) for i in range(8)],
+    )
+    con.executemany(
+        "INSERT INTO equity_history (ts, equity) VALUES (?, 10000)",
+        [(f"2025-01-01T00:{i // 60:02d}:{i % 60:02d}.{i:06d}",) for i in range(5000)],
+    )
+    con.commit()
+    con.close()
+
+
+def _old_style(sql, args):
+    db_init.init_full_db()  # senas get_conn() -> init_db() kiekvienam kvietimui
+    con = sqlite3.connect(db_manager.DB_PATH)
+    con.row_factory = sqlite3.Row
+    rows = con.execute(sql, args).fetchall()
+    con.close()
+    return rows
+
+
+def _new_style(sql, args):
+    con = db_manager.get_conn()
+    rows = con.execute(sql, args).fetchall()
+    con.close()  # no-op nuolatinei jungčiai
+    return rows
+
+
+def _run(fn, n: int) -> float:
+    t0 = time.perf_counter()
+    for i in range(n):
+        sql, args = QUERIES[i % len(QUERIES)]
+        fn(sql, args)
+    return n / (time.perf_counter() - t0)
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="SQLite jungčių valdymo benchmark'as")
+    ap.add_argument("-n", type=int, default=2000, help="užklausų skaičius kiekvienam variantui")
+    args = ap.parse_args(argv)
+
+    logging.disable(logging.INFO)  # init_full_db loguoja kiekvieną kartą
+    with tempfile.TemporaryDirectory() as tmp:
+        _seed(Path(tmp) / "bench.db")
+        before = _run(_old_style, args.n)
+        after = _run(_new_style, args.n)
+        db_manager.close_thread_conn()
+
+    print(f"n={args.n} užklausų")
+    print(f"prieš (connect per užklausą): {before:>10.0f} q/s")
+    print(f"po (nuolatinė jungtis):       {after:>10.0f} q/s")
+    print(f"Pagreitėjimas: x{after / before:.1f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
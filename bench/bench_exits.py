@@ -0,0 +1,104 @@
+# ============================================================
+# bench/bench_exits.py — EXIT sąlygų vertinimas: ciklas vs masyvai
+# ------------------------------------------------------------
+# Naudojimas:
+#   python -m bench.bench_exits -n 200
+# Atsitiktinės atviros pozicijos (10 … 10 000) ir kainų dict'as (kaip
+# ws_bridge.get_all_prices()). Matuojamas vienas check_exits vertinimas:
+#   "ciklas"  — sena logika: kiekvienai pozicijai kaina, PnL ir sąlygos
+#               skaliarais
+#   "masyvai" — kainų vektorius + exit_manager.evaluate_exits()
+# Uždarymų rinkiniai palyginami (turi sutapti). DB nenaudojama.
+# ============================================================
+
+import sys
+import time
+import random
+import argparse
+import logging
+
+import numpy as np
+
+from core.exit_manager import EXIT_REASONS, evaluate_exits, _price_of
+
+SIZES = (10, 100, 1000, 10000)
+
+
+def _seed(n: int, now: int):
+    rnd = random.Random(n)
+    positions = []
+    prices = {}
+    for i in range(n):
+        sym = f"SYM{i}USDC"
+        entry = rnd.uniform(0.1, 1000.0)
+        # Dauguma pozicijų lieka atviros (~5–10 % pasiekia SL / TP / laiko limitą)
+        positions.append((sym, entry, rnd.uniform(0.01, 10.0), now - rnd.randint(0, 90000) * 1000))
+        prices[sym] = {"price": entry * rnd.gauss(1.0, 0.015)}
+    return positions, prices
+
+
+def _loop(positions, prices, now):
+    """Sena check_exits logika (be DB ir REST)."""
+    out = []
+    for symbol, entry_price, qty, opened_at_ms in positions:
+        held_for_sec = (now - (opened_at_ms or now)) / 1000.0
+        price_data = prices.get(symbol, {})
+        current_price = price_data.get("price") if isinstance(price_data, dict) else price_data
+        if current_price is None or current_price <= 0 or not entry_price:
+            continue
+        pnl_pct = ((current_price / entry_price) - 1) * 100
+        pnl_usdc = (current_price - entry_price) * qty
+        reason = None
+        if pnl_pct <= -3.0:
+            reason = EXIT_REASONS[1]
+        elif pnl_pct >= 5.0:
+            reason = EXIT_REASONS[2]
+        elif held_for_sec > 86400:
+            reason = EXIT_REASONS[3]
+        if reason:
+            out.append((symbol, pnl_usdc, reason))
+    return out
+
+
+def _vector(cols, prices, now):
+    symbols, entry, qty, opened = cols
+    price = np.fromiter((_price_of(prices.get(s)) for s in symbols), dtype=np.float64, count=len(symbols))
+    codes, _, pnl_usdc = evaluate_exits(entry, qty, opened, price, now)
+    return [(symbols[i], float(pnl_usdc[i]), EXIT_REASONS[codes[i]]) for i in np.flatnonzero(codes)]
+
+
+def _time(fn, args, repeat):
+    fn(*args)  # apšilimas
+    t0 = time.perf_counter()
+    for _ in range(repeat):
+        res = fn(*args)
+    return (time.perf_counter() - t0) / repeat * 1e6, res
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="ExitManager.check_exits vertinimo benchmark'as")
+    ap.add_argument("-n", type=int, default=200, help="pakartojimų skaičius kiekvienam dydžiui")
+    args = ap.parse_args(argv)
+
+    logging.disable(logging.INFO)
+    now = int(time.time() * 1000)
+    print(f"{'pozicijų':>9}{'ciklas µs':>12}{'masyvai µs':>12}{'x':>7}{'uždaryti':>10}")
+    for n in SIZES:
+        positions, prices = _seed(n, now)
+        # BOOK.arrays() stulpeliai (cache'uojami knygoje — į matavimą neįeina)
+        cols = (
+            [p[0] for p in positions],
+            np.array([p[1] for p in positions]),
+            np.array([p[2] for p in positions]),
+            np.array([p[3] for p in positions], dtype=np.int64),
+        )
+        t_loop, r_loop = _time(_loop, (positions, prices, now), args.n)
+        t_vec, r_vec = _time(_vector, (cols, prices, now), args.n)
+        same = [(s, r) for s, _, r in r_loop] == [(s, r) for s, _, r in r_vec]
+        print(f"{n:>9}{t_loop:>12.1f}{t_vec:>12.1f}{t_loop / t_vec:>7.1f}{len(r_vec):>10}"
+              + ("" if same else "  ⚠️ rezultatai skiriasi"))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
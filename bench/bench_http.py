@@ -0,0 +1,90 @@
+# ============================================================
+# bench/bench_http.py — REST latency: tiesioginis requests.get vs core.http_client
+# ------------------------------------------------------------
+# Naudojimas:
+#   python -m bench.bench_http                 # lokalus keep-alive serveris
+#   python -m bench.bench_http --url https://api.binance.com/api/v3/time -n 50
+# Lokalus serveris neturi TLS, todėl realus skirtumas (TCP+TLS handshake)
+# matomas tik su --url https://...
+# ============================================================
+
+import sys
+import time
+import argparse
+import threading
+import statistics
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import requests
+
+from core import http_client
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive
+    wbufsize = 65536               # antraštės + body vienu write (be Nagle/delayed-ACK 40 ms)
+
+    def do_GET(self):
+        body = b'{"serverTime":0}'
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def _start_local_server():
+    srv = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+    threading.Thread(target=srv.serve_forever, daemon=True).start()
+    return srv, f"http://127.0.0.1:{srv.server_address[1]}/api/v3/time"
+
+
+def _measure(fn, url: str, n: int):
+    lat = []
+    for _ in range(n):
+        t0 = time.perf_counter()
+        r = fn(url)
+        r.content
+        lat.append((time.perf_counter() - t0) * 1000)
+    lat.sort()
+    return {
+        "mean_ms": statistics.mean(lat),
+        "p50_ms": lat[len(lat) // 2],
+        "p99_ms": lat[min(len(lat) - 1, int(len(lat) * 0.99))],
+    }
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="HTTP kliento latency benchmark'as")
+    ap.add_argument("--url", default="", help="endpoint'as (numatytai — lokalus serveris)")
+    ap.add_argument("-n", type=int, default=200, help="užklausų skaičius kiekvienam variantui")
+    args = ap.parse_args(argv)
+
+    srv = None
+    url = args.url
+    if not url:
+        srv, url = _start_local_server()
+
+    http_client.get(url)  # apšildymas (DNS, pirmoji jungtis)
+    bare = _measure(lambda u: requests.get(u, timeout=10), url, args.n)
+    pooled = _measure(lambda u: http_client.get(u), url, args.n)
+
+    print(f"URL: {url} | n={args.n}")
+    print(f"{'variantas':<16}{'mean':>10}{'p50':>10}{'p99':>10}")
+    for name, r in (("requests.get", bare), ("http_client", pooled)):
+        print(f"{name:<16}{r['mean_ms']:>9.2f}ms{r['p50_ms']:>8.2f}ms{r['p99_ms']:>8.2f}ms")
+    speedup = bare["mean_ms"] / pooled["mean_ms"] if pooled["mean_ms"] else 0.0
+    print(f"Pagreitėjimas (mean): x{speedup:.2f}")
+    for host, m in http_client.get_metrics()["pools"].items():
+        print(f"Pool {host}: {m['requests']} užklausų, {m['new_connections']} naujų jungčių, reuse={m['reuse_ratio']:.1%}")
+
+    if srv:
+        srv.shutdown()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,165 @@
+# ============================================================
+# bench/bench_order_transport.py — pavedimų transportai: REST vs WebSocket API
+# ------------------------------------------------------------
+# Naudojimas:
+#   python -m bench.bench_order_transport -n 200
+# Lokalus serveris imituoja POST /api/v3/order ir WS API "order.place"
+# (su fills), ExchangeAdapter._real_order kviečiamas abiem transportais.
+# Spausdinama sprendimo -> ack latency (ws_order_transport.LATENCY) ir
+# patikrinamas WS API timeout'o fallback'as (be dvigubo pavedimo).
+# ============================================================
+
+import sys
+import json
+import base64
+import struct
+import hashlib
+import argparse
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from core.config import CONFIG
+from core import exchange_adapter, ws_order_transport
+from core import ws_bridge
+
+_WS_GUID = "258EAFA5-E914-47DA-95CA-C5AB0DC85B11"
+
+
+def _frame(text: str) -> bytes:
+    data = text.encode("utf-8")
+    n = len(data)
+    head = struct.pack("!BB", 0x81, n) if n < 126 else struct.pack("!BBH", 0x81, 126, n)
+    return head + data
+
+
+def _read_frame(rfile):
+    """Kliento (maskuotas) frame'as -> (opcode, payload) arba None."""
+    h = rfile.read(2)
+    if len(h) < 2:
+        return None
+    opcode, n = h[0] & 0x0F, h[1] & 0x7F
+    if n == 126:
+        n = struct.unpack("!H", rfile.read(2))[0]
+    elif n == 127:
+        n = struct.unpack("!Q", rfile.read(8))[0]
+    mask = rfile.read(4) if h[1] & 0x80 else b"\0\0\0\0"
+    data = bytes(b ^ mask[i % 4] for i, b in enumerate(rfile.read(n)))
+    return opcode, data
+
+
+def _fill(params):
+    qty = float(params["quantity"])
+    return {
+        "symbol": params["symbol"], "orderId": 1, "clientOrderId": params["newClientOrderId"],
+        "status": "FILLED", "executedQty": params["quantity"], "cummulativeQuoteQty": str(qty * 100.0),
+        "fills": [{"price": "100.0", "qty": params["quantity"], "commission": "0", "commissionAsset": "USDC"}],
+    }
+
+
+class FakeOrderServer:
+    def __init__(self):
+        self.orders = {}          # clientOrderId -> atsakymas (abu transportai)
+        self.drop_ws = False      # True — WS API "praryja" pavedimą (įvykdo, bet neatsako)
+        outer = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            wbufsize = 65536
+
+            def _json(self, code, obj):
+                body = json.dumps(obj).encode()
+                self.send_response(code)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def _params(self):
+                from urllib.parse import urlparse, parse_qsl
+                return dict(parse_qsl(urlparse(self.path).query))
+
+            def do_POST(self):
+                p = self._params()
+                res = outer.orders[p["newClientOrderId"]] = _fill(p)
+                self._json(200, res)
+
+            def do_GET(self):
+                if self.path.startswith("/api/v3/order"):
+                    res = outer.orders.get(self._params().get("origClientOrderId"))
+                    if res is None:
+                        return self._json(400, {"code": -2013, "msg": "Order does not exist."})
+                    return self._json(200, {k: v for k, v in res.items() if k != "fills"})
+                self._ws()
+
+            def _ws(self):
+                accept = base64.b64encode(hashlib.sha1((self.headers["Sec-WebSocket-Key"] + _WS_GUID).encode()).digest()).decode()
+                self.send_response(101)
+                self.send_header("Upgrade", "websocket")
+                self.send_header("Connection", "Upgrade")
+                self.send_header("Sec-WebSocket-Accept", accept)
+                self.end_headers()
+                self.wfile.flush()
+                while True:
+                    fr = _read_frame(self.rfile)
+                    if fr is None or fr[0] == 0x8:
+                        break
+                    if fr[0] != 0x1:
+                        continue
+                    req = json.loads(fr[1])
+                    p = req["params"]
+                    outer.orders[p["newClientOrderId"]] = _fill(p)
+                    if outer.drop_ws:
+                        continue
+                    self.wfile.write(_frame(json.dumps({"id": req["id"], "status": 200, "result": outer.orders[p["newClientOrderId"]]})))
+                    self.wfile.flush()
+                self.close_connection = True
+
+            def log_message(self, *args):
+                pass
+
+        self.srv = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.srv.daemon_threads = True
+        threading.Thread(target=self.srv.serve_forever, daemon=True).start()
+        self.port = self.srv.server_address[1]
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="REST vs WS API pavedimų latency")
+    ap.add_argument("-n", type=int, default=200, help="pavedimų skaičius kiekvienam transportui")
+    args = ap.parse_args(argv)
+
+    fake = FakeOrderServer()
+    exchange_adapter.API_BASE = f"http://127.0.0.1:{fake.port}"
+    ws_order_transport._TRANSPORT = ws_order_transport.WsOrderTransport(
+        "k", "s", f"ws://127.0.0.1:{fake.port}/ws-api/v3").start()
+    ws_bridge.get_price = lambda s: 100.0
+    exchange_adapter.exchange_info.prepare_order_qty = lambda sym, q, px, base=None: (True, "OK", f"{q:g}")
+
+    adapter = exchange_adapter.ExchangeAdapter("k", "s")
+    adapter.dry_run = False
+    for transport in ("rest", "ws_api"):
+        CONFIG["ORDER_TRANSPORT"] = transport
+        for _ in range(args.n):
+            res = adapter.execute_market_order("TESTUSDC", "BUY", 0.5, "bench", 1.0)
+            assert res.get("ok"), res
+
+    m = ws_order_transport.get_latency_metrics()
+    print(f"n={args.n} (lokalus serveris, be TLS)")
+    print(f"{'transportas':<12}{'mean':>10}{'p50':>10}{'p99':>10}")
+    for t in ("rest", "ws_api"):
+        print(f"{t:<12}{m[t]['mean_ms']:>8.2f}ms{m[t]['p50_ms']:>8.2f}ms{m[t]['p99_ms']:>8.2f}ms")
+
+    # Fallback: WS API įvykdo, bet neatsako -> REST randa pavedimą, antro nesiunčia
+    before = len(fake.orders)
+    fake.drop_ws = True
+    ws_order_transport.ORDER_TIMEOUT_SEC = 0.3
+    res = adapter.execute_market_order("TESTUSDC", "BUY", 0.5, "bench", 1.0)
+    m = ws_order_transport.get_latency_metrics()["ws_api"]
+    ok = res.get("ok") and len(fake.orders) == before + 1 and m["fallbacks"] == 1
+    print(f"Timeout fallback: ok={res.get('ok')} fill={res.get('fill_price')} naujų pavedimų={len(fake.orders) - before} -> {'OK' if ok else 'FAIL'}")
+    fake.srv.shutdown()
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
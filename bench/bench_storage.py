@@ -0,0 +1,133 @@
+# ============================================================
+# bench/bench_storage.py — botas rašo, dashboard'as skaito tą pačią DB
+# ------------------------------------------------------------
+# Naudojimas:
+#   python -m bench.bench_storage -t 5 -r 3
+# Laikina DB (core.db schema). Vienas rašytojo procesas imituoja boto
+# ciklą (trade + pozicija + equity vienoje transakcijoje), -r skaitytojo
+# procesų — dashboard'o užklausas (atviros pozicijos, equity grafikas,
+# paskutiniai sandoriai). Du režimai:
+#   "legacy" — journal_mode=DELETE, synchronous=FULL (seni numatytieji)
+#   "profile" — core/storage_profile.py rolės "bot" / "dashboard"
+# Spausdinama p50/p99 latency ir "database is locked" klaidų skaičius.
+# ============================================================
+
+import sys
+import time
+import sqlite3
+import argparse
+import tempfile
+import logging
+import multiprocessing as mp
+from pathlib import Path
+
+from core import db_init, storage_profile
+
+LEGACY = ["PRAGMA journal_mode=DELETE", "PRAGMA synchronous=FULL"]
+
+READS = (
+    "SELECT symbol, entry_price, qty, opened_at FROM positions WHERE state='OPEN' AND qty > 0",
+    "SELECT ts, equity FROM equity_history ORDER BY ts DESC LIMIT 500",
+    "SELECT ts, event, symbol, price, qty, pnl_pct FROM trades ORDER BY id DESC LIMIT 50",
+)
+
+
+def _connect(path, pragmas, timeout):
+    con = sqlite3.connect(path, timeout=timeout)
+    for p in pragmas:
+        con.execute(p).fetchall()
+    return con
+
+
+def _writer(path, pragmas, timeout, duration, out):
+    con = _connect(path, pragmas, timeout)
+    lat, locked, i = [], 0, 0
+    end = time.time() + duration
+    while time.time() < end:
+        i += 1
+        ts = f"2025-01-01T{i // 3600 % 24:02d}:{i // 60 % 60:02d}:{i % 60:02d}.{i:07d}"
+        sym = f"SYM{i % 20}USDC"
+        t0 = time.perf_counter()
+        try:
+            con.execute("INSERT INTO trades (ts, event, symbol, price, qty, usd_value) VALUES (?, 'BUY', ?, 1.0, 1.0, 1.0)", (ts, sym))
+            con.execute("INSERT OR REPLACE INTO positions (symbol, entry_price, qty, opened_at, state) VALUES (?, 1.0, 1.0, ?, 'OPEN')", (sym, ts))
+            con.execute("INSERT OR REPLACE INTO equity_history (ts, equity) VALUES (?, 10000)", (ts,))
+            con.commit()
+            lat.append((time.perf_counter() - t0) * 1000)
+        except sqlite3.OperationalError as e:
+            con.rollback()
+            if "locked" not in str(e):
+                raise
+            locked += 1
+    con.close()
+    out.put(("write", lat, locked))
+
+
+def _reader(path, pragmas, timeout, duration, out):
+    con = _connect(path, pragmas, timeout)
+    lat, locked, i = [], 0, 0
+    end = time.time() + duration
+    while time.time() < end:
+        sql = READS[i % len(READS)]
+        i += 1
+        t0 = time.perf_counter()
+        try:
+            con.execute(sql).fetchall()
+            lat.append((time.perf_counter() - t0) * 1000)
+        except sqlite3.OperationalError as e:
+            if "locked" not in str(e):
+                raise
+            locked += 1
+        time.sleep(0.002)  # dashboard'as neužklausinėja be pertraukos
+    con.close()
+    out.put(("read", lat, locked))
+
+
+def _pct(lat, q):
+    lat = sorted(lat)
+    return lat[min(len(lat) - 1, int(len(lat) * q))] if lat else 0.0
+
+
+def _run(path, writer_pragmas, reader_pragmas, timeout, duration, readers):
+    out = mp.Queue()
+    procs = [mp.Process(target=_writer, args=(path, writer_pragmas, timeout, duration, out))]
+    procs += [mp.Process(target=_reader, args=(path, reader_pragmas, timeout, duration, out)) for _ in range(readers)]
+    for p in procs:
+        p.start()
+    res = {"write": ([], 0), "read": ([], 0)}
+    for _ in procs:
+        kind, lat, locked = out.get()
+        res[kind] = (res[kind][0] + lat, res[kind][1] + locked)
+    for p in procs:
+        p.join()
+    return res
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="SQLite pragmų profilio benchmark'as (rašytojas + skaitytojai)")
+    ap.add_argument("-t", type=float, default=5.0, help="kiekvieno režimo trukmė sekundėmis")
+    ap.add_argument("-r", type=int, default=3, help="skaitytojų (dashboard) procesų skaičius")
+    ap.add_argument("--timeout", type=float, default=5.0, help="sqlite3 busy timeout legacy režimui (s)")
+    args = ap.parse_args(argv)
+
+    logging.disable(logging.INFO)
+    modes = (
+        ("legacy", LEGACY, LEGACY, args.timeout),
+        ("profile", storage_profile.pragma_statements("bot"), storage_profile.pragma_statements("dashboard"), 0),
+    )
+    print(f"trukmė={args.t:.0f}s/režimui, skaitytojų={args.r}")
+    print(f"{'režimas':<9}{'op':<7}{'kiekis':>8}{'p50':>10}{'p99':>10}{'locked':>8}")
+    for name, wp, rp, timeout in modes:
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / "bench.db"
+            db_init.DB_PATH = path
+            db_init.init_full_db(force_recreate=True)
+            res = _run(path, wp, rp, timeout, args.t, args.r)
+        for op in ("write", "read"):
+            lat, locked = res[op]
+            print(f"{name:<9}{op:<7}{len(lat):>8}{_pct(lat, 0.5):>8.2f}ms{_pct(lat, 0.99):>8.2f}ms{locked:>8}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
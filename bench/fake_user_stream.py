@@ -0,0 +1,173 @@
+# ============================================================
+# bench/fake_user_stream.py — lokalus Binance user data stream pakaitalas
+# ------------------------------------------------------------
+# Naudojimas:
+#   python -m bench.fake_user_stream
+# Paleidžia vieną HTTP serverį, kuris atsako į:
+#   POST/PUT/DELETE /api/v3/userDataStream   (listenKey)
+#   GET  /api/v3/account                      (pradiniai balansai)
+#   GET  /ws/<listenKey>                      (WebSocket upgrade -> įvykiai)
+# ir prijungia core.user_stream.UserDataStream. Scenarijus:
+#   BUY fill -> balansai -> listenKeyExpired -> naujas raktas -> SELL fill.
+# Pabaigoje spausdinama ACCOUNT būsena ir patikrinimų rezultatas.
+# ============================================================
+
+import sys
+import json
+import time
+import base64
+import struct
+import hashlib
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from core.user_stream import AccountState, UserDataStream
+
+_WS_GUID = "258EAFA5-E914-47DA-95CA-C5AB0DC85B11"
+
+
+def _frame(text: str) -> bytes:
+    data = text.encode("utf-8")
+    n = len(data)
+    if n < 126:
+        head = struct.pack("!BB", 0x81, n)
+    elif n < 65536:
+        head = struct.pack("!BBH", 0x81, 126, n)
+    else:
+        head = struct.pack("!BBQ", 0x81, 127, n)
+    return head + data
+
+
+def _exec_report(order_id, side, qty, price, ts):
+    return {
+        "e": "executionReport", "E": ts, "s": "BTCUSDC", "c": f"cli{order_id}", "S": side,
+        "o": "MARKET", "x": "TRADE", "X": "FILLED", "i": order_id,
+        "l": str(qty), "z": str(qty), "L": str(price), "Z": str(qty * price),
+        "n": "0", "N": "USDC", "T": ts,
+    }
+
+
+def _position(ts, usdc, btc):
+    return {"e": "outboundAccountPosition", "E": ts, "u": ts,
+            "B": [{"a": "USDC", "f": str(usdc), "l": "0"}, {"a": "BTC", "f": str(btc), "l": "0"}]}
+
+
+class FakeExchange:
+    def __init__(self):
+        self.keys = []
+        self.keepalives = 0
+        self.deleted = 0
+        outer = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def _json(self, code, obj):
+                body = json.dumps(obj).encode()
+                self.send_response(code)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_POST(self):
+                key = f"key{len(outer.keys) + 1}"
+                outer.keys.append(key)
+                self._json(200, {"listenKey": key})
+
+            def do_PUT(self):
+                outer.keepalives += 1
+                self._json(200, {})
+
+            def do_DELETE(self):
+                outer.deleted += 1
+                self._json(200, {})
+
+            def do_GET(self):
+                if self.path.startswith("/api/v3/account"):
+                    return self._json(200, {"updateTime": 1, "balances": [
+                        {"asset": "USDC", "free": "1000", "locked": "0"},
+                        {"asset": "BTC", "free": "0", "locked": "0"},
+                    ]})
+                if self.path.startswith("/ws/"):
+                    return self._ws(self.path.rsplit("/", 1)[-1])
+                self._json(404, {})
+
+            def _ws(self, key):
+                accept = base64.b64encode(hashlib.sha1((self.headers["Sec-WebSocket-Key"] + _WS_GUID).encode()).digest()).decode()
+                self.send_response(101)
+                self.send_header("Upgrade", "websocket")
+                self.send_header("Connection", "Upgrade")
+                self.send_header("Sec-WebSocket-Accept", accept)
+                self.end_headers()
+                ts = int(time.time() * 1000)
+                if key == "key1":
+                    events = [
+                        _exec_report(101, "BUY", 0.01, 60000.0, ts),
+                        _position(ts, 400.0, 0.01),
+                        {"e": "listenKeyExpired", "E": ts, "listenKey": key},
+                    ]
+                else:
+                    events = [
+                        _exec_report(102, "SELL", 0.01, 61000.0, ts + 1),
+                        _position(ts + 1, 1010.0, 0.0),
+                        _position(ts - 10, 0.0, 5.0),  # pavėlavęs (senesnis) įvykis — turi būti ignoruotas
+                    ]
+                for e in events:
+                    self.wfile.write(_frame(json.dumps(e)))
+                    self.wfile.flush()
+                    time.sleep(0.05)
+                # Laikom jungtį, kol klientas uždarys
+                try:
+                    while self.rfile.read(1):
+                        pass
+                except Exception:
+                    pass
+                self.close_connection = True
+
+            def log_message(self, *args):
+                pass
+
+        self.srv = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.srv.daemon_threads = True
+        threading.Thread(target=self.srv.serve_forever, daemon=True).start()
+        self.port = self.srv.server_address[1]
+
+
+def main(argv=None):
+    fake = FakeExchange()
+    account = AccountState()
+    stream = UserDataStream(
+        "test-key", "test-secret",
+        rest_base=f"http://127.0.0.1:{fake.port}",
+        ws_base=f"ws://127.0.0.1:{fake.port}/ws",
+        account=account,
+        keepalive_sec=0.2,
+    ).start()
+
+    deadline = time.time() + 10
+    while time.time() < deadline and account.get_order(102) is None:
+        time.sleep(0.05)
+    time.sleep(0.3)
+    stream.stop()
+
+    state = account.to_state(lambda s: 61000.0)
+    print(f"listenKeys={fake.keys} keepalives={fake.keepalives} events={account.events}")
+    print(f"orders={[ (o['order_id'], o['side'], o['status'], o['avg_price']) for o in account.orders.values() ]}")
+    print(f"balances={ {a: b['free'] for a, b in account.balances.items()} }")
+    print(f"state: equity={state['equity']:.2f} positions={state['positions']}")
+
+    ok = (
+        len(fake.keys) >= 2
+        and account.get_order(101)["avg_price"] == 60000.0
+        and account.get_order(102)["status"] == "FILLED"
+        and account.balances["USDC"]["free"] == 1010.0
+        and account.balances["BTC"]["free"] == 0.0
+    )
+    print("OK" if ok else "FAIL")
+    fake.srv.shutdown()
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
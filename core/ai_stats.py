@@ -0,0 +1,138 @@
+# ============================================================
+# core/ai_stats.py — einamieji AI sandorių agregatai (dienai / simboliui)
+# ------------------------------------------------------------
+# - ai_trade_stats(scope, key): n, wins, Σpnl_pct, Σpnl_pct², Σpnl_usdc,
+#   Σconfidence, Σedge, Σhold_sec. scope: 'all' (key ''), 'day' (YYYY-MM-DD,
+#   UTC), 'symbol'
+# - Atnaujinama trigger'iu ant trades INSERT (CLOSE / SELL; db_migrations v6)
+#   — toje pačioje transakcijoje, kuri įrašo uždarymą, todėl agregatai
+#   visada sutampa su trades lentele
+# - Skaitymas: get_stats() / summary() — vienas PK paieškos žingsnis
+#   (vidurkis, win rate, std iš Σx ir Σx²), be trades perskaitymo
+# ============================================================
+
+import math
+from typing import Dict, List
+
+SCOPE_ALL = "all"
+SCOPE_DAY = "day"
+SCOPE_SYMBOL = "symbol"
+
+# Kurie trades.event laikomi uždarytu sandoriu
+CLOSE_EVENTS = ("CLOSE", "SELL")
+
+TABLE_DDL = """
+    CREATE TABLE IF NOT EXISTS ai_trade_stats (
+        scope TEXT NOT NULL,
+        key TEXT NOT NULL,
+        n INTEGER DEFAULT 0,
+        wins INTEGER DEFAULT 0,
+        sum_pnl_pct REAL DEFAULT 0,
+        sumsq_pnl_pct REAL DEFAULT 0,
+        sum_pnl_usdc REAL DEFAULT 0,
+        sum_confidence REAL DEFAULT 0,
+        sum_edge REAL DEFAULT 0,
+        sum_hold_sec REAL DEFAULT 0,
+        first_ts_ms INTEGER,
+        last_ts_ms INTEGER,
+        PRIMARY KEY (scope, key)
+    ) WITHOUT ROWID
+"""
+
+
+def day_key_sql(ts: str) -> str:
+    """SQL išraiška: epoch ms -> 'YYYY-MM-DD' (UTC), kaip ai_metrics.day_key."""
+    return f"strftime('%Y-%m-%d', ({ts}) / 1000, 'unixepoch')"
+
+
+def upsert_sql(scope: str, key: str, ts: str = ":ts_ms", pnl_pct: str = ":pnl_pct",
+               pnl_usdc: str = ":pnl_usdc", conf: str = ":confidence", edge: str = ":edge",
+               hold: str = ":hold_sec") -> str:
+    """
+    Vieno uždaryto sandorio įliejimas į (scope, key) agregatą. Argumentai — SQL
+    išraiškos (vardiniai parametrai backfill'ui, NEW.* trigger'iui).
+    """
+    p = f"COALESCE({pnl_pct}, 0)"
+    return f"""
+        INSERT INTO ai_trade_stats
+            (scope, key, n, wins, sum_pnl_pct, sumsq_pnl_pct, sum_pnl_usdc, sum_confidence, sum_edge,
+             sum_hold_sec, first_ts_ms, last_ts_ms)
+        VALUES ('{scope}', {key}, 1, CASE WHEN {p} > 0 THEN 1 ELSE 0 END, {p}, {p} * {p},
+                COALESCE({pnl_usdc}, 0), COALESCE({conf}, 0), COALESCE({edge}, 0), COALESCE({hold}, 0),
+                {ts}, {ts})
+        ON CONFLICT(scope, key) DO UPDATE SET
+            n = n + 1,
+            wins = wins + excluded.wins,
+            sum_pnl_pct = sum_pnl_pct + excluded.sum_pnl_pct,
+            sumsq_pnl_pct = sumsq_pnl_pct + excluded.sumsq_pnl_pct,
+            sum_pnl_usdc = sum_pnl_usdc + excluded.sum_pnl_usdc,
+            sum_confidence = sum_confidence + excluded.sum_confidence,
+            sum_edge = sum_edge + excluded.sum_edge,
+            sum_hold_sec = sum_hold_sec + excluded.sum_hold_sec,
+            first_ts_ms = MIN(COALESCE(first_ts_ms, excluded.first_ts_ms), excluded.first_ts_ms),
+            last_ts_ms = MAX(COALESCE(last_ts_ms, excluded.last_ts_ms), excluded.last_ts_ms)
+    """
+
+
+def upsert_all_sql(ts: str = ":ts_ms", symbol: str = ":symbol", **exprs) -> List[str]:
+    """Trys UPSERT'ai vienam sandoriui: 'all', 'day', 'symbol'."""
+    return [
+        upsert_sql(SCOPE_ALL, "''", ts, **exprs),
+        upsert_sql(SCOPE_DAY, day_key_sql(ts), ts, **exprs),
+        upsert_sql(SCOPE_SYMBOL, f"COALESCE({symbol}, '')", ts, **exprs),
+    ]
+
+
+# ============================================================
+# Skaitymas
+# ============================================================
+
+def _empty() -> Dict:
+    return {
+        "trades_count": 0, "wins": 0, "win_rate": 0.0, "avg_pnl": 0.0, "std_pnl": 0.0,
+        "profit_usdc": 0.0, "avg_confidence": 0.0, "avg_edge": 0.0, "avg_hold_sec": 0.0,
+        "last_ts_ms": None,
+    }
+
+
+def _derive(row) -> Dict:
+    n = int(row["n"] or 0)
+    if n <= 0:
+        return _empty()
+    mean = (row["sum_pnl_pct"] or 0.0) / n
+    var = max((row["sumsq_pnl_pct"] or 0.0) / n - mean * mean, 0.0)
+    return {
+        "trades_count": n,
+        "wins": int(row["wins"] or 0),
+        "win_rate": (row["wins"] or 0) / n * 100,
+        "avg_pnl": mean,
+        "std_pnl": math.sqrt(var),
+        "profit_usdc": row["sum_pnl_usdc"] or 0.0,
+        "avg_confidence": (row["sum_confidence"] or 0.0) / n,
+        "avg_edge": (row["sum_edge"] or 0.0) / n,
+        "avg_hold_sec": (row["sum_hold_sec"] or 0.0) / n,
+        "last_ts_ms": row["last_ts_ms"],
+    }
+
+
+def get_stats(scope: str = SCOPE_ALL, key: str = "") -> Dict:
+    """Vieno agregato išvestinės metrikos (nulinės, jei sandorių nėra)."""
+    from core.db_manager import get_conn
+    row = get_conn().execute(
+        "SELECT * FROM ai_trade_stats WHERE scope = ? AND key = ?", (scope, key)
+    ).fetchone()
+    return _derive(row) if row else _empty()
+
+
+def summary() -> Dict:
+    """Visų sandorių suvestinė nuo starto."""
+    return get_stats(SCOPE_ALL, "")
+
+
+def get_day(day_key: str) -> Dict:
+    return get_stats(SCOPE_DAY, day_key)
+
+
+def get_symbol(symbol: str) -> Dict:
+    return get_stats(SCOPE_SYMBOL, symbol)
+
@@ -0,0 +1,241 @@
+# ============================================================
+# core/archive.py — stulpelinis trades / equity_history archyvas
+# ------------------------------------------------------------
+# - data/archive/<lentelė>/<YYYY-MM>.npz — vienas failas mėnesiui,
+#   kiekvienas stulpelis — tipizuotas NumPy masyvas (int64 / float64 /
+#   fiksuoto ilgio unicode), suspausta (np.savez_compressed)
+# - Eksportas inkrementinis: manifest.json saugo kiekvienos lentelės
+#   žymeklį (trades.id, equity_history.ts_ms); perrašomi tik mėnesiai,
+#   į kuriuos pateko naujų eilučių. Sujungiant dubliai atmetami pagal
+#   žymeklį, todėl nutrauktą eksportą galima tiesiog paleisti iš naujo
+# - Šaltinis atidaromas tik skaitymui (mode=ro, query_only), eilutės
+#   skaitomos paketais — gyvos DB rašytojas neblokuojamas
+# - Skaitymas: load_month() / iter_months() — mėnesio .npz vieną kartą
+#   išpakuojamas į data/archive/.mmap/ .npy failus ir grąžinamas per
+#   np.load(mmap_mode="r") — be kopijavimo į atmintį
+# - Archyvas saugo ir tai, ką retencija išvalo iš equity_history
+# ============================================================
+
+import os
+import json
+import sqlite3
+import logging
+import threading
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from core.config import CONFIG
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+ARCHIVE_DIR = BASE_DIR / "data" / "archive"
+CACHE_DIR = ARCHIVE_DIR / ".mmap"
+MANIFEST_NAME = "manifest.json"
+
+CHUNK_ROWS = 100_000
+EXPORT_INTERVAL_SEC = 3600
+
+# lentelė -> (žymeklio stulpelis, ((stulpelis, dtype), ...)); "U" — unicode
+TABLES: Dict[str, Tuple[str, Tuple[Tuple[str, str], ...]]] = {
+    "trades": ("id", (
+        ("id", "int64"), ("ts_ms", "int64"), ("event", "U"), ("symbol", "U"),
+        ("price", "float64"), ("qty", "float64"), ("usd_value", "float64"),
+        ("pnl_pct", "float64"), ("pnl_usdc", "float64"), ("confidence", "float64"),
+        ("edge", "float64"), ("hold_sec", "float64"), ("reason", "U"),
+    )),
+    "equity_history": ("ts_ms", (
+        ("ts_ms", "int64"), ("equity", "float64"), ("day_pnl_pct", "float64"),
+        ("equity_pct_from_start", "float64"), ("free_usdc", "float64"),
+        ("used_usdc", "float64"), ("positions", "int32"),
+    )),
+}
+
+
+# ============================================================
+# Pagalbinės
+# ============================================================
+
+def _month(ts_ms: int) -> str:
+    return datetime.fromtimestamp(int(ts_ms) / 1000, tz=timezone.utc).strftime("%Y-%m")
+
+
+def _column(values: list, dtype: str) -> np.ndarray:
+    """Python reikšmės -> tipizuotas masyvas (NULL: NaN / 0 / "")."""
+    if dtype == "U":
+        return np.array([v or "" for v in values], dtype=str) if values else np.array([], dtype="U1")
+    if dtype.startswith("float"):
+        return np.array([np.nan if v is None else v for v in values], dtype=dtype)
+    return np.array([v or 0 for v in values], dtype=dtype)
+
+
+def _write_atomic(path: Path, arrays: Dict[str, np.ndarray]):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix(".tmp")
+    with open(tmp, "wb") as f:
+        np.savez_compressed(f, **arrays)
+    os.replace(tmp, path)
+
+
+def _read_manifest(root: Path) -> dict:
+    try:
+        return json.loads((root / MANIFEST_NAME).read_text(encoding="utf-8"))
+    except Exception:
+        return {}
+
+
+def _write_manifest(root: Path, manifest: dict):
+    root.mkdir(parents=True, exist_ok=True)
+    tmp = root / (MANIFEST_NAME + ".tmp")
+    tmp.write_text(json.dumps(manifest, indent=2, sort_keys=True), encoding="utf-8")
+    os.replace(tmp, root / MANIFEST_NAME)
+
+
+def _open_source(db_path) -> sqlite3.Connection:
+    """Tik skaitymui (nekeičia WAL / checkpoint'ų, nelaiko rašymo užrakto)."""
+    con = sqlite3.connect(f"file:{Path(db_path).as_posix()}?mode=ro", uri=True, timeout=30)
+    con.execute("PRAGMA query_only = ON")
+    con.execute("PRAGMA busy_timeout = 5000")
+    return con
+
+
+# ============================================================
+# Eksportas
+# ============================================================
+
+def _merge_month(root: Path, table: str, month: str, cols: Sequence[Tuple[str, str]],
+                 cursor_col: str, rows: List[tuple]) -> int:
+    """Naujas eilutes prijungia prie mėnesio failo. Grąžina mėnesio eilučių skaičių."""
+    new = {name: _column([r[i] for r in rows], dtype) for i, (name, dtype) in enumerate(cols)}
+    path = root / table / f"{month}.npz"
+    if path.exists():
+        with np.load(path) as z:
+            old = {k: z[k] for k in z.files}
+        if len(old[cursor_col]):
+            keep = new[cursor_col] > old[cursor_col].max()  # pakartotinio eksporto dubliai
+            new = {k: v[keep] for k, v in new.items()}
+        new = {name: np.concatenate([old[name], new[name]]) if name in old else new[name] for name, _ in cols}
+    _write_atomic(path, new)
+    return len(new[cursor_col])
+
+
+def export_table(con: sqlite3.Connection, table: str, root: Path, manifest: dict) -> int:
+    """Eksportuoja naujas lentelės eilutes nuo manifest žymeklio. Grąžina eilučių skaičių."""
+    cursor_col, cols = TABLES[table]
+    state = manifest.setdefault(table, {"cursor": 0, "months": {}})
+    names = ", ".join(name for name, _ in cols)
+    cur = con.execute(f"""
+        SELECT {names} FROM {table}
+        WHERE {cursor_col} > ? AND ts_ms IS NOT NULL
+        ORDER BY {cursor_col}
+    """, (state["cursor"],))
+    ts_idx = [name for name, _ in cols].index("ts_ms")
+    cur_idx = [name for name, _ in cols].index(cursor_col)
+
+    total = 0
+    while True:
+        chunk = cur.fetchmany(CHUNK_ROWS)
+        if not chunk:
+            break
+        by_month: Dict[str, List[tuple]] = {}
+        for r in chunk:
+            by_month.setdefault(_month(r[ts_idx]), []).append(r)
+        for month, rows in sorted(by_month.items()):
+            state["months"][month] = _merge_month(root, table, month, cols, cursor_col, rows)
+        state["cursor"] = max(state["cursor"], chunk[-1][cur_idx])
+        total += len(chunk)
+        _write_manifest(root, manifest)  # žymeklis po kiekvieno paketo
+    return total
+
+
+def export(db_path=None, root: Optional[Path] = None) -> Dict[str, int]:
+    """Inkrementinis visų TABLES eksportas. Grąžina {lentelė: naujų eilučių}."""
+    from core.db_manager import DB_PATH
+    root = Path(root or ARCHIVE_DIR)
+    manifest = _read_manifest(root)
+    con = _open_source(db_path or DB_PATH)
+    try:
+        out = {}
+        for table in TABLES:
+            t0 = time.perf_counter()
+            out[table] = export_table(con, table, root, manifest)
+            if out[table]:
+                logging.info(f"[ARCHIVE] 📦 {table}: +{out[table]} eilučių "
+                             f"({time.perf_counter() - t0:.2f}s, žymeklis={manifest[table]['cursor']})")
+        manifest["exported_at"] = datetime.now(timezone.utc).isoformat()
+        _write_manifest(root, manifest)
+        return out
+    finally:
+        con.close()
+
+
+# ============================================================
+# Skaitymas (mmap, be kopijavimo)
+# ============================================================
+
+def months(table: str, root: Optional[Path] = None) -> List[str]:
+    root = Path(root or ARCHIVE_DIR)
+    return sorted(p.stem for p in (root / table).glob("*.npz"))
+
+
+def _unpack(src: Path, dst: Path):
+    """Mėnesio .npz -> .npy failai (kartą; perrašoma, jei .npz pasikeitė)."""
+    stamp = dst / ".source"
+    sig = str(src.stat().st_mtime_ns)
+    if stamp.exists() and stamp.read_text() == sig:
+        return
+    dst.mkdir(parents=True, exist_ok=True)
+    with np.load(src) as z:
+        for name in z.files:
+            tmp = dst / f"{name}.npy.tmp"
+            with open(tmp, "wb") as f:
+                np.save(f, z[name])
+            os.replace(tmp, dst / f"{name}.npy")
+    stamp.write_text(sig)
+
+
+def load_month(table: str, month: str, columns: Optional[Sequence[str]] = None,
+               root: Optional[Path] = None) -> Dict[str, np.ndarray]:
+    """{stulpelis: np.memmap} vienam mėnesiui (tik skaitymui)."""
+    root = Path(root or ARCHIVE_DIR)
+    src = root / table / f"{month}.npz"
+    dst = root / CACHE_DIR.name / table / month
+    _unpack(src, dst)
+    names = columns or [name for name, _ in TABLES[table][1]]
+    return {name: np.load(dst / f"{name}.npy", mmap_mode="r") for name in names}
+
+
+def iter_months(table: str, since: Optional[str] = None, until: Optional[str] = None,
+                columns: Optional[Sequence[str]] = None,
+                root: Optional[Path] = None) -> Iterator[Tuple[str, Dict[str, np.ndarray]]]:
+    """(YYYY-MM, stulpeliai) kiekvienam mėnesiui intervale [since, until]."""
+    for month in months(table, root):
+        if (since and month < since) or (until and month > until):
+            continue
+        yield month, load_month(table, month, columns, root)
+
+
+# ============================================================
+# Periodinis eksportas
+# ============================================================
+
+def start_export_loop(interval_sec: Optional[int] = None):
+    """Fono thread'as: export() kas ARCHIVE_EXPORT_INTERVAL_SEC (0 — išjungta)."""
+    interval = int(interval_sec or CONFIG.get("ARCHIVE_EXPORT_INTERVAL_SEC", EXPORT_INTERVAL_SEC))
+    if interval <= 0:
+        return None
+
+    def _loop():
+        while True:
+            try:
+                export()
+            except Exception as e:
+                logging.warning(f"[ARCHIVE] Eksporto klaida: {e}")
+            time.sleep(interval)
+
+    t = threading.Thread(target=_loop, name="archive-export", daemon=True)
+    t.start()
+    logging.info(f"[ARCHIVE] 🟢 Periodinis eksportas kas {interval // 60} min.")
+    return t
@@ -0,0 +1,272 @@
+# ============================================================
+# core/async_exchange_adapter.py — asyncio ExchangeAdapter variantas
+# ------------------------------------------------------------
+# - Tas pats metodų paviršius kaip ExchangeAdapter:
+#     await get_klines(), await execute_market_order(), await get_price()
+#   + lygiagretus fan-out: await get_klines_many(symbols)
+# - HTTP: aiohttp (jei įdiegtas) su vienu ClientSession; kitaip —
+#   core.http_client per asyncio.to_thread (tas pats pool'as, ribotas
+#   lygiagretumas per Semaphore)
+# - Binance weight biudžetas (core.rate_limiter) taikomas abiem keliais
+# - AsyncAdapterFacade: sinchroninis fasadas (atskiras event loop thread'as),
+#   kad main_loop / warmup / OrderExecutor veiktų be pakeitimų.
+#   Įjungiama CONFIG["ASYNC_ADAPTER"] = true
+# - Pavedimai: tie patys parametrai kaip sinchroniniame adapteryje
+#   (newClientOrderId, newOrderRespType=FULL, surikiuotas parašas).
+#   Fasado timeout'as atšaukia korutiną ir pavedimą paieško pagal
+#   client order id — įvykdytas pavedimas nepraleidžiamas
+# ============================================================
+
+import asyncio
+import logging
+import threading
+import concurrent.futures
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+try:
+    import aiohttp
+except Exception:
+    aiohttp = None
+
+from core.config import CONFIG
+from core import ws_bridge
+from core import http_client
+from core import rate_limiter
+from core import exchange_info
+from core.exchange_adapter import (
+    API_BASE, _parse_klines, _order_result, _order_params, _query_params, _fill_from_response,
+)
+from core.ws_order_transport import new_client_order_id
+
+MAX_CONCURRENCY = 8
+FACADE_CALL_TIMEOUT = 30.0
+
+
+class AsyncExchangeAdapter:
+    def __init__(self, api_key: str, api_secret: str, max_concurrency: int = MAX_CONCURRENCY):
+        self.api_key = api_key
+        self.api_secret = api_secret
+        self.fee_taker = CONFIG.get("FEE_TAKER", 0.0006)
+        self.fee_maker = CONFIG.get("FEE_MAKER", 0.0004)
+        self.base_quote = CONFIG.get("BASE_QUOTE", "USDC").upper()
+        self.dry_run = CONFIG.get("DRY_RUN", True)
+        self.max_concurrency = max_concurrency
+        self._session = None
+        self._sem: Optional[asyncio.Semaphore] = None
+
+    # ------------------------------------------------------------
+    # HTTP sluoksnis
+    # ------------------------------------------------------------
+    def _semaphore(self) -> asyncio.Semaphore:
+        # Kuriamas pirmo kvietimo metu — kad priklausytų veikiančiam loop'ui
+        if self._sem is None:
+            self._sem = asyncio.Semaphore(self.max_concurrency)
+        return self._sem
+
+    async def _request(self, method: str, url: str, params: Optional[Dict[str, Any]] = None,
+                       headers: Optional[Dict[str, str]] = None) -> Tuple[int, Any]:
+        """Grąžina (HTTP statusas, JSON). Tinklo klaidos keliamos toliau."""
+        async with self._semaphore():
+            if aiohttp is None:
+                r = await asyncio.to_thread(http_client.request, method, url, params=params, headers=headers)
+                return r.status_code, r.json()
+
+            path = http_client._endpoint_key(url)
+            weight, prio = rate_limiter.endpoint_cost(path, params, method)
+            # acquire() blokuoja thread'ą, todėl — ne event loop'e
+            await asyncio.to_thread(rate_limiter.BUDGET.acquire, weight, prio)
+            if self._session is None:
+                self._session = aiohttp.ClientSession(
+                    connector=aiohttp.TCPConnector(limit=http_client.POOL_MAXSIZE),
+                )
+            timeout = http_client.ENDPOINT_TIMEOUTS.get(path, http_client.DEFAULT_TIMEOUT)
+            if isinstance(timeout, tuple):
+                timeout = aiohttp.ClientTimeout(sock_connect=timeout[0], sock_read=timeout[1])
+            else:
+                timeout = aiohttp.ClientTimeout(total=timeout)
+            async with self._session.request(method, url, params=params, headers=headers, timeout=timeout) as r:
+                rate_limiter.BUDGET.observe(r.status, r.headers)
+                return r.status, await r.json(content_type=None)
+
+    async def close(self):
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+    # ------------------------------------------------------------
+    # Rinkos duomenys
+    # ------------------------------------------------------------
+    async def get_klines(self, symbol: str, interval: str = "1m", limit: int = 100) -> list:
+        try:
+            status, data = await self._request(
+                "GET", f"{API_BASE}/api/v3/klines",
+                params={"symbol": symbol, "interval": interval, "limit": limit},
+            )
+            if status != 200:
+                raise RuntimeError(f"HTTP {status}: {data}")
+            return _parse_klines(data)
+        except Exception as e:
+            logging.error(f"[AsyncExchangeAdapter] Klaida gaunant klines {symbol}: {e}")
+            return []
+
+    async def get_klines_many(self, symbols: Iterable[str], interval: str = "1m",
+                              limit: int = 100) -> Dict[str, list]:
+        """Lygiagrečiai (iki max_concurrency) parsiunčia klines daugeliui simbolių."""
+        syms = list(dict.fromkeys(symbols))
+        results = await asyncio.gather(*(self.get_klines(s, interval, limit) for s in syms))
+        return dict(zip(syms, results))
+
+    async def get_price(self, symbol: str) -> Optional[float]:
+        # WS cache — atmintyje; REST fallback gali blokuoti, todėl per thread'ą
+        return await asyncio.to_thread(ws_bridge.get_price, symbol)
+
+    # ------------------------------------------------------------
+    # Pavedimai
+    # ------------------------------------------------------------
+    async def execute_market_order(self, symbol: str, side: str, qty: float, reason: str, confidence: float,
+                                   client_id: Optional[str] = None) -> dict:
+        qty = max(0.0, qty)
+        if qty == 0.0:
+            return {"ok": False, "error": "Kiekis (qty) negali būti nulis."}
+
+        price_now = await self.get_price(symbol)
+        if not price_now:
+            return {"ok": False, "error": f"Nepavyko gauti kainos {symbol}"}
+
+        if self.dry_run:
+            fill_price = price_now * (1.0005 if side == "BUY" else 0.9995)
+            logging.info(f"[DryRunOrder] ✅ {side} {qty} {symbol} @ {fill_price:.6f} (simuliacija, async)")
+            return _order_result(symbol, side, qty, fill_price, self.fee_taker, reason, confidence, dry_run=True)
+        return await self._real_order(symbol, side, qty, price_now, reason, confidence,
+                                      client_id or new_client_order_id())
+
+    async def query_order(self, symbol: str, client_id: str) -> Optional[dict]:
+        """Pavedimas pagal newClientOrderId (None — jei birža jo neturi)."""
+        status, data = await self._request("GET", f"{API_BASE}/api/v3/order",
+                                           params=_query_params(symbol, client_id, self.api_secret),
+                                           headers={"X-MBX-APIKEY": self.api_key})
+        if status == 200:
+            return data
+        if status == 400 and (data or {}).get("code") == -2013:
+            return None
+        raise RuntimeError(f"HTTP {status}: {data}")
+
+    async def _real_order(self, symbol: str, side: str, qty: float, price_now: float,
+                          reason: str, confidence: float, client_id: str) -> dict:
+        try:
+            ok, why, qty_str = await asyncio.to_thread(exchange_info.prepare_order_qty, symbol, qty, price_now, API_BASE)
+            if not ok:
+                logging.warning(f"[AsyncExchangeAdapter] ⛔ {symbol} {side} qty={qty} atmestas pagal biržos filtrus: {why}")
+                return {"ok": False, "error": f"{why} (qty={qty_str})"}
+
+            params = _order_params(symbol, side, qty_str, client_id, self.api_secret)
+            status, data = await self._request("POST", f"{API_BASE}/api/v3/order", params=params,
+                                               headers={"X-MBX-APIKEY": self.api_key})
+            if status >= 400:
+                raise RuntimeError(f"HTTP {status}: {data}")
+
+            # Gali laukti user stream fill'o — ne event loop'e
+            executed_qty, fill_price = await asyncio.to_thread(_fill_from_response, data, qty, symbol)
+            logging.info(f"[BinanceOrder] ✅ {side} {executed_qty} {symbol} @ {fill_price:.6f} (async)")
+            return _order_result(symbol, side, executed_qty, fill_price, self.fee_taker, reason, confidence, dry_run=False)
+        except Exception as e:
+            logging.exception(f"[AsyncExchangeAdapter] Klaida vykdant pavedimą {symbol}: {e}")
+            return {"ok": False, "error": str(e)}
+
+    # ------------------------------------------------------------
+    def get_paper_account(self) -> Optional[dict]:
+        if self.dry_run:
+            from core.paper_account import get_state
+            return get_state()
+        return None
+
+    def is_paper_mode(self) -> bool:
+        return self.dry_run
+
+
+# ============================================================
+# Sinchroninis fasadas (migracijos laikotarpiui)
+# ============================================================
+
+class AsyncAdapterFacade:
+    """
+    ExchangeAdapter suderinamas fasadas: kiekvienas kvietimas perduodamas į
+    foninį event loop'ą. Kviesti galima iš bet kurio thread'o (pvz. warmup
+    ThreadPoolExecutor) — užklausos vis tiek vykdomos viename loop'e.
+    """
+
+    def __init__(self, adapter: AsyncExchangeAdapter):
+        self.adapter = adapter
+        self.loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self.loop.run_forever, name="async-adapter", daemon=True)
+        self._thread.start()
+
+    def _call(self, coro, timeout: float = FACADE_CALL_TIMEOUT):
+        return asyncio.run_coroutine_threadsafe(coro, self.loop).result(timeout)
+
+    def __getattr__(self, name):
+        # fee_taker, dry_run, base_quote, is_paper_mode() ...
+        return getattr(self.adapter, name)
+
+    def get_klines(self, symbol: str, interval: str = "1m", limit: int = 100) -> list:
+        return self._call(self.adapter.get_klines(symbol, interval, limit))
+
+    def get_klines_many(self, symbols: Iterable[str], interval: str = "1m", limit: int = 100) -> Dict[str, list]:
+        syms = list(symbols)
+        # Didelis sąrašas ilgiau trunka — timeout'as proporcingas bangų skaičiui
+        waves = max(1, -(-len(syms) // self.adapter.max_concurrency))
+        return self._call(self.adapter.get_klines_many(syms, interval, limit), timeout=FACADE_CALL_TIMEOUT * waves)
+
+    def get_price(self, symbol: str) -> Optional[float]:
+        return self._call(self.adapter.get_price(symbol))
+
+    def execute_market_order(self, symbol: str, side: str, qty: float, reason: str, confidence: float) -> dict:
+        client_id = new_client_order_id()
+        fut = asyncio.run_coroutine_threadsafe(
+            self.adapter.execute_market_order(symbol, side, qty, reason, confidence, client_id=client_id), self.loop)
+        try:
+            return fut.result(FACADE_CALL_TIMEOUT)
+        except concurrent.futures.TimeoutError:
+            # Korutina atšaukiama; užklausa galėjo pasiekti biržą — tikrinam pagal client order id
+            fut.cancel()
+            logging.warning(f"[AsyncAdapterFacade] Pavedimas {symbol} negautas per {FACADE_CALL_TIMEOUT:.0f}s — tikrinama biržoje")
+            return self._recover_order(symbol, side, qty, reason, confidence, client_id)
+        except Exception as e:
+            logging.exception(f"[AsyncAdapterFacade] Pavedimas {symbol} nepavyko: {e}")
+            return {"ok": False, "error": str(e)}
+
+    def _recover_order(self, symbol: str, side: str, qty: float, reason: str, confidence: float,
+                       client_id: str) -> dict:
+        """Po timeout'o: jei pavedimas biržoje yra — grąžinamas kaip įvykdytas."""
+        if self.adapter.dry_run:
+            return {"ok": False, "error": "timeout"}
+        try:
+            data = self._call(self.adapter.query_order(symbol, client_id))
+        except Exception as e:
+            logging.error(f"[AsyncAdapterFacade] ❌ {symbol} {client_id} būsena nežinoma: {e}")
+            return {"ok": False, "error": f"timeout, būsena nežinoma ({client_id})", "client_order_id": client_id}
+        if data is None or float(data.get("executedQty", 0) or 0) <= 0:
+            return {"ok": False, "error": f"timeout, pavedimas neįvykdytas ({client_id})"}
+        executed_qty, fill_price = _fill_from_response(data, qty, symbol)
+        logging.info(f"[BinanceOrder] ✅ {side} {executed_qty} {symbol} @ {fill_price:.6f} (async, rastas po timeout'o)")
+        return _order_result(symbol, side, executed_qty, fill_price, self.adapter.fee_taker, reason, confidence,
+                             dry_run=False)
+
+    def close(self):
+        try:
+            self._call(self.adapter.close(), timeout=5.0)
+        except Exception:
+            pass
+        self.loop.call_soon_threadsafe(self.loop.stop)
+
+
+_FACADE: Optional[AsyncAdapterFacade] = None
+_FACADE_LOCK = threading.Lock()
+
+
+def get_sync_facade() -> AsyncAdapterFacade:
+    global _FACADE
+    with _FACADE_LOCK:
+        if _FACADE is None:
+            _FACADE = AsyncAdapterFacade(AsyncExchangeAdapter(CONFIG.get("API_KEY", ""), CONFIG.get("API_SECRET", "")))
+        return _FACADE
@@ -0,0 +1,22 @@
+# ============================================================
+# core/binance_auth.py — Binance HMAC-SHA256 parašas (REST ir WS API)
+# ------------------------------------------------------------
+# - sign() grąžina NAUJĄ dict'ą: raktai surikiuoti abėcėliškai, o
+#   "signature" — paskutinis. Pasirašoma ir siunčiama ta pačia tvarka,
+#   todėl biržos sudaryta užklausos eilutė sutampa su pasirašyta
+#   (kitaip — klaida -1022)
+# - Vienintelis signeris: exchange_adapter, async_exchange_adapter,
+#   user_stream ir ws_order_transport
+# ============================================================
+
+import hmac
+import hashlib
+from typing import Any, Dict
+
+
+def sign(params: Dict[str, Any], secret: str) -> Dict[str, Any]:
+    """Surikiuoti parametrai + signature (ta tvarka ir siųsti)."""
+    ordered = {k: params[k] for k in sorted(params)}
+    query = "&".join(f"{k}={v}" for k, v in ordered.items())
+    ordered["signature"] = hmac.new(secret.encode(), query.encode(), hashlib.sha256).hexdigest()
+    return ordered
@@ -1,8 +1,21 @@
 # core/config.py
-# Visiškai supaprastintas konfigūracijų valdymas (tik JSON, be funkcijų)
+# Konfigūracijų valdymas: JSON + tipizuotas, iš anksto apskaičiuotas snapshot'as
+#
+# - CONFIG (dict) paliekamas suderinamumui; perkrovus jis atnaujinamas vietoje,
+#   todėl visi `from core.config import CONFIG` importai mato naujas reikšmes.
+# - get_snapshot() grąžina nekintamą ConfigSnapshot su paprastais atributais
+#   (karštiems ciklams — jokių float(CONFIG.get(...)) kiekvienoje iteracijoje).
+# - reload_config() perskaito failą ir atomiškai pakeičia snapshot'ą; prenumeratoriai
+#   gauna pasikeitusių raktų aibę (pvz. {"EXIT.TP_BASE", "DRY_RUN"}).
+# - start_config_watcher() seka config.json mtime (ir SIGHUP, jei palaikoma).
 
+import os
 import json
+import signal
+import logging
+import threading
 from pathlib import Path
+from typing import Any, Callable, Dict, List, Set
 
 CONFIG_PATH = Path(__file__).resolve().parent / "config.json"
 
@@ -14,8 +27,231 @@ try:
 except Exception:
     CONFIG = {}
 
+
+# ----------------------------------------------------
+# Tipizuotas snapshot'as
+# ----------------------------------------------------
+class ConfigSnapshot:
+    """
+    Nekintama konfigūracijos kopija su iš anksto konvertuotais laukais.
+    Naujas snapshot'as sukuriamas kiekvieno perkrovimo metu, senas lieka
+    galioti tiems, kas jį jau pasiėmė (jokio dalinio atnaujinimo).
+    """
+
+    __slots__ = (
+        "raw", "version", "mtime",
+        "mode", "dry_run", "use_testnet", "base_quote",
+        "fee_taker", "fee_maker", "max_spread_bps", "max_slippage_bps",
+        "min_liquidity_usdc", "min_per_trade_usdc",
+        "ai_confidence_threshold", "edge_min_pct", "debug_force_signals",
+        "daily_max_drawdown_pct",
+        "tf_enabled", "tf_ema_fast", "tf_ema_slow", "tf_up_bias", "tf_down_bias",
+        "tp_base", "sl_base", "tsl_base", "min_hold_time_h", "ai_exit_min_hold_h",
+        "hold_timeout_h", "max_hold_h", "vol_scale", "confidence_scale",
+        "max_open_positions", "max_exposure_pct",
+        "auto_warmup", "warmup_min_ready_ratio", "warmup_force_symbol", "history_window",
+        "sizer_debug_enabled", "_frozen",
+    )
+
+    def __init__(self, raw: Dict[str, Any], version: int = 0, mtime: float = 0.0):
+        ex = raw.get("EXIT", {}) or {}
+        pf = raw.get("PORTFOLIO", {}) or {}
+        tf = raw.get("TREND_FILTER", {}) or {}
+        ai = raw.get("AI_SETTINGS", {}) or {}
+
+        self.raw = raw
+        self.version = int(version)
+        self.mtime = float(mtime)
+
+        self.mode = str(raw.get("MODE", "TEST")).upper()
+        self.dry_run = bool(raw.get("DRY_RUN", True))
+        self.use_testnet = bool(raw.get("USE_TESTNET", True))
+        self.base_quote = str(raw.get("BASE_QUOTE", "USDC") or "USDC").upper()
+
+        self.fee_taker = float(raw.get("FEE_TAKER", 0.0006))
+        self.fee_maker = float(raw.get("FEE_MAKER", 0.0004))
+        self.max_spread_bps = float(raw.get("MAX_SPREAD_BPS", 10.0))
+        self.max_slippage_bps = float(raw.get("MAX_SLIPPAGE_BPS", 20.0))
+        self.min_liquidity_usdc = float(raw.get("MIN_LIQUIDITY_USDC", 100))
+        self.min_per_trade_usdc = float(raw.get("MIN_PER_TRADE_USDC", 25))
+
+        self.ai_confidence_threshold = float(raw.get("AI_CONFIDENCE_THRESHOLD", 0.7))
+        self.edge_min_pct = float(raw.get("EDGE_MIN_PCT", 0.0015))
+        self.debug_force_signals = bool(raw.get("DEBUG_FORCE_SIGNALS", True))
+        self.daily_max_drawdown_pct = float(raw.get("DAILY_MAX_DRAWDOWN_PCT", 2.0))
+
+        self.tf_enabled = bool(tf.get("ENABLED", True))
+        self.tf_ema_fast = int(tf.get("EMA_FAST", 9))
+        self.tf_ema_slow = int(tf.get("EMA_SLOW", 50))
+        self.tf_up_bias = float(tf.get("TREND_UP_BIAS", 0.0005))
+        self.tf_down_bias = float(tf.get("TREND_DOWN_BIAS", -0.0005))
+
+        self.tp_base = float(ex.get("TP_BASE", 0.06))
+        self.sl_base = float(ex.get("SL_BASE", 0.02))
+        self.tsl_base = float(ex.get("TSL_BASE", 0.015))
+        self.min_hold_time_h = float(ex.get("MIN_HOLD_TIME_H", 0.083))
+        self.ai_exit_min_hold_h = float(ex.get("AI_EXIT_MIN_HOLD_H", 0.167))
+        self.hold_timeout_h = float(ex.get("HOLD_TIMEOUT_H", 12))
+        self.max_hold_h = float(ex.get("MAX_HOLD_H", 24))
+        self.vol_scale = bool(ex.get("VOL_SCALE", True))
+        self.confidence_scale = bool(ex.get("CONFIDENCE_SCALE", True))
+
+        self.max_open_positions = int(pf.get("MAX_OPEN_POSITIONS", 8))
+        self.max_exposure_pct = float(pf.get("MAX_EXPOSURE_PCT", 85.0))
+
+        self.auto_warmup = bool(ai.get("AUTO_WARMUP", False))
+        self.warmup_min_ready_ratio = float(ai.get("WARMUP_MIN_READY_RATIO", 0.7))
+        self.warmup_force_symbol = str(ai.get("WARMUP_FORCE_SYMBOL", "") or "").upper()
+        self.history_window = int(ai.get("HISTORY_WINDOW", 300))
+
+        self.sizer_debug_enabled = bool(raw.get("SIZER_DEBUG_ENABLED", False))
+        self._frozen = True
+
+    def __setattr__(self, key, value):
+        if hasattr(self, "_frozen"):
+            raise AttributeError("ConfigSnapshot yra nekintamas")
+        object.__setattr__(self, key, value)
+
+    def get(self, key: str, default: Any = None) -> Any:
+        """Suderinamumas su dict stiliaus prieiga (šaltiems keliams)."""
+        return self.raw.get(key, default)
+
+
+def _flatten(d: Dict[str, Any], prefix: str = "") -> Dict[str, Any]:
+    out = {}
+    for k, v in d.items():
+        key = f"{prefix}{k}"
+        if isinstance(v, dict):
+            out.update(_flatten(v, key + "."))
+        else:
+            out[key] = v
+    return out
+
+
+def diff_keys(old: Dict[str, Any], new: Dict[str, Any]) -> Set[str]:
+    """Grąžina pasikeitusių (taškais sujungtų) raktų aibę."""
+    a, b = _flatten(old or {}), _flatten(new or {})
+    return {k for k in a.keys() | b.keys() if a.get(k, object()) != b.get(k, object())}
+
+
+def _file_mtime() -> float:
+    try:
+        return CONFIG_PATH.stat().st_mtime
+    except OSError:
+        return 0.0
+
+
+_reload_lock = threading.Lock()
+_subscribers: List[Callable[[ConfigSnapshot, Set[str]], None]] = []
+_SNAPSHOT = ConfigSnapshot(json.loads(json.dumps(CONFIG)), version=1, mtime=_file_mtime())
+_watcher_started = False
+
+
+def get_snapshot() -> ConfigSnapshot:
+    """Grąžina dabartinį snapshot'ą (nuorodos nuskaitymas yra atominis)."""
+    return _SNAPSHOT
+
+
+def subscribe(callback: Callable[[ConfigSnapshot, Set[str]], None]):
+    """Užregistruoja callback(snapshot, changed_keys), kviečiamą po kiekvieno pokyčio."""
+    with _reload_lock:
+        if callback not in _subscribers:
+            _subscribers.append(callback)
+
+
+def unsubscribe(callback: Callable[[ConfigSnapshot, Set[str]], None]):
+    with _reload_lock:
+        if callback in _subscribers:
+            _subscribers.remove(callback)
+
+
+def _apply(new_raw: Dict[str, Any], mtime: float) -> Set[str]:
+    global _SNAPSHOT
+    with _reload_lock:
+        old = _SNAPSHOT
+        changed = diff_keys(old.raw, new_raw)
+        if not changed:
+            # Failas perrašytas, bet turinys tas pats — tik atnaujinam mtime
+            _SNAPSHOT = ConfigSnapshot(old.raw, version=old.version, mtime=mtime)
+            return changed
+        try:
+            snap = ConfigSnapshot(new_raw, version=old.version + 1, mtime=mtime)
+        except (TypeError, ValueError) as e:
+            logging.error(f"[CONFIG] Neteisingos reikšmės, perkrovimas atmestas: {e}")
+            _SNAPSHOT = ConfigSnapshot(old.raw, version=old.version, mtime=mtime)
+            return set()
+
+        # Atnaujinam suderinamumo dict'ą vietoje: vienas update() (be clear() —
+        # kiti thread'ai niekada nemato tuščio CONFIG), po to išmetami pašalinti raktai
+        fresh = json.loads(json.dumps(new_raw))
+        CONFIG.update(fresh)
+        for key in CONFIG.keys() - fresh.keys():
+            CONFIG.pop(key, None)
+        _SNAPSHOT = snap
+        subs = list(_subscribers)
+
+    logging.info(f"[CONFIG] 🔄 Perkrauta v{snap.version}: {', '.join(sorted(changed))}")
+    for cb in subs:
+        try:
+            cb(snap, changed)
+        except Exception as e:
+            logging.warning(f"[CONFIG] Prenumeratoriaus klaida: {e}")
+    return changed
+
+
+def reload_config() -> Set[str]:
+    """Perskaito config.json. Esant klaidai paliekamas senas snapshot'as."""
+    mtime = _file_mtime()
+    try:
+        new_raw = json.loads(CONFIG_PATH.read_text(encoding="utf-8"))
+        if not isinstance(new_raw, dict):
+            raise ValueError("config.json turi būti objektas")
+    except Exception as e:
+        logging.error(f"[CONFIG] Nepavyko perskaityti {CONFIG_PATH.name}: {e}")
+        return set()
+    return _apply(new_raw, mtime)
+
+
+def start_config_watcher(interval_sec: float = 2.0):
+    """Fono gija, perkraunanti konfigūraciją pasikeitus failui (+ SIGHUP)."""
+    global _watcher_started
+    if _watcher_started:
+        return
+    _watcher_started = True
+
+    def _worker():
+        while True:
+            try:
+                if _file_mtime() != _SNAPSHOT.mtime:
+                    reload_config()
+            except Exception as e:
+                logging.warning(f"[CONFIG] Watcher klaida: {e}")
+            threading.Event().wait(interval_sec)
+
+    threading.Thread(target=_worker, daemon=True).start()
+
+    if hasattr(signal, "SIGHUP") and threading.current_thread() is threading.main_thread():
+        try:
+            signal.signal(signal.SIGHUP, lambda *_: reload_config())
+        except Exception:
+            pass
+
+
 # ----------------------------------------------------
 # Pagalbinė funkcija išsaugoti (naudojama tik API pusėje)
 # ----------------------------------------------------
-def save_config(new_config: dict):
-    CONFIG_PATH.write_text(json.dumps(new_config, indent=2), encoding="utf-8")
+def save_config(new_config: dict) -> Set[str]:
+    """
+    Patikrina, atomiškai įrašo config.json (tmp + os.replace) ir perkrauna
+    snapshot'ą. Neteisingos reikšmės — ValueError, failas nepaliečiamas.
+    """
+    if not isinstance(new_config, dict):
+        raise ValueError("konfigūracija turi būti objektas")
+    try:
+        ConfigSnapshot(json.loads(json.dumps(new_config)))
+    except (TypeError, ValueError) as e:
+        raise ValueError(f"neteisingos konfigūracijos reikšmės: {e}") from e
+    tmp = CONFIG_PATH.with_suffix(".json.tmp")
+    tmp.write_text(json.dumps(new_config, indent=2), encoding="utf-8")
+    os.replace(tmp, CONFIG_PATH)
+    return _apply(json.loads(json.dumps(new_config)), _file_mtime())
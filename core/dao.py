@@ -0,0 +1,230 @@
+# ============================================================
+# core/dao.py — duomenų prieigos sluoksnis (skaitymai ir risk_state)
+# ------------------------------------------------------------
+# - Vardiniai sakiniai (STATEMENTS): kiekvienas SQL tekstas sukuriamas
+#   vieną kartą, todėl sqlite3 paruoštų sakinių cache (cached_statements)
+#   jį randa kiekvienoje jungtyje — jokio pakartotinio parsinimo
+# - Eilutės -> __slots__ įrašai (Position, Trade, EquityPoint); SELECT
+#   stulpelių sąrašas generuojamas iš __slots__, todėl tvarka sutampa
+# - columns() — masiniai skaitymai kaip stulpelių masyvai (be įrašų)
+# - Kiekvienam sakiniui: kvietimai, eilutės, bendra / didžiausia trukmė
+#   (get_metrics())
+# - Rašymai į pagrindines lenteles eina per core/write_queue.py
+# ============================================================
+
+import time
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+
+from core.timeutil import iso_to_ms
+
+
+# ============================================================
+# Įrašai
+# ============================================================
+
+class _Record:
+    __slots__ = ()
+
+    def as_dict(self) -> dict:
+        return {k: getattr(self, k) for k in self.__slots__}
+
+    def __repr__(self):
+        body = ", ".join(f"{k}={getattr(self, k)!r}" for k in self.__slots__[:3])
+        return f"{type(self).__name__}({body})"
+
+
+class Position(_Record):
+    __slots__ = ("symbol", "entry_price", "qty", "opened_at", "opened_at_ms", "confidence", "edge")
+
+    def __init__(self, symbol: str, entry_price: float, qty: float, opened_at: str,
+                 opened_at_ms: int = 0, confidence: float = 0.0, edge: float = 0.0):
+        self.symbol = symbol
+        self.entry_price = float(entry_price or 0.0)
+        self.qty = float(qty or 0.0)
+        self.opened_at = opened_at
+        self.opened_at_ms = int(opened_at_ms or iso_to_ms(opened_at) or 0)
+        self.confidence = float(confidence or 0.0)
+        self.edge = float(edge or 0.0)
+
+    def as_dict(self) -> dict:
+        """Formatas, kurį grąžindavo paper_account.get_open_positions()."""
+        return {
+            "entry_price": self.entry_price,
+            "qty": self.qty,
+            "confidence": self.confidence,
+            "opened_at": self.opened_at,
+        }
+
+
+class Trade(_Record):
+    __slots__ = ("id", "ts", "ts_ms", "event", "symbol", "price", "qty", "usd_value",
+                 "pnl_pct", "pnl_usdc", "reason", "confidence", "hold_sec")
+
+    def __init__(self, id, ts, ts_ms, event, symbol, price, qty, usd_value,
+                 pnl_pct, pnl_usdc, reason, confidence, hold_sec):
+        self.id = id
+        self.ts = ts
+        self.ts_ms = ts_ms
+        self.event = event
+        self.symbol = symbol
+        self.price = price
+        self.qty = qty
+        self.usd_value = usd_value
+        self.pnl_pct = pnl_pct
+        self.pnl_usdc = pnl_usdc
+        self.reason = reason
+        self.confidence = confidence
+        self.hold_sec = hold_sec
+
+
+class EquityPoint(_Record):
+    __slots__ = ("ts", "ts_ms", "equity", "day_pnl_pct", "equity_pct_from_start",
+                 "free_usdc", "used_usdc", "positions")
+
+    def __init__(self, ts, ts_ms, equity, day_pnl_pct, equity_pct_from_start,
+                 free_usdc, used_usdc, positions):
+        self.ts = ts
+        self.ts_ms = ts_ms
+        self.equity = float(equity or 0.0)
+        self.day_pnl_pct = float(day_pnl_pct or 0.0)
+        self.equity_pct_from_start = float(equity_pct_from_start or 0.0)
+        self.free_usdc = float(free_usdc or 0.0)
+        self.used_usdc = float(used_usdc or 0.0)
+        self.positions = int(positions or 0)
+
+
+# ============================================================
+# Vardiniai sakiniai
+# ============================================================
+
+class Statement:
+    __slots__ = ("name", "sql", "record", "columns")
+
+    def __init__(self, name: str, sql: str, record: Optional[type] = None, columns: Tuple[str, ...] = ()):
+        self.name = name
+        self.record = record
+        self.columns = tuple(record.__slots__) if record else tuple(columns)
+        self.sql = " ".join(sql.format(cols=", ".join(self.columns)).split())
+
+
+STATEMENTS: Dict[str, Statement] = {s.name: s for s in (
+    Statement("positions.open", "SELECT {cols} FROM positions WHERE state='OPEN'", Position),
+    Statement("trades.recent", "SELECT {cols} FROM trades ORDER BY ts_ms DESC LIMIT ?", Trade),
+    Statement("trades.closed_since",
+              "SELECT {cols} FROM trades WHERE ts_ms >= ? AND event='CLOSE' ORDER BY ts_ms DESC", Trade),
+    Statement("equity.latest", "SELECT {cols} FROM equity_history ORDER BY ts_ms DESC LIMIT 1", EquityPoint),
+    Statement("risk_state.all", "SELECT {cols} FROM risk_state", columns=("key", "value")),
+    Statement("risk_state.set", "INSERT OR REPLACE INTO risk_state (key, value) VALUES (?, ?)"),
+    Statement("state_store.get", "SELECT {cols} FROM state_store WHERE key = ?", columns=("value",)),
+    Statement("state_store.set", "INSERT OR REPLACE INTO state_store (key, value, updated_ms) VALUES (?, ?, ?)"),
+    Statement("state_store.delete", "DELETE FROM state_store WHERE key = ?"),
+    Statement("journal_state.reset_ms", "SELECT {cols} FROM journal_state WHERE id = 1", columns=("reset_ms",)),
+)}
+
+
+# ============================================================
+# Vykdymas + laiko skaitikliai
+# ============================================================
+
+_metrics_lock = threading.Lock()
+_metrics: Dict[str, List[float]] = {}  # vardas -> [kvietimai, eilutės, suma_ms, max_ms]
+
+
+def _record(name: str, rows: int, ms: float):
+    with _metrics_lock:
+        m = _metrics.get(name)
+        if m is None:
+            m = _metrics[name] = [0, 0, 0.0, 0.0]
+        m[0] += 1
+        m[1] += rows
+        m[2] += ms
+        if ms > m[3]:
+            m[3] = ms
+
+
+def _run(name: str, params: tuple, one: bool = False):
+    from core.db_manager import get_conn
+    st = STATEMENTS[name]
+    t0 = time.perf_counter()
+    cur = get_conn().cursor()
+    cur.row_factory = None  # tuple'ai — įrašai kuriami tiesiogiai
+    cur.execute(st.sql, params)
+    rows = cur.fetchmany(1) if one else cur.fetchall()
+    _record(name, len(rows), (time.perf_counter() - t0) * 1000.0)
+    return st, rows
+
+
+def fetch_all(name: str, *params) -> List[Any]:
+    """Visos eilutės kaip sakinio įrašai (arba tuple'ai, jei įrašo klasės nėra)."""
+    st, rows = _run(name, params)
+    return [st.record(*r) for r in rows] if st.record else rows
+
+
+def fetch_one(name: str, *params) -> Optional[Any]:
+    st, rows = _run(name, params, one=True)
+    if not rows:
+        return None
+    return st.record(*rows[0]) if st.record else rows[0]
+
+
+def columns(name: str, *params) -> Dict[str, list]:
+    """Masinis skaitymas: {stulpelis: reikšmių sąrašas} (be įrašų objektų)."""
+    st, rows = _run(name, params)
+    if not rows:
+        return {c: [] for c in st.columns}
+    return {c: list(v) for c, v in zip(st.columns, zip(*rows))}
+
+
+def execute(name: str, *params) -> int:
+    """Rašantis sakinys (commit'as iškart). Grąžina paveiktų eilučių skaičių."""
+    from core.db_manager import get_conn
+    st = STATEMENTS[name]
+    t0 = time.perf_counter()
+    with get_conn() as conn:
+        n = conn.execute(st.sql, params).rowcount
+    _record(name, n, (time.perf_counter() - t0) * 1000.0)
+    return n
+
+
+def get_metrics() -> Dict[str, Dict[str, float]]:
+    with _metrics_lock:
+        return {
+            name: {
+                "calls": int(m[0]),
+                "rows": int(m[1]),
+                "total_ms": round(m[2], 3),
+                "avg_ms": round(m[2] / m[0], 4) if m[0] else 0.0,
+                "max_ms": round(m[3], 3),
+            }
+            for name, m in _metrics.items()
+        }
+
+
+# ============================================================
+# Patogios funkcijos
+# ============================================================
+
+def open_positions() -> List[Position]:
+    return fetch_all("positions.open")
+
+
+def recent_trades(limit: int = 100) -> List[Trade]:
+    return fetch_all("trades.recent", int(limit))
+
+
+def closed_trades_since(since_ms: int) -> Dict[str, list]:
+    return columns("trades.closed_since", int(since_ms))
+
+
+def latest_equity() -> Optional[EquityPoint]:
+    return fetch_one("equity.latest")
+
+
+def risk_state() -> Dict[str, str]:
+    cols = columns("risk_state.all")
+    return dict(zip(cols["key"], cols["value"]))
+
+
+def set_risk_state(key: str, value: str):
+    execute("risk_state.set", key, value)
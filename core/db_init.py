@@ -9,6 +9,8 @@ from pathlib import Path
 from datetime import datetime, timezone
 import logging
 
+from core.db_migrations import run_migrations
+
 BASE_DIR = Path(__file__).resolve().parent
 DATA_DIR = BASE_DIR.parent / "data"
 DATA_DIR.mkdir(exist_ok=True)
@@ -37,77 +39,17 @@ def recreate_tables():
         DROP TABLE IF EXISTS ai_metrics;
         DROP TABLE IF EXISTS risk_state;
         DROP TABLE IF EXISTS trades;
+        DROP TABLE IF EXISTS equity_rollup;
+        DROP TABLE IF EXISTS ai_trade_stats;
+        DROP TABLE IF EXISTS journal_state;
+        DROP TABLE IF EXISTS state_store;
+        DROP TABLE IF EXISTS schema_version;
     """)
-
-    # Sukuriame naujas lenteles
-    cur.executescript("""
-        -- Aktyvios pozicijos
-        CREATE TABLE positions (
-            symbol TEXT PRIMARY KEY,
-            entry_price REAL,
-            qty REAL,
-            opened_at TEXT,
-            confidence REAL DEFAULT 0.0,
-            edge REAL DEFAULT 0.0,
-            state TEXT DEFAULT 'OPEN',
-            closed_at TEXT,
-            close_price REAL,
-            pnl_pct REAL,
-            pnl_usdc REAL,
-            close_reason TEXT
-        );
-
-        -- Equity ir PnL istorija
-        CREATE TABLE equity_history (
-            ts TEXT PRIMARY KEY,
-            equity REAL,
-            day_pnl_pct REAL DEFAULT 0.0,
-            equity_pct_from_start REAL DEFAULT 0.0,
-            free_usdc REAL DEFAULT 0.0,
-            used_usdc REAL DEFAULT 0.0,
-            positions INTEGER DEFAULT 0
-        );
-        CREATE INDEX IF NOT EXISTS ix_equity_history_ts ON equity_history(ts);
-
-        -- AI veiklos metrikos
-        CREATE TABLE ai_metrics (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            ts TEXT NOT NULL,
-            day_key TEXT DEFAULT '',
-            trades_count INTEGER DEFAULT 0,
-            avg_confidence REAL DEFAULT 0,
-            avg_pnl REAL DEFAULT 0,
-            win_rate REAL DEFAULT 0,
-            avg_hold_sec REAL DEFAULT 0
-        );
-        CREATE INDEX IF NOT EXISTS ix_ai_metrics_day ON ai_metrics(day_key);
-        
-        -- Rizikos valdymo būsena (key-value)
-        CREATE TABLE risk_state (
-            key TEXT PRIMARY KEY,
-            value TEXT
-        );
-
-        -- Visi sandoriai (atidarymas/uždarymas/SL/TP)
-        CREATE TABLE trades (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            ts TEXT NOT NULL,
-            event TEXT, -- BUY, SELL, OPEN, CLOSE, SL, TP
-            symbol TEXT,
-            price REAL,
-            qty REAL,
-            usd_value REAL,
-            pnl_pct REAL DEFAULT 0.0,
-            reason TEXT,
-            confidence REAL DEFAULT 0.0,
-            hold_sec REAL DEFAULT 0.0
-        );
-        CREATE INDEX IF NOT EXISTS ix_trades_ts ON trades(ts);
-        CREATE INDEX IF NOT EXISTS ix_trades_symbol ON trades(symbol);
-    """)
-
     conn.commit()
     conn.close()
+
+    # Sukuriame naujas lenteles (kanoninė schema — core/db_migrations.py)
+    run_migrations(DB_PATH)
     logging.info("✅ DB struktūra sukurta.")
 
 
@@ -145,33 +87,9 @@ def insert_initial_rows():
     logging.info("✅ Pradiniai duomenys įrašyti.")
 
 def update_ai_metrics_table():
-    """Atnaujina ai_metrics lentelę su reikiamais stulpeliais."""
+    """Papildo ai_metrics trūkstamais stulpeliais (be DROP — per migracijas)."""
     try:
-        conn = sqlite3.connect(DB_PATH)
-        cur = conn.cursor()
-        
-        # Tikriname ar yra confidence stulpelis
-        cur.execute("PRAGMA table_info(ai_metrics)")
-        columns = [col[1] for col in cur.fetchall()]
-        
-        if 'confidence' not in columns:
-            # Sukuriame naują lentelę su visais reikalingais stulpeliais
-            cur.execute("DROP TABLE IF EXISTS ai_metrics")
-            cur.execute("""
-                CREATE TABLE ai_metrics (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    ts TEXT,
-                    symbol TEXT,
-                    confidence REAL,
-                    edge REAL,
-                    pnl_usdc REAL,
-                    hold_sec REAL
-                )
-            """)
-            conn.commit()
-            logging.info("[DB_INIT] ai_metrics lentelė atnaujinta")
-        
-        conn.close()
+        run_migrations(DB_PATH)
     except Exception as e:
         logging.error(f"[DB_INIT] Klaida atnaujinant ai_metrics: {e}")
 
@@ -184,8 +102,12 @@ def init_full_db(force_recreate: bool = False):
     if force_recreate or not DB_PATH.exists():
         recreate_tables()
         insert_initial_rows()
+        # Ankstesni žurnalo įvykiai į naują DB nebeperkeliami; bazinis checkpoint'as
+        from core import journal
+        journal.mark_reset(DB_PATH)
     else:
         logging.info("⚠️ core.db jau egzistuoja, inicijavimas praleistas (naudokite force_recreate=True, jei reikia).")
+        run_migrations(DB_PATH)  # neardančios schemos migracijos
 
 if __name__ == "__main__":
     init_full_db(force_recreate=True)
\ No newline at end of file
@@ -2,105 +2,141 @@
 # ============================================================
 # core/db_manager.py — Centrinis DB valdymas
 # Atnaujinta: 2025-11-13 (pašalintas ai_tuner kodas)
+# ------------------------------------------------------------
+# Jungtys: get_conn() grąžina nuolatinę jungtį kiekvienam thread'ui
+# (pragmos taikomos vieną kartą ją sukuriant, schema tikrinama vieną
+# kartą procese). close() tokiai jungčiai — tik rollback'as, ne uždarymas,
+# todėl senas "connect ... close" kodas veikia be pakeitimų.
+# Pragmos priklauso nuo proceso rolės (core/storage_profile.py).
+# get_write_conn() — write-behind eilės jungtis: dashboard rolėje
+# skaitančios jungtys query_only, todėl rašymams atidaroma atskira.
 # ============================================================
 
 import os
 import json
 import sqlite3
 import logging
+import threading
 from pathlib import Path
 from datetime import datetime, timezone
 
+from core import dao, storage_profile
+
 BASE_DIR = Path(__file__).resolve().parent.parent
 DATA_DIR = BASE_DIR / "data"
 DATA_DIR.mkdir(exist_ok=True)
 
 DB_PATH = DATA_DIR / "core.db"
 
+_schema_lock = threading.Lock()
+_schema_path = None
+_local = threading.local()
+
+
+class PersistentConnection(sqlite3.Connection):
+    """Thread'o jungtis, kurios close() neuždaro (tik atšaukia neužbaigtą transakciją)."""
+
+    def close(self):
+        if self.in_transaction:
+            self.rollback()
+
+    def really_close(self):
+        super().close()
+
+
 def init_db():
-    """Užtikrina, kad DB ir lentelės egzistuoja."""
-    from core.db_init import init_full_db
-    init_full_db()
+    """Užtikrina, kad DB ir lentelės egzistuoja (vieną kartą procese)."""
+    global _schema_path
+    if _schema_path == DB_PATH:
+        return
+    with _schema_lock:
+        if _schema_path == DB_PATH:
+            return
+        from core.db_init import init_full_db
+        init_full_db()
+        _schema_path = DB_PATH
+
+def _open_conn(role=None) -> PersistentConnection:
+    conn = sqlite3.connect(DB_PATH, factory=PersistentConnection)
+    conn.row_factory = sqlite3.Row
+    storage_profile.apply(conn, role)  # pragmos pagal proceso rolę (vieną kartą)
+    return conn
 
 def get_conn():
-    """Grąžina DB connection."""
+    """Grąžina šio thread'o nuolatinę DB jungtį."""
     init_db()
-    conn = sqlite3.connect(DB_PATH)
-    conn.row_factory = sqlite3.Row
+    conn = getattr(_local, "conn", None)
+    if conn is None or getattr(_local, "path", None) != DB_PATH:
+        conn = _local.conn = _open_conn()
+        _local.path = DB_PATH
     return conn
 
+def get_write_conn():
+    """Šio thread'o rašanti jungtis (dashboard rolėje — be query_only)."""
+    if storage_profile.get_role() != "dashboard":
+        return get_conn()
+    init_db()
+    conn = getattr(_local, "wconn", None)
+    if conn is None or getattr(_local, "wpath", None) != DB_PATH:
+        conn = _local.wconn = _open_conn("default")
+        _local.wpath = DB_PATH
+    return conn
+
+def close_thread_conn():
+    """Uždaro šio thread'o jungtis (pvz. prieš thread'o pabaigą ar testuose)."""
+    for attr in ("conn", "wconn"):
+        conn = getattr(_local, attr, None)
+        if conn is not None:
+            try:
+                conn.really_close()
+            except Exception:
+                pass
+            setattr(_local, attr, None)
+
 def insert_trade(trade_data: dict):
-    """Įrašo sandorį į trades lentelę."""
-    with get_conn() as conn:
-        cur = conn.cursor()
-        cur.execute("""
-            INSERT INTO trades 
-            (ts, event, symbol, price, qty, usd_value, pnl_pct, reason, hold_sec, confidence)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-        """, (
-            trade_data.get("ts"),
-            trade_data.get("event"),
-            trade_data.get("symbol"),
-            trade_data.get("price"),
-            trade_data.get("qty"),
-            trade_data.get("usd_value"),
-            trade_data.get("pnl_pct"),
-            trade_data.get("reason"),
-            trade_data.get("hold_sec"),
-            trade_data.get("confidence")
-        ))
-        conn.commit()
+    """Įrašo sandorį į trades lentelę (per write-behind eilę)."""
+    from core import write_queue
+    write_queue.submit(write_queue.TradeInsert(
+        ts=trade_data.get("ts"),
+        event=trade_data.get("event"),
+        symbol=trade_data.get("symbol"),
+        price=trade_data.get("price"),
+        qty=trade_data.get("qty"),
+        usd_value=trade_data.get("usd_value"),
+        pnl_pct=trade_data.get("pnl_pct"),
+        reason=trade_data.get("reason"),
+        hold_sec=trade_data.get("hold_sec"),
+        confidence=trade_data.get("confidence"),
+    ))
 
 def upsert_equity(equity_data: dict):
-    """Įrašo equity įrašą (UPSERT)."""
-    with get_conn() as conn:
-        cur = conn.cursor()
-        cur.execute("""
-            INSERT OR REPLACE INTO equity_history 
-            (ts, equity, day_pnl_pct, equity_pct_from_start, free_usdc, used_usdc, positions)
-            VALUES (?, ?, ?, ?, ?, ?, ?)
-        """, (
-            equity_data.get("timestamp"),
-            equity_data.get("equity"),
-            equity_data.get("day_pnl_pct"),
-            equity_data.get("equity_pct_from_start"),
-            equity_data.get("free_usdc"),
-            equity_data.get("used_usdc"),
-            equity_data.get("positions")
-        ))
-        conn.commit()
+    """Įrašo equity įrašą (UPSERT, per write-behind eilę)."""
+    from core import write_queue
+    write_queue.submit(write_queue.EquityRow(
+        ts=equity_data.get("timestamp"),
+        equity=equity_data.get("equity"),
+        day_pnl_pct=equity_data.get("day_pnl_pct"),
+        equity_pct_from_start=equity_data.get("equity_pct_from_start"),
+        free_usdc=equity_data.get("free_usdc"),
+        used_usdc=equity_data.get("used_usdc"),
+        positions=equity_data.get("positions"),
+        replace=True,
+    ))
 
 def fetch_risk_state() -> dict:
     """Grąžina risk_state lentelės reikšmes."""
-    with get_conn() as conn:
-        cur = conn.cursor()
-        rows = cur.execute("SELECT key, value FROM risk_state").fetchall()
-        return {row['key']: row['value'] for row in rows}
+    return dao.risk_state()
 
 def update_risk_state(key: str, value: str):
     """Atnaujina risk_state reikšmę."""
-    with get_conn() as conn:
-        cur = conn.cursor()
-        cur.execute("""
-            INSERT OR REPLACE INTO risk_state (key, value)
-            VALUES (?, ?)
-        """, (key, value))
-        conn.commit()
+    dao.set_risk_state(key, value)
 
 # ✅ PRIDĖTOS TRŪKSTAMOS FUNKCIJOS dashboard/app.py
 
 def fetch_recent_trades(limit: int = 100):
     """Grąžina paskutinius sandorius iš trades lentelės."""
     try:
-        with get_conn() as conn:
-            cur = conn.cursor()
-            rows = cur.execute("""
-                SELECT ts, event, symbol, price, qty, usd_value, pnl_pct, reason, confidence
-                FROM trades 
-                ORDER BY ts DESC 
-                LIMIT ?
-            """, (limit,)).fetchall()
-            return [dict(row) for row in rows]
+        return [t.as_dict() for t in dao.recent_trades(limit)]
     except Exception as e:
         logging.error(f"[DB_MANAGER] Klaida gaunant sandorius: {e}")
         return []
@@ -108,25 +144,18 @@ def fetch_recent_trades(limit: int = 100):
 def fetch_equity_from_db():
     """Grąžina paskutinį equity įrašą."""
     try:
-        with get_conn() as conn:
-            cur = conn.cursor()
-            row = cur.execute("""
-                SELECT ts, equity, day_pnl_pct, equity_pct_from_start, free_usdc, used_usdc, positions
-                FROM equity_history 
-                ORDER BY ts DESC 
-                LIMIT 1
-            """).fetchone()
-            if row:
-                return dict(row)
-            else:
-                return {
-                    "equity": 10000.0,
-                    "day_pnl_pct": 0.0,
-                    "equity_pct_from_start": 0.0,
-                    "free_usdc": 10000.0,
-                    "used_usdc": 0.0,
-                    "positions": 0
-                }
+        point = dao.latest_equity()
+        if point:
+            return point.as_dict()
+        else:
+            return {
+                "equity": 10000.0,
+                "day_pnl_pct": 0.0,
+                "equity_pct_from_start": 0.0,
+                "free_usdc": 10000.0,
+                "used_usdc": 0.0,
+                "positions": 0
+            }
     except Exception as e:
         logging.error(f"[DB_MANAGER] Klaida gaunant equity: {e}")
         return {"equity": 10000.0, "day_pnl_pct": 0.0}
@@ -134,14 +163,7 @@ def fetch_equity_from_db():
 def fetch_open_positions_db():
     """Grąžina atidarytas pozicijas iš positions lentelės."""
     try:
-        with get_conn() as conn:
-            cur = conn.cursor()
-            rows = cur.execute("""
-                SELECT symbol, entry_price, qty, opened_at, confidence
-                FROM positions 
-                WHERE state='OPEN' AND qty > 0
-            """).fetchall()
-            return [dict(row) for row in rows]
+        return [dict(p.as_dict(), symbol=p.symbol) for p in dao.open_positions() if p.qty > 0]
     except Exception as e:
         logging.error(f"[DB_MANAGER] Klaida gaunant pozicijas: {e}")
         return []
@@ -153,19 +175,12 @@ def ensure_tables_exist():
 def reset_test_mode_state():
     """Išvalo testinius duomenis (paprasta versija)."""
     try:
-        with get_conn() as conn:
-            cur = conn.cursor()
-            # Išvalome pozicijas
-            cur.execute("DELETE FROM positions")
-            # Atstatome pradinį kapitalą
-            cur.execute("DELETE FROM equity_history")
-            cur.execute("""
-                INSERT INTO equity_history 
-                (ts, equity, day_pnl_pct, equity_pct_from_start, free_usdc, used_usdc, positions)
-                VALUES (?, 10000, 0, 0, 10000, 0, 0)
-            """, (datetime.now(timezone.utc).isoformat(),))
-            conn.commit()
-            logging.info("[DB_MANAGER] Testinis reset atliktas")
+        # Per rašymo eilę — įvykis patenka ir į žurnalą (core/journal.py)
+        from core import write_queue
+        write_queue.submit(write_queue.StateReset(datetime.now(timezone.utc).isoformat()), wait=True)
+        from core.position_book import BOOK
+        BOOK.reset()
+        logging.info("[DB_MANAGER] Testinis reset atliktas")
     except Exception as e:
         logging.error(f"[DB_MANAGER] Klaida atliekant reset: {e}")
         
\ No newline at end of file
@@ -0,0 +1,418 @@
+# ============================================================
+# core/db_migrations.py — versijuotos core.db schemos migracijos
+# ------------------------------------------------------------
+# - schema_version lentelė: kiekviena pritaikyta migracija (version, name, applied_at)
+# - Migracijos tik prideda (CREATE IF NOT EXISTS, ADD COLUMN, indeksai,
+#   trigger'iai) — jokių DROP TABLE, duomenys neprarandami
+# - Kiekviena migracija — atskira BEGIN IMMEDIATE transakcija; jei kitas
+#   procesas ją jau pritaikė, praleidžiama (saugu paleisti botui ir
+#   dashboard'ui vienu metu, veikiant DB)
+# - Kanoninė schema — viena vieta (SCHEMA). Anksčiau skyrėsi db_init,
+#   manage.py, db_ai_metrics ir ai_performance versijos; ai_metrics dabar
+#   turi abiejų naudojimų stulpelius (dienos suvestinės + sandorių eilutės)
+# - Nauja migracija: pridėti (version, name, fn) į MIGRATIONS galą
+# ============================================================
+
+import sqlite3
+import logging
+from datetime import datetime, timezone
+from typing import Callable, List, Tuple
+
+from core.timeutil import SQL_ISO_TO_MS
+from core import equity_rollup, ai_stats
+
+# Kanoninė schema: lentelė -> CREATE TABLE ir stulpeliai, kurių gali trūkti
+# senose (manage.py / ai_performance) lentelėse
+SCHEMA = {
+    "positions": ("""
+        CREATE TABLE IF NOT EXISTS positions (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            symbol TEXT NOT NULL,
+            entry_price REAL,
+            qty REAL,
+            opened_at TEXT,
+            confidence REAL DEFAULT 0.0,
+            edge REAL DEFAULT 0.0,
+            state TEXT DEFAULT 'OPEN',
+            closed_at TEXT,
+            close_price REAL,
+            pnl_pct REAL,
+            pnl_usdc REAL,
+            close_reason TEXT
+        )""", (
+        ("entry_price", "REAL"), ("qty", "REAL"), ("opened_at", "TEXT"),
+        ("confidence", "REAL DEFAULT 0.0"), ("edge", "REAL DEFAULT 0.0"), ("state", "TEXT DEFAULT 'OPEN'"),
+        ("closed_at", "TEXT"), ("close_price", "REAL"), ("pnl_pct", "REAL"), ("pnl_usdc", "REAL"),
+        ("close_reason", "TEXT"),
+    )),
+    "equity_history": ("""
+        CREATE TABLE IF NOT EXISTS equity_history (
+            ts TEXT PRIMARY KEY,
+            equity REAL,
+            day_pnl_pct REAL DEFAULT 0.0,
+            equity_pct_from_start REAL DEFAULT 0.0,
+            free_usdc REAL DEFAULT 0.0,
+            used_usdc REAL DEFAULT 0.0,
+            positions INTEGER DEFAULT 0
+        )""", (
+        ("equity", "REAL"), ("day_pnl_pct", "REAL DEFAULT 0.0"), ("equity_pct_from_start", "REAL DEFAULT 0.0"),
+        ("free_usdc", "REAL DEFAULT 0.0"), ("used_usdc", "REAL DEFAULT 0.0"), ("positions", "INTEGER DEFAULT 0"),
+    )),
+    "ai_metrics": ("""
+        CREATE TABLE IF NOT EXISTS ai_metrics (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            ts TEXT NOT NULL,
+            day_key TEXT DEFAULT '',
+            trades_count INTEGER DEFAULT 0,
+            avg_confidence REAL DEFAULT 0,
+            avg_pnl REAL DEFAULT 0,
+            win_rate REAL DEFAULT 0,
+            avg_hold_sec REAL DEFAULT 0,
+            symbol TEXT,
+            confidence REAL,
+            edge REAL,
+            pnl_usdc REAL,
+            hold_sec REAL
+        )""", (
+        ("day_key", "TEXT DEFAULT ''"), ("trades_count", "INTEGER DEFAULT 0"), ("avg_confidence", "REAL DEFAULT 0"),
+        ("avg_pnl", "REAL DEFAULT 0"), ("win_rate", "REAL DEFAULT 0"), ("avg_hold_sec", "REAL DEFAULT 0"),
+        ("symbol", "TEXT"), ("confidence", "REAL"), ("edge", "REAL"), ("pnl_usdc", "REAL"), ("hold_sec", "REAL"),
+    )),
+    "risk_state": ("""
+        CREATE TABLE IF NOT EXISTS risk_state (
+            key TEXT PRIMARY KEY,
+            value TEXT
+        )""", ()),
+    "trades": ("""
+        CREATE TABLE IF NOT EXISTS trades (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            ts TEXT NOT NULL,
+            event TEXT, -- BUY, SELL, OPEN, CLOSE, SL, TP
+            symbol TEXT,
+            price REAL,
+            qty REAL,
+            usd_value REAL,
+            pnl_pct REAL DEFAULT 0.0,
+            reason TEXT,
+            confidence REAL DEFAULT 0.0,
+            hold_sec REAL DEFAULT 0.0,
+            hold_time_str TEXT,
+            pnl_usdc REAL,
+            edge REAL
+        )""", (
+        ("usd_value", "REAL"), ("pnl_pct", "REAL DEFAULT 0.0"), ("reason", "TEXT"),
+        ("confidence", "REAL DEFAULT 0.0"), ("hold_sec", "REAL DEFAULT 0.0"), ("hold_time_str", "TEXT"),
+        ("pnl_usdc", "REAL"), ("edge", "REAL"),
+    )),
+}
+
+TABLES = tuple(SCHEMA)
+
+# (lentelė, ISO stulpelis, ms stulpelis)
+EPOCH_COLUMNS = (
+    ("equity_history", "ts", "ts_ms"),
+    ("trades", "ts", "ts_ms"),
+    ("positions", "opened_at", "opened_at_ms"),
+    ("positions", "closed_at", "closed_at_ms"),
+)
+
+
+def _columns(conn, table: str) -> List[str]:
+    return [c[1] for c in conn.execute(f"PRAGMA table_info({table})")]
+
+
+# ============================================================
+# Migracijos
+# ============================================================
+
+def _m1_base_tables(conn):
+    for ddl, _ in SCHEMA.values():
+        conn.execute(ddl)
+    conn.execute("CREATE INDEX IF NOT EXISTS ix_equity_history_ts ON equity_history(ts)")
+    conn.execute("CREATE INDEX IF NOT EXISTS ix_trades_ts ON trades(ts)")
+    conn.execute("CREATE INDEX IF NOT EXISTS ix_trades_symbol ON trades(symbol)")
+
+
+def _m2_unify_columns(conn):
+    """Senos (manage.py, ai_performance) lentelės papildomos trūkstamais stulpeliais."""
+    for table, (_, cols) in SCHEMA.items():
+        have = _columns(conn, table)
+        for name, decl in cols:
+            if name not in have:
+                conn.execute(f"ALTER TABLE {table} ADD COLUMN {name} {decl}")
+                logging.info(f"[DB_MIGRATE] + {table}.{name}")
+
+
+def _m3_epoch_ms_columns(conn):
+    """INTEGER *_ms (UTC epoch ms) stulpeliai, užpildomi iš ISO teksto, + trigger'iai."""
+    for table, iso_col, ms_col in EPOCH_COLUMNS:
+        if ms_col in _columns(conn, table):
+            continue
+        conn.execute(f"ALTER TABLE {table} ADD COLUMN {ms_col} INTEGER")
+        conn.execute(
+            f"UPDATE {table} SET {ms_col} = {SQL_ISO_TO_MS.format(col=iso_col)} WHERE {iso_col} IS NOT NULL"
+        )
+        logging.info(f"[DB_MIGRATE] + {table}.{ms_col}")
+
+    conv = SQL_ISO_TO_MS.format(col="NEW.{}")
+    # Trigger'iai užpildo *_ms rašytojams, kurie jų nenurodo (manage.py, dashboard)
+    for stmt in (
+        "CREATE INDEX IF NOT EXISTS ix_equity_history_ts_ms ON equity_history(ts_ms)",
+        "CREATE INDEX IF NOT EXISTS ix_trades_ts_ms ON trades(ts_ms)",
+        f"""CREATE TRIGGER IF NOT EXISTS trg_equity_history_ts_ms AFTER INSERT ON equity_history
+            WHEN NEW.ts_ms IS NULL BEGIN
+                UPDATE equity_history SET ts_ms = {conv.format("ts")} WHERE rowid = NEW.rowid;
+            END""",
+        f"""CREATE TRIGGER IF NOT EXISTS trg_trades_ts_ms AFTER INSERT ON trades
+            WHEN NEW.ts_ms IS NULL BEGIN
+                UPDATE trades SET ts_ms = {conv.format("ts")} WHERE rowid = NEW.rowid;
+            END""",
+        *_positions_ms_triggers(),
+    ):
+        conn.execute(stmt)
+
+
+def _positions_ms_triggers() -> Tuple[str, str]:
+    conv = SQL_ISO_TO_MS.format(col="NEW.{}")
+    return (
+        f"""CREATE TRIGGER IF NOT EXISTS trg_positions_opened_at_ms AFTER INSERT ON positions
+            WHEN NEW.opened_at_ms IS NULL BEGIN
+                UPDATE positions SET opened_at_ms = {conv.format("opened_at")} WHERE rowid = NEW.rowid;
+            END""",
+        f"""CREATE TRIGGER IF NOT EXISTS trg_positions_closed_at_ms AFTER UPDATE OF closed_at ON positions
+            WHEN NEW.closed_at IS NOT NULL AND NEW.closed_at_ms IS NULL BEGIN
+                UPDATE positions SET closed_at_ms = {conv.format("closed_at")} WHERE rowid = NEW.rowid;
+            END""",
+    )
+
+
+def _m4_hot_path_indexes(conn):
+    """Indeksai karštoms užklausoms (kiekvienos ciklo iteracijos)."""
+    # Atviros pozicijos: has_position / COUNT / check_exits — dalinis indeksas,
+    # CLOSED istorija jo nedidina
+    conn.execute("CREATE INDEX IF NOT EXISTS ix_positions_open ON positions(symbol, qty) WHERE state='OPEN'")
+    # event + laiko intervalas (ai_tuner CLOSE per N dienų, AI metrikos)
+    conn.execute("CREATE INDEX IF NOT EXISTS ix_trades_event_ts ON trades(event, ts_ms)")
+    # (event) — perteklinis: tai ix_trades_event_ts prefiksas
+    conn.execute("DROP INDEX IF EXISTS ix_trades_event")
+    conn.execute("CREATE INDEX IF NOT EXISTS ix_ai_metrics_ts ON ai_metrics(ts)")
+    conn.execute("CREATE INDEX IF NOT EXISTS ix_ai_metrics_day ON ai_metrics(day_key)")
+
+
+def _m5_equity_rollups(conn):
+    """equity_rollup (1m/1h/1d) + inkrementinis trigger'is + backfill iš equity_history."""
+    conn.execute(equity_rollup.TABLE_DDL)
+    ts = f"COALESCE(NEW.ts_ms, {SQL_ISO_TO_MS.format(col='NEW.ts')})"
+    body = ";\n".join(
+        equity_rollup.upsert_sql(res, ts, "NEW.equity", "NEW.free_usdc", "NEW.used_usdc", "NEW.positions")
+        for res in equity_rollup.RESOLUTIONS.values()
+    )
+    conn.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS trg_equity_rollup AFTER INSERT ON equity_history
+        WHEN COALESCE(NEW.ts_ms, {SQL_ISO_TO_MS.format(col='NEW.ts')}) IS NOT NULL BEGIN
+            {body};
+        END
+    """)
+    cols = ("ts_ms", "equity", "free_usdc", "used_usdc", "positions")
+    rows = [dict(zip(cols, r)) for r in conn.execute(f"""
+        SELECT {", ".join(cols)} FROM equity_history WHERE ts_ms IS NOT NULL ORDER BY ts_ms
+    """)]
+    for res in equity_rollup.RESOLUTIONS.values():
+        conn.executemany(equity_rollup.upsert_sql(res), rows)
+    if rows:
+        logging.info(f"[DB_MIGRATE] equity_rollup užpildyta iš {len(rows)} equity_history eilučių")
+
+
+def _m6_ai_trade_stats(conn):
+    """ai_trade_stats (all/day/symbol) + trigger'is ant CLOSE/SELL sandorių + backfill iš trades."""
+    _m2_unify_columns(conn)  # trades.pnl_usdc, trades.edge
+    conn.execute(ai_stats.TABLE_DDL)
+    ts = f"COALESCE(NEW.ts_ms, {SQL_ISO_TO_MS.format(col='NEW.ts')})"
+    events = ", ".join(f"'{e}'" for e in ai_stats.CLOSE_EVENTS)
+    body = ";\n".join(ai_stats.upsert_all_sql(
+        ts, "NEW.symbol", pnl_pct="NEW.pnl_pct", pnl_usdc="NEW.pnl_usdc", conf="NEW.confidence",
+        edge="NEW.edge", hold="NEW.hold_sec",
+    ))
+    conn.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS trg_ai_trade_stats AFTER INSERT ON trades
+        WHEN UPPER(NEW.event) IN ({events}) AND {ts} IS NOT NULL BEGIN
+            {body};
+        END
+    """)
+    cols = ("ts_ms", "symbol", "pnl_pct", "pnl_usdc", "confidence", "edge", "hold_sec")
+    rows = [dict(zip(cols, r)) for r in conn.execute(f"""
+        SELECT {", ".join(cols)} FROM trades
+        WHERE UPPER(event) IN ({events}) AND ts_ms IS NOT NULL ORDER BY ts_ms
+    """)]
+    for stmt in ai_stats.upsert_all_sql():
+        conn.executemany(stmt, rows)
+    if rows:
+        logging.info(f"[DB_MIGRATE] ai_trade_stats užpildyta iš {len(rows)} sandorių")
+
+
+def _m7_journal_state(conn):
+    """journal_state: paskutinis į projekcijas pritaikytas žurnalo seq (core/journal.py)."""
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS journal_state (
+            id INTEGER PRIMARY KEY CHECK (id = 1),
+            applied_seq INTEGER NOT NULL DEFAULT 0
+        )
+    """)
+    conn.execute("INSERT OR IGNORE INTO journal_state (id, applied_seq) VALUES (1, 0)")
+
+
+def _m8_state_store(conn):
+    """state_store: komponentų būsenos (AI mokymasis, daily guard) — core/state_store.py."""
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS state_store (
+            key TEXT PRIMARY KEY,
+            value BLOB NOT NULL,
+            updated_ms INTEGER NOT NULL
+        ) WITHOUT ROWID
+    """)
+
+
+def _m9_positions_open_unique(conn):
+    """
+    positions: id raktas (CLOSED istorija išlieka pakartotinai atidarant) +
+    dalinis unikalus indeksas symbol WHERE state='OPEN' — viena atvira
+    pozicija simboliui. Senose DB (baseline core.db) INSERT OR REPLACE
+    pridėdavo antrą OPEN eilutę: dublikatai sujungiami į naujausią eilutę
+    (qty suma, svertinė įėjimo kaina, ankstyviausias atidarymas), o
+    originalios eilutės išsaugomos positions_legacy. db_init schemos
+    (symbol PRIMARY KEY, be id) lentelė perkuriama su id, eilutės neprarandamos.
+    Idempotentiška — v11 ją pakartoja DB, kurios jau turėjo ankstesnę v9.
+    """
+    have = _columns(conn, "positions")
+    if "id" not in have:
+        conn.execute("DROP TABLE IF EXISTS positions_new")
+        conn.execute(SCHEMA["positions"][0].replace("IF NOT EXISTS positions", "positions_new"))
+        for _, _, ms_col in (c for c in EPOCH_COLUMNS if c[0] == "positions"):
+            conn.execute(f"ALTER TABLE positions_new ADD COLUMN {ms_col} INTEGER")
+        cols = ", ".join(c for c in _columns(conn, "positions_new") if c in have)
+        conn.execute(f"INSERT INTO positions_new ({cols}) SELECT {cols} FROM positions ORDER BY rowid")
+        conn.execute("DROP TABLE positions")  # kartu — jos indeksai ir trigger'iai
+        conn.execute("ALTER TABLE positions_new RENAME TO positions")
+        for stmt in _positions_ms_triggers():
+            conn.execute(stmt)
+        conn.execute("CREATE INDEX IF NOT EXISTS ix_positions_open ON positions(symbol, qty) WHERE state='OPEN'")
+        logging.info("[DB_MIGRATE] positions: id raktas (perkurta iš symbol PRIMARY KEY)")
+
+    dups = [r[0] for r in conn.execute(
+        "SELECT symbol FROM positions WHERE state='OPEN' GROUP BY symbol HAVING COUNT(*) > 1")]
+    if dups:
+        marks = ",".join("?" * len(dups))
+        conn.execute("CREATE TABLE IF NOT EXISTS positions_legacy AS SELECT * FROM positions WHERE 0")
+        cols = ", ".join(c for c in _columns(conn, "positions_legacy") if c in _columns(conn, "positions"))
+        conn.execute(f"""
+            INSERT INTO positions_legacy ({cols})
+            SELECT {cols} FROM positions WHERE state='OPEN' AND symbol IN ({marks})
+        """, dups)
+        for sym in dups:
+            keep, qty, entry, opened_at, opened_ms, conf = conn.execute("""
+                SELECT MAX(id), SUM(qty),
+                       SUM(qty * entry_price) / NULLIF(SUM(qty), 0),
+                       MIN(opened_at), MIN(opened_at_ms), MAX(confidence)
+                FROM positions WHERE symbol=? AND state='OPEN'
+            """, (sym,)).fetchone()
+            conn.execute("""
+                UPDATE positions SET qty=?, entry_price=COALESCE(?, entry_price), opened_at=?,
+                                     opened_at_ms=?, confidence=?
+                WHERE id=?
+            """, (qty, entry, opened_at, opened_ms, conf, keep))
+            conn.execute("DELETE FROM positions WHERE symbol=? AND state='OPEN' AND id<>?", (sym, keep))
+        logging.info(f"[DB_MIGRATE] positions: sujungtos OPEN dublikatų eilutės ({', '.join(dups)}), "
+                     f"originalai — positions_legacy")
+    conn.execute(
+        "CREATE UNIQUE INDEX IF NOT EXISTS ux_positions_open_symbol ON positions(symbol) WHERE state='OPEN'"
+    )
+
+
+def _m10_journal_reset_ms(conn):
+    """
+    journal_state.reset_ms: išorinio DB išvalymo laikas (journal.mark_reset).
+    Boto pozicijų knyga jį palygina ir po kito proceso reset'o persikrauna.
+    """
+    if "reset_ms" not in _columns(conn, "journal_state"):
+        conn.execute("ALTER TABLE journal_state ADD COLUMN reset_ms INTEGER NOT NULL DEFAULT 0")
+
+
+def _m12_journal_gap_ms(conn):
+    """
+    journal_state.gap_ms: paskutinis kartas, kai įvykiai pritaikyti DB be
+    žurnalo (append nepavyko). journal.rebuild() iš senesnio checkpoint'o
+    tokių įvykių neatkurtų, todėl atsisako vykdyti.
+    """
+    if "gap_ms" not in _columns(conn, "journal_state"):
+        conn.execute("ALTER TABLE journal_state ADD COLUMN gap_ms INTEGER NOT NULL DEFAULT 0")
+
+
+MIGRATIONS: Tuple[Tuple[int, str, Callable], ...] = (
+    (1, "base_tables", _m1_base_tables),
+    (2, "unify_columns", _m2_unify_columns),
+    (3, "epoch_ms_columns", _m3_epoch_ms_columns),
+    (4, "hot_path_indexes", _m4_hot_path_indexes),
+    (5, "equity_rollups", _m5_equity_rollups),
+    (6, "ai_trade_stats", _m6_ai_trade_stats),
+    (7, "journal_state", _m7_journal_state),
+    (8, "state_store", _m8_state_store),
+    (9, "positions_open_unique", _m9_positions_open_unique),
+    (10, "journal_reset_ms", _m10_journal_reset_ms),
+    (11, "positions_open_unique_again", _m9_positions_open_unique),
+    (12, "journal_gap_ms", _m12_journal_gap_ms),
+)
+
+LATEST_VERSION = MIGRATIONS[-1][0]
+
+
+# ============================================================
+# Vykdymas
+# ============================================================
+
+def get_version(conn) -> int:
+    try:
+        row = conn.execute("SELECT MAX(version) FROM schema_version").fetchone()
+        return int(row[0] or 0)
+    except sqlite3.OperationalError:
+        return 0
+
+
+def run_migrations(db_path) -> int:
+    """Pritaiko trūkstamas migracijas. Grąžina schemos versiją."""
+    conn = sqlite3.connect(db_path, timeout=30)
+    conn.isolation_level = None  # transakcijos valdomos rankiniu būdu
+    try:
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS schema_version (
+                version INTEGER PRIMARY KEY,
+                name TEXT NOT NULL,
+                applied_at TEXT NOT NULL
+            )
+        """)
+        current = get_version(conn)
+        for version, name, fn in MIGRATIONS:
+            if version <= current:
+                continue
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                # Kitas procesas galėjo pritaikyti, kol laukėm rašymo užrakto
+                if conn.execute("SELECT 1 FROM schema_version WHERE version=?", (version,)).fetchone():
+                    conn.execute("COMMIT")
+                    continue
+                fn(conn)
+                conn.execute(
+                    "INSERT INTO schema_version (version, name, applied_at) VALUES (?, ?, ?)",
+                    (version, name, datetime.now(timezone.utc).isoformat()),
+                )
+                conn.execute("COMMIT")
+                logging.info(f"[DB_MIGRATE] ✅ v{version} {name}")
+            except Exception as e:
+                conn.execute("ROLLBACK")
+                logging.error(f"[DB_MIGRATE] ❌ v{version} {name} nepavyko: {e}")
+                break
+        version = get_version(conn)
+        if version > current:
+            conn.execute("PRAGMA optimize")  # statistika naujiems indeksams
+        return version
+    finally:
+        conn.close()
@@ -0,0 +1,182 @@
+# ============================================================
+# core/equity_rollup.py — equity istorija 1m / 1h / 1d rezoliucijomis
+# ------------------------------------------------------------
+# - equity_rollup(res_ms, bucket_ms): open/high/low/close, n, paskutinės
+#   free/used/positions reikšmės. Atnaujinama inkrementiškai — trigger'is
+#   ant equity_history INSERT (db_migrations v5) kiekvienai rezoliucijai
+#   daro vieną UPSERT, todėl agregatai visada einamieji
+# - Retencija (prune): raw equity_history — EQUITY_RAW_RETENTION_DAYS,
+#   1m — 30 d., 1h — 365 d., 1d — visam laikui. Paskutinė raw eilutė
+#   niekada netrinama. Vykdoma per write-behind eilę (maybe_prune)
+# - Skaitymas: get_series() pati parenka rezoliuciją pagal intervalą
+#   (dashboard grafikas), get_day() — dienos open/close (rizika)
+# ============================================================
+
+import time
+from typing import Dict, List, Optional, Tuple
+
+from core.config import CONFIG
+
+RES_1M = 60_000
+RES_1H = 3_600_000
+RES_1D = 86_400_000
+RESOLUTIONS = {"1m": RES_1M, "1h": RES_1H, "1d": RES_1D}
+
+DAY_MS = RES_1D
+# Kiek laiko laikoma kiekviena rezoliucija (None — visam laikui)
+RETENTION_MS = {RES_1M: 30 * DAY_MS, RES_1H: 365 * DAY_MS, RES_1D: None}
+PRUNE_EVERY_SEC = 3600
+MAX_POINTS = 500
+
+TABLE_DDL = """
+    CREATE TABLE IF NOT EXISTS equity_rollup (
+        res_ms INTEGER NOT NULL,
+        bucket_ms INTEGER NOT NULL,
+        open REAL,
+        high REAL,
+        low REAL,
+        close REAL,
+        n INTEGER DEFAULT 0,
+        first_ts_ms INTEGER,
+        last_ts_ms INTEGER,
+        free_usdc REAL,
+        used_usdc REAL,
+        positions INTEGER,
+        PRIMARY KEY (res_ms, bucket_ms)
+    ) WITHOUT ROWID
+"""
+
+
+def upsert_sql(res_ms: int, ts: str = ":ts_ms", eq: str = ":equity", free: str = ":free_usdc",
+               used: str = ":used_usdc", pos: str = ":positions") -> str:
+    """
+    Vieno equity taško įliejimas į rezoliucijos bucket'ą. Argumentai — SQL
+    išraiškos (vardiniai parametrai backfill'ui, NEW.* trigger'iui). Vėluojantys taškai
+    nekeičia close (lyginama pagal last_ts_ms).
+    """
+    return f"""
+        INSERT INTO equity_rollup
+            (res_ms, bucket_ms, open, high, low, close, n, first_ts_ms, last_ts_ms, free_usdc, used_usdc, positions)
+        VALUES ({res_ms}, ({ts} / {res_ms}) * {res_ms}, {eq}, {eq}, {eq}, {eq}, 1, {ts}, {ts}, {free}, {used}, {pos})
+        ON CONFLICT(res_ms, bucket_ms) DO UPDATE SET
+            high = MAX(high, excluded.high),
+            low = MIN(low, excluded.low),
+            open = CASE WHEN excluded.first_ts_ms < first_ts_ms THEN excluded.open ELSE open END,
+            close = CASE WHEN excluded.last_ts_ms >= last_ts_ms THEN excluded.close ELSE close END,
+            free_usdc = CASE WHEN excluded.last_ts_ms >= last_ts_ms THEN excluded.free_usdc ELSE free_usdc END,
+            used_usdc = CASE WHEN excluded.last_ts_ms >= last_ts_ms THEN excluded.used_usdc ELSE used_usdc END,
+            positions = CASE WHEN excluded.last_ts_ms >= last_ts_ms THEN excluded.positions ELSE positions END,
+            first_ts_ms = MIN(first_ts_ms, excluded.first_ts_ms),
+            last_ts_ms = MAX(last_ts_ms, excluded.last_ts_ms),
+            n = n + 1
+    """
+
+
+# ============================================================
+# Retencija
+# ============================================================
+
+def raw_retention_ms() -> int:
+    return int(float(CONFIG.get("EQUITY_RAW_RETENTION_DAYS", 7)) * DAY_MS)
+
+
+def prune(cur, now: Optional[int] = None) -> Dict[str, int]:
+    """Ištrina pasenusias raw ir rollup eilutes (kviečiama rašytojo transakcijoje)."""
+    now = int(time.time() * 1000) if now is None else int(now)
+    out = {}
+    cur.execute("""
+        DELETE FROM equity_history
+        WHERE ts_ms < ? AND ts_ms < (SELECT MAX(ts_ms) FROM equity_history)
+    """, (now - raw_retention_ms(),))
+    out["raw"] = cur.rowcount
+    for res_ms, keep_ms in RETENTION_MS.items():
+        if keep_ms is None:
+            continue
+        cur.execute("DELETE FROM equity_rollup WHERE res_ms = ? AND bucket_ms < ?", (res_ms, now - keep_ms))
+        out[f"{res_ms // 1000}s"] = cur.rowcount
+    return out
+
+
+_last_prune = 0.0
+
+
+def maybe_prune():
+    """Kartą per PRUNE_EVERY_SEC įdeda valymo įvykį į write-behind eilę."""
+    global _last_prune
+    if time.time() - _last_prune < PRUNE_EVERY_SEC:
+        return
+    _last_prune = time.time()
+    from core import write_queue
+    write_queue.submit(write_queue.EquityPrune())
+
+
+# ============================================================
+# Skaitymas
+# ============================================================
+
+def pick_resolution(span_ms: int, since_ms: int, max_points: int = MAX_POINTS, now: Optional[int] = None) -> int:
+    """Smulkiausia rezoliucija, kuri telpa į max_points ir dar saugoma nuo since_ms."""
+    now = int(time.time() * 1000) if now is None else int(now)
+    for res_ms in (RES_1M, RES_1H):
+        keep = RETENTION_MS[res_ms]
+        if span_ms / res_ms <= max_points and since_ms >= now - keep:
+            return res_ms
+    return RES_1D
+
+
+def get_series(since_ms: int, until_ms: Optional[int] = None, max_points: int = MAX_POINTS,
+               res_ms: Optional[int] = None) -> Tuple[int, List[Dict]]:
+    """Equity taškai intervale -> (rezoliucija, [{ts_ms, open, high, low, close}])."""
+    from core.db_manager import get_conn
+    until_ms = int(time.time() * 1000) if until_ms is None else int(until_ms)
+    res_ms = res_ms or pick_resolution(until_ms - since_ms, since_ms, max_points)
+    rows = get_conn().execute("""
+        SELECT bucket_ms, open, high, low, close
+        FROM equity_rollup
+        WHERE res_ms = ? AND bucket_ms >= ? AND bucket_ms <= ?
+        ORDER BY bucket_ms
+    """, (res_ms, (since_ms // res_ms) * res_ms, until_ms)).fetchall()
+    return res_ms, [
+        {"ts_ms": r[0], "open": r[1], "high": r[2], "low": r[3], "close": r[4]} for r in rows
+    ]
+
+
+def get_day(day_ms: int) -> Optional[Tuple[float, float]]:
+    """
+    Dienos, prasidedančios day_ms, (open, close) arba None. UTC paros pradžia —
+    vienas 1d PK paieškos žingsnis; kita riba (vietinė vidurnaktis) — pirmas ir
+    paskutinis 1m bucket'as nuo day_ms (laiko juostų poslinkiai — sveikos minutės).
+    """
+    from core.db_manager import get_conn
+    day_ms = int(day_ms)
+    con = get_conn()
+    if day_ms % RES_1D == 0:
+        row = con.execute(
+            "SELECT open, close FROM equity_rollup WHERE res_ms = ? AND bucket_ms = ?", (RES_1D, day_ms)
+        ).fetchone()
+        return (float(row[0] or 0.0), float(row[1] or 0.0)) if row else None
+    span = (RES_1M, day_ms, day_ms + RES_1D)
+    first = con.execute(
+        "SELECT open FROM equity_rollup WHERE res_ms = ? AND bucket_ms >= ? AND bucket_ms < ? "
+        "ORDER BY bucket_ms ASC LIMIT 1", span
+    ).fetchone()
+    if not first:
+        return None
+    last = con.execute(
+        "SELECT close FROM equity_rollup WHERE res_ms = ? AND bucket_ms >= ? AND bucket_ms < ? "
+        "ORDER BY bucket_ms DESC LIMIT 1", span
+    ).fetchone()
+    return float(first[0] or 0.0), float(last[0] or 0.0)
+
+
+def get_first_and_last() -> Tuple[Optional[float], Optional[float]]:
+    """Pirmasis equity (starto) ir paskutinis žinomas equity."""
+    from core.db_manager import get_conn
+    con = get_conn()
+    first = con.execute(
+        "SELECT open FROM equity_rollup WHERE res_ms = ? ORDER BY bucket_ms ASC LIMIT 1", (RES_1D,)
+    ).fetchone()
+    last = con.execute(
+        "SELECT close FROM equity_rollup WHERE res_ms = ? ORDER BY bucket_ms DESC LIMIT 1", (RES_1M,)
+    ).fetchone()
+    return (float(first[0]) if first else None), (float(last[0]) if last else None)
@@ -2,14 +2,14 @@
 # core/equity_tracker.py — Equity ir PnL istorijos sekimas (DB versija)
 # ============================================================
 
-import sqlite3
 import time
 import threading
 from datetime import datetime, timezone
 from core.config import CONFIG
 from notify.notifier import notify
-from core.db_manager import DB_PATH, init_db
+from core import dao, write_queue, equity_rollup
 from core.paper_account import get_state
+from core.user_stream import get_account_state
 
 START_CAPITAL = 10_000.0
 
@@ -19,25 +19,16 @@ def _now_iso() -> str:
 
 
 def insert_equity_row(entry: dict):
-    """Įrašo vieną equity įrašą į DB."""
-    init_db()
-    con = sqlite3.connect(DB_PATH)
-    cur = con.cursor()
-    cur.execute("""
-        INSERT INTO equity_history
-            (ts, equity, day_pnl_pct, equity_pct_from_start, free_usdc, used_usdc, positions)
-        VALUES (?, ?, ?, ?, ?, ?, ?)
-    """, (
-        entry["timestamp"],
-        entry["equity"],
-        entry["day_pnl_pct"],
-        entry["equity_pct_from_start"],
-        entry["free_usdc"],
-        entry["used_usdc"],
-        entry["positions"]
+    """Įrašo vieną equity įrašą į DB (per write-behind eilę)."""
+    write_queue.submit(write_queue.EquityRow(
+        ts=entry["timestamp"],
+        equity=entry["equity"],
+        day_pnl_pct=entry["day_pnl_pct"],
+        equity_pct_from_start=entry["equity_pct_from_start"],
+        free_usdc=entry["free_usdc"],
+        used_usdc=entry["used_usdc"],
+        positions=entry["positions"],
     ))
-    con.commit()
-    con.close()
 
 
 def update_equity_history(state: dict):
@@ -51,21 +42,13 @@ def update_equity_history(state: dict):
         used_usdc = float(state.get("used_usdc", 0.0))
         positions = len(state.get("positions", {}))
 
-        con = sqlite3.connect(DB_PATH)
-        cur = con.cursor()
-        cur.row_factory = sqlite3.Row
-
-        cur.execute("SELECT equity FROM equity_history ORDER BY ts ASC LIMIT 1")
-        first = cur.fetchone()
-        start_equity = float(first["equity"]) if first else START_CAPITAL
-
-        cur.execute("SELECT equity FROM equity_history ORDER BY ts DESC LIMIT 1")
-        prev = cur.fetchone()
-        prev_equity = float(prev["equity"]) if prev else equity
+        # Starto equity — pirmas 1d rollup'as (raw eilutės gali būti išvalytos)
+        first, prev = equity_rollup.get_first_and_last()
+        start_equity = first if first is not None else START_CAPITAL
+        prev_equity = prev if prev is not None else equity
 
         day_pnl_pct = ((equity - prev_equity) / prev_equity * 100) if prev_equity > 0 else 0.0
         equity_pct_from_start = ((equity - start_equity) / start_equity * 100) if start_equity > 0 else 0.0
-        con.close()
 
         entry = {
             "timestamp": _now_iso(),
@@ -78,6 +61,7 @@ def update_equity_history(state: dict):
         }
 
         insert_equity_row(entry)
+        equity_rollup.maybe_prune()
 
     except Exception as e:
         print(f"[EquityTracker] Klaida: {e}")
@@ -86,13 +70,8 @@ def update_equity_history(state: dict):
 def get_latest_summary() -> dict:
     """Grąžina paskutinį equity įrašą (naudojama /api/summary)."""
     try:
-        con = sqlite3.connect(DB_PATH)
-        con.row_factory = sqlite3.Row
-        row = con.execute(
-            "SELECT * FROM equity_history ORDER BY ts DESC LIMIT 1"
-        ).fetchone()
-        con.close()
-        if not row:
+        point = dao.latest_equity()
+        if not point:
             return {
                 "timestamp": _now_iso(),
                 "equity": 0.0,
@@ -102,7 +81,7 @@ def get_latest_summary() -> dict:
                 "used_usdc": 0.0,
                 "positions": 0
             }
-        return dict(row)
+        return point.as_dict()
     except Exception as e:
         print(f"[EquityTracker] Klaida get_latest_summary: {e}")
         return {}
@@ -117,7 +96,8 @@ def start_equity_auto_tracker(interval_sec: int = 300, alert_drop_pct: float = -
         nonlocal last_alert_sent, start_equity
         while True:
             try:
-                state = get_state()
+                # LIVE: user data stream būsena; DRY_RUN / be srauto — paper account
+                state = get_account_state() or get_state()
                 update_equity_history(state)
 
                 eq = float(state.get("equity", 0))
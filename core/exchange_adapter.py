@@ -5,17 +5,20 @@
 
 import json
 import time
-import hmac
-import hashlib
 import logging
-import requests
 from pathlib import Path
 from datetime import datetime
-from typing import Dict, Any, Optional
-import requests
+from typing import Any, Dict, Optional, Tuple
 
 from .config import CONFIG
 from . import ws_bridge
+from . import http_client
+from . import exchange_info
+from . import rate_limiter
+from .binance_auth import sign
+from .ws_order_transport import (
+    LATENCY, OrderTransportError, get_transport, new_client_order_id,
+)
 # import core.paper_account as PaperAccount  # ❌ PAŠALINTA: ciklinis importas
 
 API_BASE = "https://api.binance.com"
@@ -28,11 +31,66 @@ def _timestamp_ms() -> int:
 def _now_str() -> str:
     return datetime.utcnow().strftime("%Y-%m-%d %H:%M:%S")
 
-def _sign(params: Dict[str, Any], secret: str) -> Dict[str, Any]:
-    query = "&".join([f"{k}={v}" for k, v in sorted(params.items())])
-    sig = hmac.new(secret.encode(), query.encode(), hashlib.sha256).hexdigest()
-    params["signature"] = sig
-    return params
+def _ws_api_enabled() -> bool:
+    """
+    WS API transportas. Su USE_TESTNET išjungiamas: REST pavedimai ir jų
+    paieška visada eina į API_BASE, todėl testnet WS pavedimo timeout'as
+    būtų tikrinamas / kartojamas mainnet'e.
+    """
+    return CONFIG.get("ORDER_TRANSPORT", "rest") == "ws_api" and not CONFIG.get("USE_TESTNET", False)
+
+def _parse_klines(raw) -> list:
+    """Binance klines masyvai -> dict sąrašas."""
+    return [
+        {
+            "timestamp": k[0],
+            "open": float(k[1]),
+            "high": float(k[2]),
+            "low": float(k[3]),
+            "close": float(k[4]),
+            "volume": float(k[5]),
+        }
+        for k in raw
+    ]
+
+def _order_params(symbol: str, side: str, qty_str: str, client_id: str, secret: str) -> Dict[str, Any]:
+    """Pasirašyti MARKET pavedimo parametrai (REST; naudoja ir async adapteris)."""
+    return sign({"newClientOrderId": client_id, "newOrderRespType": "FULL", "quantity": qty_str,
+                 "side": side, "symbol": symbol, "timestamp": _timestamp_ms(), "type": "MARKET"}, secret)
+
+def _query_params(symbol: str, client_id: str, secret: str) -> Dict[str, Any]:
+    """Pasirašyti GET /api/v3/order parametrai pagal newClientOrderId."""
+    return sign({"origClientOrderId": client_id, "symbol": symbol, "timestamp": _timestamp_ms()}, secret)
+
+def _fill_from_response(data: dict, qty: float, symbol: str) -> Tuple[float, float]:
+    """Pavedimo atsakymas -> (įvykdytas kiekis, vidutinė fill kaina)."""
+    executed_qty = float(data.get("executedQty", qty))
+    cum_quote = float(data.get("cummulativeQuoteQty", 0) or 0)
+    if data.get("fills"):
+        return executed_qty, float(data["fills"][0]["price"])
+    if executed_qty > 0 and cum_quote > 0:
+        return executed_qty, cum_quote / executed_qty
+    # Atsakyme nėra fills — vidutinė kaina iš user data stream executionReport
+    from core.user_stream import ACCOUNT
+    o = ACCOUNT.wait_order_filled(data.get("orderId", 0), timeout=1.0) if data.get("orderId") else None
+    if o and o["avg_price"] > 0:
+        return o["cum_qty"], o["avg_price"]
+    return executed_qty, float(data.get("price") or 0) or ws_bridge.get_price(symbol)
+
+def _order_result(symbol: str, side: str, qty: float, fill_price: float, fee_taker: float,
+                  reason: str, confidence: float, dry_run: bool) -> dict:
+    return {
+        "ok": True,  # ✅ PRIDĖTA: reikalinga order_executor.py
+        "symbol": symbol,
+        "side": side,
+        "qty": qty,
+        "fill_price": fill_price,
+        "fee": qty * fill_price * fee_taker,
+        "timestamp": _now_str(),
+        "dry_run": dry_run,
+        "reason": reason,
+        "confidence": confidence,
+    }
 
 # ============================================================
 # Adapterio klasė
@@ -49,6 +107,8 @@ class ExchangeAdapter:
 
         if CONFIG.get("USE_TESTNET", False):
             logging.warning("[ExchangeAdapter] Dėmesio: TESTNET nustatymas ignoruojamas. Naudojamas tik DRY_RUN (jei įjungtas).")
+            if CONFIG.get("ORDER_TRANSPORT", "rest") == "ws_api":
+                logging.warning("[ExchangeAdapter] ORDER_TRANSPORT=ws_api su USE_TESTNET nenaudojamas — pavedimai per REST.")
 
     # ------------------------------------------------------------
     # Pagrindinis pavedimo vykdymo metodas
@@ -58,6 +118,7 @@ class ExchangeAdapter:
         Vykdo market pavedimą, naudodamas DRY_RUN/LIVE logiką.
         qty turi būti bazinės monetos kiekis (pvz., BTC kiekis pirkimui).
         """
+        t_decision = time.perf_counter()
         qty = max(0.0, qty)
         if qty == 0.0:
             return {"ok": False, "error": "Kiekis (qty) negali būti nulis."}
@@ -71,7 +132,7 @@ class ExchangeAdapter:
         if self.dry_run:
             return self._dry_run_order(symbol, side, qty, price_now, reason, confidence)
         else:
-            return self._real_order(symbol, side, qty, reason, confidence)
+            return self._real_order(symbol, side, qty, reason, confidence, t_decision=t_decision)
 
     # ------------------------------------------------------------
     # Pagalbiniai metodai (Dry Run / Real)
@@ -84,65 +145,75 @@ class ExchangeAdapter:
         fill_price = price_now * (1.0005 if side == "BUY" else 0.9995)
         executed_qty = qty
         
-        # Simuliuojamas mokestis
-        fee = executed_qty * fill_price * self.fee_taker
-        
-        result = {
-            "ok": True,  # ✅ PRIDĖTA: reikalinga order_executor.py
-            "symbol": symbol,
-            "side": side,
-            "qty": executed_qty,
-            "fill_price": fill_price,
-            "fee": fee,
-            "timestamp": _now_str(),
-            "dry_run": True,
-            "reason": reason,
-            "confidence": confidence,
-        }
+        # Simuliuojamas mokestis (fee skaičiuoja _order_result)
+        result = _order_result(symbol, side, executed_qty, fill_price, self.fee_taker, reason, confidence, dry_run=True)
         
         logging.info(f"[DryRunOrder] ✅ {side} {executed_qty} {symbol} @ {fill_price:.6f} (simuliacija)")
         return result
 
-    def _real_order(self, symbol: str, side: str, qty: float, reason: str, confidence: float) -> dict:
-        """Vykdo realų pavedimą per Binance API."""
+    def _rest_order(self, symbol: str, side: str, qty_str: str, client_id: str) -> dict:
+        params = _order_params(symbol, side, qty_str, client_id, self.api_secret)
+        r = http_client.post(f"{API_BASE}/api/v3/order", params=params, headers={"X-MBX-APIKEY": self.api_key})
+        r.raise_for_status()
+        return r.json()
+
+    def _query_order(self, symbol: str, client_id: str) -> Optional[dict]:
+        """Pavedimas pagal newClientOrderId (None — jei birža jo neturi)."""
+        params = _query_params(symbol, client_id, self.api_secret)
+        r = http_client.get(f"{API_BASE}/api/v3/order", params=params, headers={"X-MBX-APIKEY": self.api_key},
+                            priority=rate_limiter.CRITICAL)
+        if r.status_code == 200:
+            return r.json()
+        if r.status_code == 400 and (r.json() or {}).get("code") == -2013:
+            return None
+        r.raise_for_status()
+        return None
+
+    def _send_order(self, symbol: str, side: str, qty_str: str, client_id: str):
+        """Grąžina (atsakymas, transportas). WS API klaidos atveju — REST fallback."""
+        if _ws_api_enabled():
+            try:
+                rate_limiter.BUDGET.acquire(1, rate_limiter.CRITICAL)
+                transport = get_transport(self.api_key, self.api_secret)
+                return transport.place_market_order(symbol, side, qty_str, client_id), "ws_api"
+            except OrderTransportError as e:
+                LATENCY.fallback("ws_api")
+                logging.warning(f"[BinanceAdapter] WS API pavedimas {symbol} nepavyko ({e}) — REST fallback")
+                if e.sent:
+                    # Užklausa galėjo pasiekti biržą — pirma patikrinam, kad nebūtų dvigubo pavedimo
+                    existing = self._query_order(symbol, client_id)
+                    if existing is not None:
+                        return existing, "ws_api"
+        return self._rest_order(symbol, side, qty_str, client_id), "rest"
+
+    def _real_order(self, symbol: str, side: str, qty: float, reason: str, confidence: float,
+                    t_decision: Optional[float] = None) -> dict:
+        """Vykdo realų pavedimą per Binance API (REST arba WebSocket API)."""
+        t_decision = t_decision or time.perf_counter()
+        transport = "rest"
         try:
-            ts = _timestamp_ms()
-            order_type = "MARKET"
-            
-            params = {"symbol": symbol, "side": side, "type": order_type, 
-                      "quantity": qty, "timestamp": ts}
-            
-            _sign(params, self.api_secret)
-            headers = {"X-MBX-APIKEY": self.api_key}
-            
-            # Siunčiame pavedimą
-            r = requests.post(f"{API_BASE}/api/v3/order", params=params, headers=headers, timeout=10)
-            r.raise_for_status()
-            data = r.json()
+            # LOT_SIZE / minNotional iš cache (ne per užklausą kiekvienam pavedimui)
+            ok, why, qty_str = exchange_info.prepare_order_qty(symbol, qty, ws_bridge.get_price(symbol) or 0.0, API_BASE)
+            if not ok:
+                logging.warning(f"[BinanceAdapter] ⛔ {symbol} {side} qty={qty} atmestas pagal biržos filtrus: {why}")
+                return {"ok": False, "error": f"{why} (qty={qty_str})"}
+
+            # Siunčiame pavedimą (sprendimo -> ack latency pagal transportą)
+            if _ws_api_enabled():
+                transport = "ws_api"
+            data, transport = self._send_order(symbol, side, qty_str, new_client_order_id())
+            LATENCY.record(transport, (time.perf_counter() - t_decision) * 1000)
             
             # Apdorojame atsakymą
-            executed_qty = float(data.get("executedQty", qty))
-            fill_price = float(data.get("fills", [{}])[0].get("price", data.get("price", ws_bridge.get_price(symbol))))
-            
-            # Apskaičiuojame mokestį
-            fee = executed_qty * fill_price * self.fee_taker
+            executed_qty, fill_price = _fill_from_response(data, qty, symbol)
             
-            result = {
-                "ok": True,  # ✅ PRIDĖTA: reikalinga order_executor.py
-                "symbol": symbol,
-                "side": side,
-                "qty": executed_qty,
-                "fill_price": fill_price,
-                "fee": fee,
-                "timestamp": _now_str(),
-                "dry_run": False,
-                "reason": reason,
-                "confidence": confidence,
-            }
+            # Mokestį apskaičiuoja _order_result
+            result = _order_result(symbol, side, executed_qty, fill_price, self.fee_taker, reason, confidence, dry_run=False)
             logging.info(f"[BinanceOrder] ✅ {side} {executed_qty} {symbol} @ {fill_price:.6f}")
             return result
         
         except Exception as e:
+            LATENCY.record(transport, (time.perf_counter() - t_decision) * 1000, ok=False)
             logging.exception(f"[BinanceAdapter] Klaida vykdant pavedimą {symbol}: {e}")
             return {"ok": False, "error": str(e)}
 
@@ -155,22 +226,10 @@ class ExchangeAdapter:
                     "interval": interval,
                     "limit": limit
                 }
-                response = requests.get(url, params=params, timeout=10)
+                response = http_client.get(url, params=params)
                 response.raise_for_status()
-                klines = response.json()
-                
                 # Konvertuojame į dict formatą
-                result = []
-                for k in klines:
-                    result.append({
-                        "timestamp": k[0],
-                        "open": float(k[1]),
-                        "high": float(k[2]),
-                        "low": float(k[3]),
-                        "close": float(k[4]),
-                        "volume": float(k[5])
-                    })
-                return result
+                return _parse_klines(response.json())
             except Exception as e:
                 logging.error(f"[ExchangeAdapter] Klaida gaunant klines {symbol}: {e}")
                 return []
@@ -204,6 +263,10 @@ ADAPTER: Optional[ExchangeAdapter] = None
 
 def get_adapter() -> ExchangeAdapter:
     global ADAPTER
+    if ADAPTER is None and CONFIG.get("ASYNC_ADAPTER", False):
+        # asyncio variantas per sinchroninį fasadą (tas pats metodų paviršius)
+        from core.async_exchange_adapter import get_sync_facade
+        ADAPTER = get_sync_facade()
     if ADAPTER is None:
         try:
             # Fiksuotas init - pašalintas dublikatas
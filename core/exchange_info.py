@@ -0,0 +1,251 @@
+# ============================================================
+# core/exchange_info.py — exchangeInfo simbolių filtrų cache
+# ------------------------------------------------------------
+# - Iš /api/v3/exchangeInfo paimami tik reikalingi filtrai:
+#     LOT_SIZE      -> step_size, min_qty, max_qty
+#     PRICE_FILTER  -> tick_size
+#     NOTIONAL      -> min_notional (senas MIN_NOTIONAL — atsarginis)
+#   ir sudedami į kompaktišką lentelę {symbol: ExchangeInfo}
+# - Lentelė saugoma diske (data/exchange_info*.json) ir atnaujinama kas
+#   EXCHANGE_INFO_REFRESH_SEC fone — pavedimo kelyje filtrai niekada
+#   nesiunčiami iš biržos (tik jei cache dar visai tuščias)
+# - Naudoja: ExecutionValidator._check_lot_rules, ExchangeAdapter._real_order,
+#   ws_bridge._prepare_universe
+# ============================================================
+
+import os
+import json
+import time
+import logging
+import threading
+from dataclasses import dataclass
+from decimal import Decimal, ROUND_DOWN
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from core.config import CONFIG
+from core.db_manager import DATA_DIR
+from core import http_client
+
+BINANCE_REST_MAIN = "https://api.binance.com"
+BINANCE_REST_TEST = "https://testnet.binance.vision"
+
+EXCHANGE_INFO_REFRESH_SEC = int(CONFIG.get("EXCHANGE_INFO_REFRESH_SEC", 6 * 3600))
+REFRESH_RETRY_SEC = 60
+CACHE_VERSION = 1
+# Disko formato stulpeliai (eilutė = sąrašas, ne dict — mažesnis failas)
+_FIELDS = ("status", "base_asset", "quote_asset", "step_size", "tick_size", "min_qty", "max_qty", "min_notional")
+
+
+@dataclass
+class ExchangeInfo:
+    symbol: str = ""
+    status: str = "TRADING"
+    base_asset: str = ""
+    quote_asset: str = ""
+    step_size: float = 0.0
+    tick_size: float = 0.0
+    min_qty: float = 0.0
+    max_qty: float = 0.0
+    min_notional: float = 0.0
+
+    def round_qty(self, qty: float) -> float:
+        return float(_floor_step(qty, self.step_size))
+
+    def round_price(self, price: float) -> float:
+        return float(_floor_step(price, self.tick_size))
+
+    def format_qty(self, qty: float) -> str:
+        """Kiekis kaip tekstas be float triukšmo (pvz. 0.123 vietoj 0.12300000000000001)."""
+        return _fmt(_floor_step(qty, self.step_size))
+
+
+def _floor_step(value: float, step: float) -> Decimal:
+    d = Decimal(str(value))
+    if step and step > 0:
+        s = Decimal(str(step)).normalize()
+        return (d / s).to_integral_value(rounding=ROUND_DOWN) * s
+    return d
+
+
+def _fmt(d: Decimal) -> str:
+    s = format(d.normalize(), "f")
+    return s if s not in ("-0", "") else "0"
+
+
+def parse_symbol(s: dict) -> ExchangeInfo:
+    """Vienas exchangeInfo 'symbols' įrašas -> ExchangeInfo."""
+    info = ExchangeInfo(
+        symbol=s.get("symbol", ""),
+        status=s.get("status", ""),
+        base_asset=s.get("baseAsset", ""),
+        quote_asset=s.get("quoteAsset", ""),
+    )
+    legacy_notional = 0.0
+    for f in s.get("filters", []) or []:
+        ft = f.get("filterType")
+        try:
+            if ft == "LOT_SIZE":
+                info.step_size = float(f.get("stepSize", 0) or 0)
+                info.min_qty = float(f.get("minQty", 0) or 0)
+                info.max_qty = float(f.get("maxQty", 0) or 0)
+            elif ft == "PRICE_FILTER":
+                info.tick_size = float(f.get("tickSize", 0) or 0)
+            elif ft == "NOTIONAL":
+                info.min_notional = float(f.get("minNotional", 0) or 0)
+            elif ft == "MIN_NOTIONAL":
+                legacy_notional = float(f.get("minNotional", 0) or 0)
+        except (TypeError, ValueError):
+            continue
+    if not info.min_notional:
+        info.min_notional = legacy_notional
+    return info
+
+
+# ------------------------------------------------------------
+# Cache
+# ------------------------------------------------------------
+class ExchangeInfoCache:
+    def __init__(self, base_url: str, path: Path, refresh_sec: int = EXCHANGE_INFO_REFRESH_SEC):
+        self.base_url = base_url
+        self.path = path
+        self.refresh_sec = refresh_sec
+        self.table: Dict[str, ExchangeInfo] = {}
+        self.ts = 0.0
+        self._loaded = False
+        self._lock = threading.Lock()
+        self._refreshing = False
+        self._last_attempt = 0.0
+
+    # --------------------------------------------------------
+    def _load_disk(self):
+        self._loaded = True
+        try:
+            if not self.path.exists():
+                return
+            raw = json.loads(self.path.read_text(encoding="utf-8"))
+            if raw.get("version") != CACHE_VERSION or raw.get("base") != self.base_url:
+                return
+            fields = raw.get("fields", list(_FIELDS))
+            table = {}
+            for sym, row in (raw.get("symbols") or {}).items():
+                table[sym] = ExchangeInfo(symbol=sym, **dict(zip(fields, row)))
+            self.table = table
+            self.ts = float(raw.get("ts", 0))
+            logging.info(f"[EXINFO] 📂 Filtrai iš disko: {len(table)} simbolių (amžius {(time.time() - self.ts) / 60:.0f} min)")
+        except Exception as e:
+            logging.warning(f"[EXINFO] ⚠️ Nepavyko nuskaityti {self.path.name}: {e}")
+
+    def _save_disk(self):
+        data = {
+            "version": CACHE_VERSION,
+            "base": self.base_url,
+            "ts": self.ts,
+            "fields": list(_FIELDS),
+            "symbols": {sym: [getattr(i, f) for f in _FIELDS] for sym, i in self.table.items()},
+        }
+        tmp = self.path.with_suffix(".tmp")
+        tmp.write_text(json.dumps(data, separators=(",", ":")), encoding="utf-8")
+        os.replace(tmp, self.path)
+
+    def refresh(self) -> bool:
+        """Parsiunčia exchangeInfo ir perrašo lentelę (sinchroniškai)."""
+        try:
+            r = http_client.get(f"{self.base_url}/api/v3/exchangeInfo")
+            if r.status_code != 200:
+                logging.warning(f"[EXINFO] ⚠️ exchangeInfo HTTP {r.status_code}")
+                return False
+            table = {}
+            for s in r.json().get("symbols", []):
+                info = parse_symbol(s)
+                if info.symbol:
+                    table[info.symbol] = info
+            if not table:
+                return False
+            with self._lock:
+                self.table = table
+                self.ts = time.time()
+            self._save_disk()
+            logging.info(f"[EXINFO] ✅ Atnaujinti filtrai: {len(table)} simbolių")
+            return True
+        except Exception as e:
+            logging.warning(f"[EXINFO] ⚠️ Nepavyko atnaujinti exchangeInfo: {e}")
+            return False
+        finally:
+            self._refreshing = False
+
+    def _claim_refresh(self) -> bool:
+        # Nepavykus — kartojam ne dažniau nei kas REFRESH_RETRY_SEC
+        with self._lock:
+            if self._refreshing or time.time() - self._last_attempt < REFRESH_RETRY_SEC:
+                return False
+            self._refreshing = True
+            self._last_attempt = time.time()
+            return True
+
+    def _ensure(self):
+        if not self._loaded:
+            with self._lock:
+                if not self._loaded:
+                    self._load_disk()
+        if not self.table:
+            # Pirmas paleidimas be cache — vienintelis atvejis, kai laukiam biržos
+            if self._claim_refresh():
+                self.refresh()
+        elif time.time() - self.ts > self.refresh_sec and self._claim_refresh():
+            threading.Thread(target=self.refresh, name="exinfo-refresh", daemon=True).start()
+
+    # --------------------------------------------------------
+    def get(self, symbol: str) -> Optional[ExchangeInfo]:
+        self._ensure()
+        return self.table.get((symbol or "").upper())
+
+    def symbols(self, quote: str = "", trading_only: bool = True) -> List[str]:
+        self._ensure()
+        quote = (quote or "").upper()
+        return [
+            sym for sym, i in self.table.items()
+            if (not quote or sym.endswith(quote)) and (not trading_only or i.status == "TRADING")
+        ]
+
+
+_CACHES: Dict[str, ExchangeInfoCache] = {}
+_CACHES_LOCK = threading.Lock()
+
+
+def get_cache(base_url: str = BINANCE_REST_MAIN) -> ExchangeInfoCache:
+    with _CACHES_LOCK:
+        c = _CACHES.get(base_url)
+        if c is None:
+            name = "exchange_info.json" if base_url == BINANCE_REST_MAIN else "exchange_info_testnet.json"
+            c = _CACHES[base_url] = ExchangeInfoCache(base_url, DATA_DIR / name)
+        return c
+
+
+def get_filters(symbol: str, base_url: str = BINANCE_REST_MAIN) -> Optional[ExchangeInfo]:
+    return get_cache(base_url).get(symbol)
+
+
+def list_symbols(quote: str = "", base_url: str = BINANCE_REST_MAIN) -> List[str]:
+    return get_cache(base_url).symbols(quote)
+
+
+def prepare_order_qty(symbol: str, qty: float, price: float,
+                      base_url: str = BINANCE_REST_MAIN) -> Tuple[bool, str, str]:
+    """
+    Suapvalina kiekį pagal LOT_SIZE ir patikrina minQty / minNotional.
+    Grąžina (ok, priežastis, kiekis tekstu). Jei filtrų nėra — kiekis nekeičiamas.
+    """
+    info = get_filters(symbol, base_url)
+    if info is None:
+        return True, "NO_FILTERS", _fmt(Decimal(str(qty)))
+    q = _floor_step(qty, info.step_size)
+    if q <= 0:
+        return False, "QTY_ZERO", _fmt(q)
+    if info.min_qty and q < Decimal(str(info.min_qty)):
+        return False, "MIN_QTY", _fmt(q)
+    if info.max_qty and q > Decimal(str(info.max_qty)):
+        return False, "MAX_QTY", _fmt(q)
+    if info.min_notional and price and float(q) * price < info.min_notional:
+        return False, "MIN_NOTIONAL", _fmt(q)
+    return True, "OK", _fmt(q)
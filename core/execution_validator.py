@@ -16,6 +16,8 @@ from dataclasses import dataclass
 from datetime import datetime
 from typing import Dict, Any, Optional, Tuple, List
 
+from core.exchange_info import ExchangeInfo, get_filters
+
 # send_telegram_message funkcijos apibrėžimas, kad nereikėtų JSON metrikų.
 def send_telegram_message(msg: str):
     """Vieta, kurioje turi būti įgyvendinta Telegram žinutės siuntimo funkcija."""
@@ -156,7 +158,7 @@ class ExecutionValidator:
 
     # ========================================================
     def _check_lot_rules(self, ctx: EntryContext, size_mult: float):
-        exi = ctx.exchange_info or ExchangeInfo()
+        exi = ctx.exchange_info or get_filters(ctx.symbol) or ExchangeInfo()
         quote = float((ctx.quote_per_trade or 0) * size_mult)
         qty_raw = quote / float(ctx.price)
         qty = self._round_step(qty_raw, exi.step_size) if exi.step_size else qty_raw
@@ -1,15 +1,56 @@
 # ============================================================
 # core/exit_manager.py — pozicijų uždarymo logika
 # Atnaujinta: 2025-11-13
+# ------------------------------------------------------------
+# - check_exits() vertina visas pozicijas iš karto: knygos stulpeliai
+#   (BOOK.arrays()) + kainų vektorius -> PnL, laikymo trukmė, uždarymo
+#   priežasčių kodai (evaluate_exits), be Python ciklo per pozicijas
+# - Uždarymai pateikiami vienu write-behind batch'u (BOOK.close_many)
+# - REST kaina (adapter.get_price) — tik simboliams, kurių nėra prices
 # ============================================================
 
-import time
-import sqlite3
 import logging
-from datetime import datetime, timezone
-from core.db_manager import DB_PATH
+from typing import Optional, Tuple
+
+import numpy as np
+
+from core.position_book import BOOK
+from core.timeutil import now_ms
 from core.exchange_adapter import get_adapter
 
+# --- Paprastos demo sąlygos
+STOP_LOSS_PCT = -3.0
+TAKE_PROFIT_PCT = 5.0
+MAX_HOLD_SEC = 86400  # 24 valandos
+
+# Kodas -> priežastis (0 — neuždaryti)
+EXIT_REASONS = (None, "Stop Loss (-3%)", "Take Profit (+5%)", "Laikymo limitas 24h")
+
+
+def evaluate_exits(entry_price: np.ndarray, qty: np.ndarray, opened_at_ms: np.ndarray,
+                   price: np.ndarray, now: Optional[int] = None) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Visų pozicijų uždarymo sąlygos vienu praėjimu.
+    Grąžina (kodai, pnl_pct, pnl_usdc); kodas indeksuoja EXIT_REASONS.
+    Pozicijos be kainos (NaN / <= 0) arba be įėjimo kainos — kodas 0.
+    """
+    now = now_ms() if now is None else int(now)
+    valid = (price > 0) & (entry_price > 0)  # NaN palyginimai — False
+    safe_entry = np.where(valid, entry_price, 1.0)
+    pnl_pct = np.where(valid, (price / safe_entry - 1.0) * 100.0, 0.0)
+    pnl_usdc = np.where(valid, (price - entry_price) * qty, 0.0)
+    too_long = (opened_at_ms > 0) & (opened_at_ms < now - MAX_HOLD_SEC * 1000)
+    # Prioritetas kaip anksčiau: SL, TP, laikymo limitas
+    codes = np.where(pnl_pct <= STOP_LOSS_PCT, 1,
+                     np.where(pnl_pct >= TAKE_PROFIT_PCT, 2, np.where(too_long, 3, 0)))
+    codes[~valid] = 0
+    return codes, pnl_pct, pnl_usdc
+
+
+def _price_of(p) -> float:
+    v = p.get("price") if isinstance(p, dict) else p
+    return float(v) if v else np.nan
+
 
 class ExitManager:
     """Atsakingas už pozicijų uždarymo sąlygų tikrinimą."""
@@ -21,82 +62,53 @@ class ExitManager:
         self.adapter = get_adapter()
         logging.info("[ExitManager] Inicializuotas (DB režimas, suderinta su main.py)")
 
+    def apply_config(self, risk_cfg):
+        """Karštai perkrautas RiskConfig (risk_manager.follow_config)."""
+        self.risk_cfg = risk_cfg
+
     # --------------------------------------------------------
+    def _price_vector(self, symbols, prices: dict = None) -> np.ndarray:
+        """Kainos pozicijų tvarka; trūkstamos — iš adapterio (NaN, jei nepavyko)."""
+        prices = prices or {}
+        price = np.fromiter((_price_of(prices.get(s)) for s in symbols), dtype=np.float64, count=len(symbols))
+        for i in np.flatnonzero(np.isnan(price)):
+            if symbols[i] in prices:
+                continue  # WS kaina yra, bet neteisinga — praleidžiama
+            try:
+                price[i] = _price_of(self.adapter.get_price(symbols[i]))
+            except Exception as e:
+                logging.debug(f"[ExitManager] Klaida gaunant kainą {symbols[i]}: {e}")
+        return price
+
     def check_exits(self, prices: dict = None):
         """Tikrina, ar reikia uždaryti pozicijas pagal PnL, laiką ar signalus."""
         try:
-            con = sqlite3.connect(DB_PATH)
-            cur = con.cursor()
-
-            rows = cur.execute("""
-                SELECT symbol, entry_price, qty, opened_at
-                FROM positions
-                WHERE qty > 0 AND state='OPEN'
-            """).fetchall()
-            con.close()
-
-            if not rows:
+            # Atviros pozicijos iš atminties (pozicijų knyga), stulpeliais
+            symbols, entry, qty, opened_ms, conf = BOOK.arrays()
+            if not symbols:
                 return 0
 
-            now = time.time()
-            closed_count = 0
+            now = now_ms()
+            price = self._price_vector(symbols, prices)
+            codes, pnl_pct, pnl_usdc = evaluate_exits(entry, qty, opened_ms, price, now)
+            idx = np.flatnonzero(codes)
+            if not len(idx):
+                return 0
 
-            for symbol, entry_price, qty, opened_at in rows:
-                # --- laikymo trukmė
-                try:
-                    entry_ts = time.mktime(
-                        time.strptime(opened_at.split(".")[0], "%Y-%m-%dT%H:%M:%S")
-                    )
-                except Exception:
-                    entry_ts = now
-                held_for_sec = now - entry_ts
-
-                # --- kaina (su apsauga nuo None)
-                try:
-                    if prices and symbol in prices:
-                        price_data = prices.get(symbol, {})
-                        current_price = price_data.get("price") if isinstance(price_data, dict) else price_data
-                    else:
-                        current_price = self.adapter.get_price(symbol)
-                    
-                    # ✅ PRIDĖTA: Apsauga nuo None ir neteisingų reikšmių
-                    if current_price is None or current_price <= 0:
-                        logging.debug(f"[ExitManager] Nepavyko gauti kainos {symbol}, praleidžiama")
-                        continue
-                        
-                except Exception as e:
-                    logging.debug(f"[ExitManager] Klaida gaunant kainą {symbol}: {e}")
-                    continue
+            closes = [
+                (symbols[i], float(price[i]), float(pnl_pct[i]), float(pnl_usdc[i]), EXIT_REASONS[codes[i]])
+                for i in idx
+            ]
+            results = BOOK.close_many(closes, closed_at_ms=now)
 
-                # --- PnL (su apsauga nuo None ir 0)
-                try:
-                    if entry_price and current_price and entry_price > 0:
-                        pnl_pct = ((current_price / entry_price) - 1) * 100
-                        pnl_usdc = (current_price - entry_price) * qty
-                    else:
-                        pnl_pct = 0.0
-                        pnl_usdc = 0.0
-                        logging.debug(f"[ExitManager] Neteisingi duomenys {symbol}: entry={entry_price}, current={current_price}")
-                        continue
-                except Exception as e:
-                    logging.debug(f"[ExitManager] Klaida skaičiuojant PnL {symbol}: {e}")
+            closed_count = 0
+            for i, (symbol, close_price, p_pct, p_usdc, reason), ok in zip(idx, closes, results):
+                if not ok:
                     continue
-
-                # --- Paprastos demo sąlygos
-                close_reason = None
-                if pnl_pct <= -3.0:
-                    close_reason = "Stop Loss (-3%)"
-                elif pnl_pct >= 5.0:
-                    close_reason = "Take Profit (+5%)"
-                elif held_for_sec > 86400:  # 24 valandos
-                    close_reason = "Laikymo limitas 24h"
-
-                if close_reason:
-                    success = self._close_position(symbol, current_price, pnl_pct, pnl_usdc, close_reason)
-                    if success:
-                        closed_count += 1
-                        logging.info(f"[ExitManager] {symbol} uždaryta ({close_reason}) | PnL={pnl_pct:.2f}% | {pnl_usdc:+.2f} USDC")
-
+                closed_count += 1
+                logging.info(f"[ExitManager] {symbol} uždaryta ({reason}) | PnL={p_pct:.2f}% | {p_usdc:+.2f} USDC")
+                self._record_learning(symbol, float(entry[i]), close_price, p_pct, p_usdc, float(conf[i]),
+                                      (now - int(opened_ms[i])) / 3_600_000 if opened_ms[i] else 0.0, reason)
             return closed_count
 
         except Exception as e:
@@ -104,46 +116,12 @@ class ExitManager:
             return 0
 
     # --------------------------------------------------------
-    def _close_position(self, symbol, close_price, pnl_pct, pnl_usdc, reason):
-        """Uždaro poziciją DB ir loguoja įvykį."""
+    @staticmethod
+    def _record_learning(symbol, entry_price, close_price, pnl_pct, pnl_usdc, confidence, hold_h, reason):
+        """Mokymosi būsena — tik atmintyje, į DB įrašoma fone."""
         try:
-            con = sqlite3.connect(DB_PATH)
-            cur = con.cursor()
-
-            # Pažymime kaip uždarytą
-            cur.execute("""
-                UPDATE positions
-                SET state='CLOSED', closed_at=?, close_price=?, pnl_pct=?, pnl_usdc=?, close_reason=?
-                WHERE symbol=? AND state='OPEN'
-            """, (
-                datetime.now(timezone.utc).isoformat(),
-                close_price,
-                pnl_pct,
-                pnl_usdc,
-                reason,
-                symbol
-            ))
-
-            # Įrašome į trades istoriją
-            cur.execute("""
-                INSERT INTO trades (ts, event, symbol, price, qty, usd_value, pnl_pct, reason)
-                SELECT ?, 'CLOSE', symbol, ?, qty, qty * ?, ?, ?
-                FROM positions WHERE symbol=? LIMIT 1
-            """, (
-                datetime.now(timezone.utc).isoformat(),
-                close_price,
-                close_price,
-                pnl_pct,
-                reason,
-                symbol
-            ))
-
-            con.commit()
-            con.close()
-
-            logging.info(f"[ExitManager] {symbol} uždaryta ({reason}) | PnL={pnl_pct:.2f}% | {pnl_usdc:+.2f} USDC")
-            return True
-
+            from ai.ai_learning import record_trade_for_learning
+            record_trade_for_learning(symbol, "CLOSE", entry_price, close_price,
+                                      pnl_pct, pnl_usdc, confidence, hold_h, reason)
         except Exception as e:
-            logging.exception(f"[ExitManager] Klaida _close_position({symbol}): {e}")
-            return False
\ No newline at end of file
+            logging.debug(f"[ExitManager] Mokymosi būsena neatnaujinta: {e}")
@@ -0,0 +1,184 @@
+# ============================================================
+# core/http_client.py — Bendras HTTP klientas visiems REST kvietimams
+# ------------------------------------------------------------
+# - Vienas requests.Session kiekvienam host'ui (keep-alive, connection pool)
+# - Timeout'ai pagal endpoint'ą (ENDPOINT_TIMEOUTS), numatytas DEFAULT_TIMEOUT
+# - Pakartojimai su jitter TIK idempotentiniams kvietimams (GET);
+#   POST (pavedimai, Telegram) kartojami tik jei retries nurodytas aiškiai
+# - Metrikos: užklausos, klaidos, pakartojimai, latency, naujų vs pakartotinai
+#   panaudotų jungčių skaičius (get_metrics())
+# - Binance host'ams kiekviena užklausa eina per core.rate_limiter biudžetą
+#   (weight + prioritetas), atsakymo antraštės sinchronizuoja biudžetą
+# ============================================================
+
+import time
+import random
+import logging
+import threading
+from typing import Any, Dict, Optional
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from core import rate_limiter
+
+DEFAULT_TIMEOUT = 5.0
+POOL_MAXSIZE = 16
+GET_RETRIES = 2
+RETRY_BASE_SEC = 0.2
+RETRY_STATUS = {500, 502, 503, 504}
+
+# Timeout'ai pagal kelią (connect, read)
+ENDPOINT_TIMEOUTS: Dict[str, Any] = {
+    "/api/v3/order": (3.0, 10.0),
+    "/api/v3/klines": (3.0, 5.0),
+    "/api/v3/depth": (2.0, 3.0),
+    "/api/v3/ticker/bookTicker": (2.0, 3.0),
+    "/api/v3/ticker/24hr": (3.0, 10.0),
+    "/api/v3/exchangeInfo": (3.0, 15.0),
+    "/api/v3/time": (2.0, 3.0),
+    "/api/v3/userDataStream": (3.0, 5.0),
+    "/api/v3/account": (3.0, 10.0),
+    "/bot*/sendMessage": (3.0, 10.0),
+}
+
+_lock = threading.Lock()
+_sessions: Dict[str, requests.Session] = {}
+_stats: Dict[str, Dict[str, float]] = {}
+
+
+def _endpoint_key(url: str) -> str:
+    """Kelias be slaptų dalių (Telegram token'as pakeičiamas į *)."""
+    path = urlparse(url).path or "/"
+    if path.startswith("/bot"):
+        parts = path.split("/")
+        if len(parts) > 2:
+            parts[1] = "bot*"
+            path = "/".join(parts)
+    return path
+
+
+def _session_for(url: str) -> requests.Session:
+    u = urlparse(url)
+    host = f"{u.scheme}://{u.netloc}"
+    s = _sessions.get(host)
+    if s is not None:
+        return s
+    with _lock:
+        s = _sessions.get(host)
+        if s is None:
+            s = requests.Session()
+            adapter = HTTPAdapter(pool_connections=1, pool_maxsize=POOL_MAXSIZE, max_retries=0)
+            s.mount(f"{u.scheme}://", adapter)
+            _sessions[host] = s
+    return s
+
+
+def _record(key: str, dt: float, ok: bool, retried: int):
+    with _lock:
+        st = _stats.setdefault(key, {"requests": 0, "errors": 0, "retries": 0, "latency_sum": 0.0, "latency_max": 0.0})
+        st["requests"] += 1
+        st["retries"] += retried
+        st["latency_sum"] += dt
+        st["latency_max"] = max(st["latency_max"], dt)
+        if not ok:
+            st["errors"] += 1
+
+
+def request(method: str, url: str, *, params: Optional[Dict[str, Any]] = None,
+            headers: Optional[Dict[str, str]] = None, json: Any = None,
+            timeout: Any = None, retries: Optional[int] = None,
+            priority: Optional[int] = None) -> requests.Response:
+    """
+    Vykdo užklausą per bendrą pool'ą. Tinklo klaidos (po pakartojimų) keliamos
+    kaip requests.RequestException — kaip ir tiesioginis requests.get/post.
+    Binance užklausoms biudžeto neužtekus keliama rate_limiter.RateLimitedError.
+    """
+    method = method.upper()
+    key = _endpoint_key(url)
+    weighted = urlparse(url).hostname in rate_limiter.BINANCE_HOSTS
+    if weighted:
+        weight, default_prio = rate_limiter.endpoint_cost(key, params, method)
+        prio = default_prio if priority is None else priority
+    if timeout is None:
+        timeout = ENDPOINT_TIMEOUTS.get(key, DEFAULT_TIMEOUT)
+    if retries is None:
+        retries = GET_RETRIES if method == "GET" else 0
+
+    session = _session_for(url)
+    attempt = 0
+    t0 = time.perf_counter()
+    while True:
+        if weighted:
+            rate_limiter.BUDGET.acquire(weight, prio)
+        try:
+            r = session.request(method, url, params=params, headers=headers, json=json, timeout=timeout)
+            if weighted:
+                rate_limiter.BUDGET.observe(r.status_code, r.headers)
+            if r.status_code in RETRY_STATUS and attempt < retries:
+                raise requests.HTTPError(f"HTTP {r.status_code}", response=r)
+            _record(key, time.perf_counter() - t0, r.status_code < 400, attempt)
+            return r
+        except (requests.ConnectionError, requests.Timeout, requests.HTTPError) as e:
+            if attempt >= retries:
+                _record(key, time.perf_counter() - t0, False, attempt)
+                if isinstance(e, requests.HTTPError) and e.response is not None:
+                    return e.response
+                raise
+            delay = RETRY_BASE_SEC * (2 ** attempt) * random.uniform(0.5, 1.5)
+            attempt += 1
+            logging.debug(f"[HTTP] {method} {key} pakartojimas {attempt}/{retries} po {delay:.2f}s: {e}")
+            time.sleep(delay)
+
+
+def get(url: str, **kwargs) -> requests.Response:
+    return request("GET", url, **kwargs)
+
+
+def post(url: str, **kwargs) -> requests.Response:
+    return request("POST", url, **kwargs)
+
+
+def get_metrics() -> Dict[str, Any]:
+    """Endpoint'ų ir jungčių metrikos (dashboard'ui / benchmark'ui)."""
+    pools = {}
+    with _lock:
+        for host, s in _sessions.items():
+            new_conns, reqs = 0, 0
+            for adapter in s.adapters.values():
+                pm = getattr(adapter, "poolmanager", None)
+                if pm is None:
+                    continue
+                for pkey in list(pm.pools.keys()):
+                    pool = pm.pools.get(pkey)
+                    if pool is None:
+                        continue
+                    new_conns += int(getattr(pool, "num_connections", 0))
+                    reqs += int(getattr(pool, "num_requests", 0))
+            pools[host] = {
+                "requests": reqs,
+                "new_connections": new_conns,
+                "reuse_ratio": round(1.0 - new_conns / reqs, 4) if reqs else 0.0,
+            }
+        endpoints = {
+            k: {
+                "requests": int(v["requests"]),
+                "errors": int(v["errors"]),
+                "retries": int(v["retries"]),
+                "avg_ms": round(v["latency_sum"] / v["requests"] * 1000, 2) if v["requests"] else 0.0,
+                "max_ms": round(v["latency_max"] * 1000, 2),
+            }
+            for k, v in _stats.items()
+        }
+    return {"pools": pools, "endpoints": endpoints, "weight": rate_limiter.get_metrics()}
+
+
+def close_all():
+    with _lock:
+        for s in _sessions.values():
+            try:
+                s.close()
+            except Exception:
+                pass
+        _sessions.clear()
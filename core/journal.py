@@ -0,0 +1,477 @@
+# ============================================================
+# core/journal.py — append-only prekybos įvykių žurnalas
+# ------------------------------------------------------------
+# - data/journal/<pirmas_seq>.jlog segmentai; įrašas — dvejetainis rėmas
+#   HEADER (ilgis, crc32, seq, ts_ms) + "kind\0" + kompaktiškas JSON.
+#   Sugadinta uodega (crash rašant) aptinkama pagal ilgį / CRC ir nukerpama
+# - Group commit: append() tik įdeda įrašą į buferį; vienas "journal-sync"
+#   thread'as surenka visus laukiančius įrašus, įrašo ir daro vieną fsync.
+#   durable=True — grįžtama tik po fsync
+# - Šaltinis yra žurnalas: positions / trades / equity_history — projekcijos.
+#   write_queue kiekvieną batch'ą pirma žurnaluoja, tada pritaiko SQLite ir
+#   toje pačioje transakcijoje įrašo journal_state.applied_seq
+# - recover(): paleidžiant pritaikomi įvykiai, kurie pateko į žurnalą, bet
+#   ne į DB (seq > applied_seq)
+# - checkpoint(): VACUUM INTO momentinė DB kopija su jos applied_seq;
+#   rebuild() = paskutinis checkpoint'as + tik vėlesnių įvykių replay
+#   (segmentai parenkami bisect'u pagal pirmą seq). Seni segmentai,
+#   pilnai padengti seniausio laikomo checkpoint'o, ištrinami
+# - Jei append nepavyksta, write_queue įvykius vis tiek pritaiko DB ir
+#   pažymi journal_state.gap_ms; rebuild() atsisako atkurti iš checkpoint'o,
+#   kuris tos spragos nedengia
+# - Žurnalą rašo tik "bot" rolės procesas (vienas rašytojas)
+# ============================================================
+
+import os
+import json
+import time
+import zlib
+import bisect
+import shutil
+import sqlite3
+import struct
+import logging
+import threading
+from collections import deque
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from core.config import CONFIG
+from core import storage_profile
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+JOURNAL_DIR = BASE_DIR / "data" / "journal"
+
+HEADER = struct.Struct("<IIQq")  # payload ilgis, crc32, seq, ts_ms
+SEGMENT_BYTES = 64 * 1024 * 1024
+GROUP_COMMIT_MS = 2.0
+SYNC_TIMEOUT_SEC = 10.0
+CHECKPOINT_KEEP = 2
+CHECKPOINT_INTERVAL_SEC = 6 * 3600
+LATENCY_WINDOW = 500
+
+SEGMENT_SUFFIX = ".jlog"
+CHECKPOINT_PREFIX = "checkpoint_"
+
+
+def enabled() -> bool:
+    return bool(CONFIG.get("JOURNAL_ENABLED", True)) and storage_profile.get_role() == "bot"
+
+
+# ============================================================
+# Rėmai
+# ============================================================
+
+def encode(seq: int, ts_ms: int, kind: str, fields: Dict[str, Any]) -> bytes:
+    payload = kind.encode() + b"\0" + json.dumps(fields, separators=(",", ":"), default=str).encode()
+    crc = zlib.crc32(payload, zlib.crc32(struct.pack("<Qq", seq, ts_ms)))
+    return HEADER.pack(len(payload), crc, seq, ts_ms) + payload
+
+
+def _read_frames(path: Path) -> Iterator[Tuple[int, int, int, str, Dict[str, Any]]]:
+    """(galo poslinkis, seq, ts_ms, kind, fields) iki pirmo sugadinto rėmo."""
+    with open(path, "rb") as f:
+        data = f.read()
+    pos = 0
+    while pos + HEADER.size <= len(data):
+        length, crc, seq, ts_ms = HEADER.unpack_from(data, pos)
+        end = pos + HEADER.size + length
+        if end > len(data):
+            return
+        payload = data[pos + HEADER.size:end]
+        if zlib.crc32(payload, zlib.crc32(struct.pack("<Qq", seq, ts_ms))) != crc:
+            return
+        kind, _, body = payload.partition(b"\0")
+        yield end, seq, ts_ms, kind.decode(), json.loads(body)
+        pos = end
+
+
+def _segments(root: Path) -> List[Tuple[int, Path]]:
+    out = []
+    for p in root.glob(f"*{SEGMENT_SUFFIX}"):
+        try:
+            out.append((int(p.stem), p))
+        except ValueError:
+            continue
+    return sorted(out)
+
+
+def last_seq(root: Optional[Path] = None) -> int:
+    """Paskutinis teisingas seq diske (0 — žurnalas tuščias)."""
+    segs = _segments(Path(root or JOURNAL_DIR))
+    for _, path in reversed(segs):
+        seq = 0
+        for _, s, _, _, _ in _read_frames(path):
+            seq = s
+        if seq:
+            return seq
+    return 0
+
+
+def read(from_seq: int = 0, root: Optional[Path] = None) -> Iterator[Tuple[int, int, str, Dict[str, Any]]]:
+    """Įvykiai su seq > from_seq: (seq, ts_ms, kind, fields)."""
+    segs = _segments(Path(root or JOURNAL_DIR))
+    firsts = [first for first, _ in segs]
+    # Paskutinis segmentas, prasidedantis ne vėliau nei from_seq + 1
+    start = max(0, bisect.bisect_right(firsts, from_seq + 1) - 1)
+    for _, path in segs[start:]:
+        for _, seq, ts_ms, kind, fields in _read_frames(path):
+            if seq > from_seq:
+                yield seq, ts_ms, kind, fields
+
+
+# ============================================================
+# Rašytojas (group commit)
+# ============================================================
+
+class Journal:
+    def __init__(self, root: Path = JOURNAL_DIR, segment_bytes: int = SEGMENT_BYTES,
+                 group_commit_ms: float = GROUP_COMMIT_MS):
+        self.root = Path(root)
+        self.segment_bytes = segment_bytes
+        self.window_sec = group_commit_ms / 1000.0
+        self._lock = threading.Lock()
+        self._synced = threading.Condition(self._lock)
+        self._pending: List[bytes] = []
+        self._seq = 0
+        self._synced_seq = 0
+        self._file = None
+        self._size = 0
+        self._thread: Optional[threading.Thread] = None
+        self._error: Optional[Exception] = None
+        self._fsync_ms: deque = deque(maxlen=LATENCY_WINDOW)
+        self.stats = {"records": 0, "bytes": 0, "fsyncs": 0, "segments": 0}
+
+    # --------------------------------------------------------
+    def _open(self):
+        """Randa paskutinį seq, nukerpa sugadintą uodegą, atidaro segmentą rašymui."""
+        self.root.mkdir(parents=True, exist_ok=True)
+        segs = _segments(self.root)
+        if segs:
+            _, path = segs[-1]
+            end, seq = 0, 0
+            for end, seq, _, _, _ in _read_frames(path):
+                pass
+            if not seq and len(segs) > 1:
+                seq = last_seq(self.root)
+            size = path.stat().st_size
+            if end < size:
+                logging.warning(f"[JOURNAL] ⚠️ {path.name}: nukerpama sugadinta uodega ({size - end} B)")
+                with open(path, "r+b") as f:
+                    f.truncate(end)
+            self._seq = self._synced_seq = seq
+            self._file = open(path, "ab")
+            self._size = end
+        else:
+            self._rotate(1)
+        self.stats["segments"] = len(_segments(self.root))
+
+    def _rotate(self, first_seq: int):
+        if self._file is not None:
+            self._file.close()
+        path = self.root / f"{first_seq:016d}{SEGMENT_SUFFIX}"
+        self._file = open(path, "ab")
+        self._size = 0
+        self.stats["segments"] = self.stats.get("segments", 0) + 1
+
+    def _ensure_started(self):
+        if self._thread is not None:
+            return
+        with self._lock:
+            if self._thread is None:
+                self._open()
+                self._thread = threading.Thread(target=self._run, name="journal-sync", daemon=True)
+                self._thread.start()
+
+    # --------------------------------------------------------
+    def append_many(self, records: Sequence[Tuple[str, Dict[str, Any]]], durable: bool = True,
+                    timeout: float = SYNC_TIMEOUT_SEC) -> List[int]:
+        """Įrašo (kind, fields) įvykius; grąžina jų seq. durable=True — laukia fsync."""
+        self._ensure_started()
+        ts = int(time.time() * 1000)
+        with self._lock:
+            seqs = []
+            for kind, fields in records:
+                self._seq += 1
+                seqs.append(self._seq)
+                self._pending.append(encode(self._seq, ts, kind, fields))
+            self._synced.notify_all()
+            if durable and seqs:
+                deadline = time.monotonic() + timeout
+                while self._synced_seq < seqs[-1]:
+                    if self._error is not None:
+                        raise IOError(f"žurnalo rašymo klaida: {self._error}")
+                    left = deadline - time.monotonic()
+                    if left <= 0:
+                        raise TimeoutError(f"žurnalo fsync neįvyko per {timeout:.0f}s")
+                    self._synced.wait(left)
+        return seqs
+
+    def append(self, kind: str, fields: Dict[str, Any], durable: bool = True) -> int:
+        return self.append_many([(kind, fields)], durable=durable)[0]
+
+    def _run(self):
+        fsync = getattr(os, "fdatasync", os.fsync)
+        while True:
+            with self._lock:
+                while not self._pending:
+                    self._synced.wait()
+            time.sleep(self.window_sec)  # surenkam lygiagrečius rašytojus į vieną fsync
+            with self._lock:
+                frames, self._pending = self._pending, []
+                top = self._seq
+            try:
+                t0 = time.perf_counter()
+                for frame in frames:
+                    if self._size >= self.segment_bytes:
+                        self._file.flush()
+                        fsync(self._file.fileno())
+                        self._rotate(HEADER.unpack_from(frame)[2])
+                    self._file.write(frame)
+                    self._size += len(frame)
+                self._file.flush()
+                if CONFIG.get("JOURNAL_FSYNC", True):
+                    fsync(self._file.fileno())
+                ms = (time.perf_counter() - t0) * 1000
+                with self._lock:
+                    self._fsync_ms.append(ms)
+                    self.stats["records"] += len(frames)
+                    self.stats["bytes"] += sum(len(f) for f in frames)
+                    self.stats["fsyncs"] += 1
+                    self._synced_seq = top
+                    self._error = None
+                    self._synced.notify_all()
+            except Exception as e:
+                logging.error(f"[JOURNAL] ❌ Rašymo klaida: {e}")
+                with self._lock:
+                    self._error = e
+                    self._pending[:0] = frames  # bandysim dar kartą
+                    self._synced.notify_all()
+                time.sleep(1.0)
+
+    def get_metrics(self) -> Dict[str, Any]:
+        with self._lock:
+            lat = sorted(self._fsync_ms)
+            out = dict(self.stats, seq=self._seq, synced_seq=self._synced_seq)
+        n = len(lat)
+        out.update({
+            "fsync_p50_ms": round(lat[n // 2], 2) if n else 0.0,
+            "fsync_p99_ms": round(lat[min(n - 1, int(n * 0.99))], 2) if n else 0.0,
+            "avg_group": round(out["records"] / out["fsyncs"], 1) if out["fsyncs"] else 0.0,
+        })
+        return out
+
+
+JOURNAL = Journal()
+
+
+def append(kind: str, fields: Dict[str, Any], durable: bool = False) -> Optional[int]:
+    """Audito įvykis (pvz. order_submitted) — tik boto procese, kitur ignoruojama."""
+    if not enabled():
+        return None
+    try:
+        return JOURNAL.append(kind, fields, durable=durable)
+    except Exception as e:
+        logging.error(f"[JOURNAL] ❌ {kind} neįrašytas: {e}")
+        return None
+
+
+def get_metrics() -> Dict[str, Any]:
+    return JOURNAL.get_metrics()
+
+
+# ============================================================
+# Projekcijos: applied_seq, recover, checkpoint, rebuild
+# ============================================================
+
+def get_applied_seq(conn) -> int:
+    row = conn.execute("SELECT applied_seq FROM journal_state WHERE id = 1").fetchone()
+    return int(row[0]) if row else 0
+
+
+def set_applied_seq(cur, seq: int):
+    cur.execute("UPDATE journal_state SET applied_seq = MAX(applied_seq, ?) WHERE id = 1", (int(seq),))
+
+
+def mark_gap(cur):
+    """Įvykiai pritaikomi be žurnalo — pažymima toje pačioje transakcijoje."""
+    cur.execute("UPDATE journal_state SET gap_ms = ? WHERE id = 1", (int(time.time() * 1000),))
+
+
+def _gap_ms(path: Path) -> int:
+    """journal_state.gap_ms iš DB failo (0 — nėra failo / stulpelio)."""
+    if not Path(path).exists():
+        return 0
+    try:
+        con = sqlite3.connect(path, timeout=30)
+        try:
+            row = con.execute("SELECT gap_ms FROM journal_state WHERE id = 1").fetchone()
+        finally:
+            con.close()
+    except sqlite3.Error:
+        return 0
+    return int(row[0]) if row else 0
+
+
+def _apply_records(cur, records) -> Tuple[int, int]:
+    """Pritaiko žurnalo įrašus projekcijoms. Grąžina (pritaikyta, paskutinis seq)."""
+    from core.write_queue import from_record
+    n, top = 0, 0
+    for seq, _, kind, fields in records:
+        top = seq
+        ev = from_record(kind, fields)
+        if ev is None:
+            continue  # audito įvykiai (order_*) projekcijų neturi
+        try:
+            ev.apply(cur)
+            n += 1
+        except Exception as e:
+            logging.warning(f"[JOURNAL] ⚠️ seq={seq} {kind} nepritaikytas: {e}")
+    return n, top
+
+
+def recover(db_path=None) -> int:
+    """Paleidimo metu: į DB perkelia žurnale esančius, bet nepritaikytus įvykius."""
+    from core.db_manager import DB_PATH
+    if not enabled():
+        return 0
+    con = sqlite3.connect(db_path or DB_PATH, timeout=30)
+    try:
+        applied = get_applied_seq(con)
+        t0 = time.perf_counter()
+        cur = con.cursor()
+        n, top = _apply_records(cur, read(applied))
+        if top:
+            set_applied_seq(cur, top)
+        con.commit()
+        if top:
+            logging.info(f"[JOURNAL] ♻️ Atkurta {n} įvykių (seq {applied + 1}..{top}, "
+                         f"{(time.perf_counter() - t0) * 1000:.1f} ms)")
+        return n
+    finally:
+        con.close()
+
+
+def _checkpoints(root: Path) -> List[Tuple[int, Path]]:
+    out = []
+    for p in root.glob(f"{CHECKPOINT_PREFIX}*.db"):
+        try:
+            out.append((int(p.stem[len(CHECKPOINT_PREFIX):]), p))
+        except ValueError:
+            continue
+    return sorted(out)
+
+
+def checkpoint(db_path=None, root: Optional[Path] = None) -> Path:
+    """Momentinė DB kopija (VACUUM INTO) + senų checkpoint'ų / segmentų valymas."""
+    from core.db_manager import DB_PATH
+    root = Path(root or JOURNAL_DIR)
+    root.mkdir(parents=True, exist_ok=True)
+    tmp = root / f"{CHECKPOINT_PREFIX}new.tmp"
+    tmp.unlink(missing_ok=True)
+    con = sqlite3.connect(db_path or DB_PATH, timeout=30)
+    try:
+        con.execute("VACUUM INTO ?", (str(tmp),))
+    finally:
+        con.close()
+    # applied_seq — iš pačios kopijos (rašytojas galėjo commit'inti tarp užklausų)
+    snap = sqlite3.connect(tmp)
+    try:
+        seq = get_applied_seq(snap)
+    finally:
+        snap.close()
+    path = root / f"{CHECKPOINT_PREFIX}{seq:016d}.db"
+    os.replace(tmp, path)
+
+    cps = _checkpoints(root)
+    for _, old in cps[:-CHECKPOINT_KEEP]:
+        old.unlink(missing_ok=True)
+    oldest = _checkpoints(root)[0][0]
+    segs = _segments(root)
+    # Segmentas nereikalingas, jei kitas segmentas prasideda <= oldest + 1
+    for (_, p), (nxt, _) in zip(segs, segs[1:]):
+        if nxt <= oldest + 1:
+            p.unlink(missing_ok=True)
+    logging.info(f"[JOURNAL] 📸 Checkpoint'as {path.name} (applied_seq={seq})")
+    return path
+
+
+def rebuild(db_path=None, root: Optional[Path] = None) -> int:
+    """
+    Atkuria DB projekcijas: paskutinis checkpoint'as -> db_path, tada replay
+    nuo jo applied_seq. Vykdyti sustabdžius botą. Jei db_path pažymėta spraga
+    (gap_ms) vėlesnė nei checkpoint'o — RuntimeError.
+    """
+    from core.db_manager import DB_PATH
+    root = Path(root or JOURNAL_DIR)
+    db_path = Path(db_path or DB_PATH)
+    cps = _checkpoints(root)
+    if not cps:
+        raise RuntimeError(f"{root} nėra checkpoint'ų — atkurti nėra nuo ko")
+    _, cp = cps[-1]
+    gap_ms = _gap_ms(db_path)
+    if gap_ms > _gap_ms(cp):
+        raise RuntimeError(
+            f"{db_path.name} turi įvykių, kurių nėra žurnale (spraga po {cp.name}) — rebuild juos prarastų. "
+            f"Pirma padarykite naują checkpoint'ą iš šios DB"
+        )
+    for suffix in ("-wal", "-shm"):
+        Path(f"{db_path}{suffix}").unlink(missing_ok=True)
+    shutil.copyfile(cp, db_path)
+    con = sqlite3.connect(db_path, timeout=30)
+    try:
+        applied = get_applied_seq(con)
+        t0 = time.perf_counter()
+        cur = con.cursor()
+        n, top = _apply_records(cur, read(applied, root))
+        if top:
+            set_applied_seq(cur, top)
+        con.commit()
+    finally:
+        con.close()
+    logging.info(f"[JOURNAL] 🔁 {db_path.name} atkurta iš {cp.name} + {n} įvykių "
+                 f"({(time.perf_counter() - t0) * 1000:.1f} ms)")
+    return n
+
+
+def mark_reset(db_path=None):
+    """
+    Po tiesioginio DB išvalymo (manage.py reset, recreate): ankstesni žurnalo
+    įvykiai laikomi pritaikytais ir daromas naujas bazinis checkpoint'as.
+    reset_ms — ženklas veikiančiam botui (kitas procesas): pozicijų knyga
+    persikrauna iš DB (core/position_book.py).
+    """
+    from core.db_manager import DB_PATH
+    seq = last_seq()
+    con = sqlite3.connect(db_path or DB_PATH, timeout=30)
+    try:
+        con.execute("UPDATE journal_state SET applied_seq = ?, reset_ms = ? WHERE id = 1",
+                    (seq, int(time.time() * 1000)))
+        con.commit()
+    finally:
+        con.close()
+    checkpoint(db_path)
+
+
+_checkpointer_started = False
+
+
+def start_checkpointer(interval_sec: Optional[int] = None):
+    """Fone: checkpoint() kas JOURNAL_CHECKPOINT_SEC (pirmas — iškart, jei nėra nė vieno)."""
+    global _checkpointer_started
+    if _checkpointer_started or not enabled():
+        return
+    _checkpointer_started = True
+    interval = int(interval_sec or CONFIG.get("JOURNAL_CHECKPOINT_SEC", CHECKPOINT_INTERVAL_SEC))
+
+    def _loop():
+        if _checkpoints(JOURNAL_DIR):
+            time.sleep(interval)
+        while True:
+            try:
+                checkpoint()
+            except Exception as e:
+                logging.warning(f"[JOURNAL] Checkpoint'o klaida: {e}")
+            time.sleep(interval)
+
+    threading.Thread(target=_loop, name="journal-checkpoint", daemon=True).start()
@@ -3,22 +3,31 @@
 # core/main.py — AI valdomas prekybos botas (Safe AI v7.1, DB režimas)
 # ============================================================
 
+import sys
 import time
+import signal
 import logging
 import numpy as np
 from datetime import datetime, timezone
 from dotenv import load_dotenv
 from core.db_init import init_full_db
+from core import journal, state_store, storage_profile, write_queue
+from core.position_book import BOOK
 from core.order_executor import OrderExecutor
 from core.exchange_adapter import get_adapter
-from core.ws_bridge import start_ws_auto, get_all_prices, is_connected
+from core.ws_bridge import start_ws_auto, get_all_prices, is_connected, get_universe
+from core.warmup import UniverseWarmup
+from core.state_snapshot import save_snapshot, load_snapshot
+from core.rate_limiter import get_metrics as rate_limiter_metrics
+from core.user_stream import start_user_stream
+from core.ws_order_transport import get_latency_metrics
 from core.position_sanitizer import PositionSanitizer
 from notify.notifier import notify
-from risk.risk_manager import RiskManager, RiskConfig
+from risk.risk_manager import RiskManager, RiskConfig, follow_config
 from ai.ai_signals import get_trade_signals
 from ai.ai_performance import get_ai_performance
 from core.exit_manager import ExitManager
-from core.config import CONFIG
+from core.config import CONFIG, get_snapshot, start_config_watcher
 
 def ema(series, period):
     if not series or len(series) < period:
@@ -30,13 +39,13 @@ def ema(series, period):
 
 
 def get_trend(prices_list: list) -> str:
-    tf_cfg = CONFIG.get("TREND_FILTER", {})
-    if not tf_cfg.get("ENABLED", True):
+    cfg = get_snapshot()
+    if not cfg.tf_enabled:
         return "NEUTRAL"
-    ema_fast_n = int(tf_cfg.get("EMA_FAST", 9))
-    ema_slow_n = int(tf_cfg.get("EMA_SLOW", 50))
-    bias_up = float(tf_cfg.get("TREND_UP_BIAS", 0.0005))
-    bias_down = float(tf_cfg.get("TREND_DOWN_BIAS", -0.0005))
+    ema_fast_n = cfg.tf_ema_fast
+    ema_slow_n = cfg.tf_ema_slow
+    bias_up = cfg.tf_up_bias
+    bias_down = cfg.tf_down_bias
     if len(prices_list) < ema_slow_n:
         return "NEUTRAL"
     ema_fast = ema(prices_list[-ema_fast_n:], ema_fast_n)
@@ -51,9 +60,57 @@ def get_trend(prices_list: list) -> str:
     return "NEUTRAL"
 
 
+def _loop_filters(cfg):
+    """Signalų filtrai iš snapshot'o (DRY_RUN režime — sušvelninti)."""
+    if cfg.dry_run:
+        return 0.25, 0.0001, False
+    return cfg.ai_confidence_threshold, cfg.edge_min_pct, True
+
+
+SNAPSHOT_EVERY_SEC = 300
+
+
+def _save_state_snapshot(price_history: dict, warmup=None, universe=None):
+    """universe — kai WS tiltas veikia kitame procese (core/workers.py)."""
+    try:
+        size = save_snapshot(
+            price_history,
+            universe=get_universe() if universe is None else universe,
+            extra={"warmup_ready": bool(warmup.ready) if warmup else False},
+        )
+        logging.info(f"[SNAPSHOT] 💾 Būsena išsaugota ({size/1024:.1f} KB)")
+    except Exception as e:
+        logging.warning(f"[SNAPSHOT] Nepavyko išsaugoti būsenos: {e}")
+
+
+def _start_warmup(exchange, price_history: dict, snap, universe, cfg) -> UniverseWarmup:
+    """Snapshot'o tarpo backfill + AUTO_WARMUP; prekyba leidžiama tik pasiekus ratio."""
+    warmup = UniverseWarmup(exchange, price_history)
+    if snap:
+        try:
+            warmup.backfill(universe, since_ts=snap["ts"])
+        except Exception as e:
+            logging.warning(f"[MAIN] Snapshot backfill klaida: {e}")
+    if cfg.auto_warmup:
+        try:
+            warmup.run(universe)
+        except Exception as e:
+            logging.warning(f"[MAIN] Warmup klaida: {e}")
+    else:
+        warmup.ready = True
+    return warmup
+
+
 def main_loop():
     load_dotenv()
+    storage_profile.set_role("bot")
     init_full_db()  # užtikrina DB struktūrą
+    journal.recover()  # žurnalo įvykiai, nepatekę į DB iki crash'o
+    journal.start_checkpointer()
+    state_store.start_flusher()  # AI mokymosi ir kitos būsenos -> state_store
+    storage_profile.start_wal_checkpointer()
+    BOOK.load()  # atviros pozicijos -> atmintis (toliau skaitoma tik iš jos)
+    start_config_watcher()  # dashboard'o /api/save_config pakeitimai pasiekia botą
 
     logging.info("🚀 Starting Bot (DB režimas)")
 
@@ -66,11 +123,21 @@ def main_loop():
     exchange = get_adapter()
 
     # --- WS režimo parinkimas iš CONFIG
-    use_testnet = bool(CONFIG.get("USE_TESTNET", True))
+    use_testnet = get_snapshot().use_testnet
     mode_label = "MAINNET" if not use_testnet else "TEST"
 
     logging.info(f"[INIT] Paleidimo režimas: {mode_label} (dry_run={exchange.dry_run})")
-    start_ws_auto(testnet=use_testnet)
+
+    # LIVE: fill'ai ir balansai per user data stream (sanitizer / equity tracker)
+    if not exchange.dry_run:
+        try:
+            start_user_stream(CONFIG.get("API_KEY", ""), CONFIG.get("API_SECRET", ""), testnet=use_testnet)
+        except Exception as e:
+            logging.warning(f"[MAIN] User data stream nepaleistas: {e}")
+
+    # Warm restart: atkuriam universą ir kainų istoriją iš snapshot'o (jei galioja)
+    snap = load_snapshot()
+    start_ws_auto(testnet=use_testnet, universe=snap["universe"] if snap else None)
 
     for i in range(30):
         if is_connected():
@@ -80,20 +147,8 @@ def main_loop():
         time.sleep(1.0)
 
     # --- Rizika
-    rc = RiskConfig(
-        daily_max_loss_pct=float(CONFIG.get("DAILY_MAX_DRAWDOWN_PCT", 2.0)),
-        tp_base=float(CONFIG.get("EXIT", {}).get("TP_BASE", 0.06)),
-        sl_base=float(CONFIG.get("EXIT", {}).get("SL_BASE", 0.02)),
-        tsl_base=float(CONFIG.get("EXIT", {}).get("TSL_BASE", 0.015)),
-        min_hold_time_h=float(CONFIG.get("EXIT", {}).get("MIN_HOLD_TIME_H", 0.083)),
-        ai_exit_min_hold_h=float(CONFIG.get("EXIT", {}).get("AI_EXIT_MIN_HOLD_H", 0.167)),
-        hold_timeout_h=float(CONFIG.get("EXIT", {}).get("HOLD_TIMEOUT_H", 12)),
-        max_hold_h=float(CONFIG.get("EXIT", {}).get("MAX_HOLD_H", 24)),
-        vol_scale=bool(CONFIG.get("EXIT", {}).get("VOL_SCALE", True)),
-        confidence_scale=bool(CONFIG.get("EXIT", {}).get("CONFIDENCE_SCALE", True)),
-        max_positions=int(CONFIG.get("PORTFOLIO", {}).get("MAX_OPEN_POSITIONS", 8)),
-        max_exposure_pct=float(CONFIG.get("PORTFOLIO", {}).get("MAX_EXPOSURE_PCT", 85.0)),
-    )
+    cfg0 = get_snapshot()
+    rc = RiskConfig.from_snapshot(cfg0)
     
     # ✅ PRIDĖTA: Apsauga nuo RiskManager klaidų
     try:
@@ -124,6 +179,9 @@ def main_loop():
         class SimpleExitManager:
             def check_exits(self, prices): return 0
         exit_manager = SimpleExitManager()
+
+    # Karštas perkrovimas: EXIT.* / PORTFOLIO.* / DAILY_MAX_DRAWDOWN_PCT
+    follow_config(risk, exit_manager)
     
     sanitizer = PositionSanitizer(check_interval_sec=15)
     
@@ -147,26 +205,24 @@ def main_loop():
         pass
 
     # AISizer
-    if CONFIG.get("SIZER_DEBUG_ENABLED", False):
+    if get_snapshot().sizer_debug_enabled:
         from ai.ai_sizer_debug import AISizerDebug as AISizer
     else:
         from ai.ai_sizer import AISizer
     sizer = AISizer(CONFIG)
 
-    # Filtrai
-    conf_thresh = float(CONFIG.get("AI_CONFIDENCE_THRESHOLD", 0.7))
-    edge_min = float(CONFIG.get("EDGE_MIN_PCT", 0.0015))
-    min_per_trade = float(CONFIG.get("MIN_PER_TRADE_USDC", 25))
-    tf_enabled = True
-
-    if CONFIG.get("DRY_RUN", True):
-        conf_thresh = 0.25
-        edge_min = 0.0001
-        tf_enabled = False
+    # Filtrai (perskaičiuojami tik pasikeitus snapshot'o versijai)
+    cfg = get_snapshot()
+    cfg_version = cfg.version
+    conf_thresh, edge_min, tf_enabled = _loop_filters(cfg)
+    if cfg.dry_run:
         logging.info("[MAIN] 🧪 DRY_RUN: sušvelninti filtrai (conf>=0.25, edge>=0.0001, trend=off)")
 
     iteration = 0
-    price_history = {}
+    price_history = snap["price_history"] if snap else {}
+
+    # Warmup: istorija visam UNIVERSE lygiagrečiai; prekyba leidžiama tik pasiekus ratio
+    warmup = _start_warmup(exchange, price_history, snap, get_universe(), cfg)
 
     # Periodinis equity įrašymas
     try:
@@ -175,193 +231,233 @@ def main_loop():
     except Exception as e:
         logging.warning(f"[MAIN] Equity tracker neprieinamas: {e}")
 
+    # Periodinis archyvo eksportas (analitika neliečia gyvos DB)
+    try:
+        from core.archive import start_export_loop
+        start_export_loop()
+    except Exception as e:
+        logging.warning(f"[MAIN] Archyvo eksportas neprieinamas: {e}")
+
+    # Tvarkingas išjungimas (manage.py stop → SIGTERM) — kad suveiktų finally
+    try:
+        signal.signal(signal.SIGTERM, lambda *_: sys.exit(0))
+    except Exception:
+        pass
+    last_snapshot = time.time()
+
     # ======= PAGRINDINIS CIKLAS =======
-    while True:
-        try:
-            iteration += 1
-
-            # Atnaujinti equity
-            st = exchange.get_paper_account() or {}
-            equity_now = float(st.get("equity", 0.0))  # ✅ PATAISYTA: naudoti 'equity'
-            risk.update_equity(equity_now)
-
-            # Guard status
-            rsum = risk.get_summary() or {}
-            guard_status = str(rsum.get("guard_status") or "OK").upper()
-            if guard_status == "STOP":
-                # tikrinam bent EXIT'us
-                prices = get_all_prices() or {}
-                exit_manager.check_exits(prices)
-                time.sleep(2.0)
-                continue
-
-            # Kainos
-            prices = get_all_prices() or {}
-            usdc_symbols = [s for s in prices.keys() if s.endswith("USDC")]
-            if not usdc_symbols:
-                time.sleep(2)
-                continue
-
-            # Price history
-            for sym, pi in prices.items():
-                p = pi.get("price") if isinstance(pi, dict) else pi
-                try:
-                    p = float(p)
-                except Exception:
-                    p = None
-                if p:
-                    arr = price_history.setdefault(sym, [])
-                    arr.append(p)
-                    if len(arr) > 200:
-                        arr.pop(0)
-
-            # Signalai
-            signals = []
-            min_liq = float(CONFIG.get("MIN_LIQUIDITY_USDC", 100))
-            for sym in usdc_symbols:
-                pi = prices.get(sym, {})
-                vol = pi.get("quoteVolume") or pi.get("volume_usdc") or 0
-                if vol and float(vol) < min_liq:
-                    continue
-                sigs = get_trade_signals(symbol=sym)
-                if sigs:
-                    signals.extend(sigs)
-
-            buys = [s for s in signals if str(s.get("direction", "")).upper() == "BUY"]
-            sells = [s for s in signals if str(s.get("direction", "")).upper() == "SELL"]
-
-            # Fallback test signal (jei reikia)
-            if not buys and (CONFIG.get("DEBUG_FORCE_SIGNALS", True) or CONFIG.get("DRY_RUN", True)):
-                import random
-                test_sym = random.choice(["BTCUSDC", "ETHUSDC", "SOLUSDC", "BNBUSDC"])
-                buys = [{
-                    "symbol": test_sym,
-                    "direction": "BUY",
-                    "confidence": 0.7,
-                    "edge": 0.0015,
-                    "timestamp": datetime.now(timezone.utc).isoformat()
-                }]
-                logging.info(f"[AI] 📊 Sugeneruotas testinis signalas {test_sym}")
-
-            # Filtravimas
-            valid = []
-            for s in buys:
-                conf = float(s.get("confidence", 0))
-                edge = float(s.get("edge", 0))
-                if conf < conf_thresh or edge < edge_min:
-                    continue
-                sym = s["symbol"]
-                trend = get_trend(price_history.get(sym, [])) if tf_enabled else "UP"
-                if trend != "UP":
+    try:
+        while True:
+            try:
+                iteration += 1
+
+                cfg = get_snapshot()
+                if cfg.version != cfg_version:
+                    cfg_version = cfg.version
+                    conf_thresh, edge_min, tf_enabled = _loop_filters(cfg)
+                    logging.info(f"[MAIN] ⚙️ Konfigūracija v{cfg_version} pritaikyta ciklui")
+                min_per_trade = cfg.min_per_trade_usdc
+
+                # Atnaujinti equity
+                st = exchange.get_paper_account() or {}
+                equity_now = float(st.get("equity", 0.0))  # ✅ PATAISYTA: naudoti 'equity'
+                risk.update_equity(equity_now)
+
+                # Guard status
+                rsum = risk.get_summary() or {}
+                guard_status = str(rsum.get("guard_status") or "OK").upper()
+                if guard_status == "STOP":
+                    # tikrinam bent EXIT'us
+                    prices = get_all_prices() or {}
+                    exit_manager.check_exits(prices)
+                    time.sleep(2.0)
                     continue
-                valid.append(s)
 
-            # Pirkimai (vietų skaičiaus ir laisvų lėšų kontrolė per DB)
-            if valid:
-                import sqlite3
-                from core.db_manager import DB_PATH
+                # Kainos
+                prices = get_all_prices() or {}
+                usdc_symbols = [s for s in prices.keys() if s.endswith("USDC")]
+                if not usdc_symbols:
+                    time.sleep(2)
+                    continue
 
-                state_now = exchange.get_paper_account() or {}
-                free_cash = float(state_now.get("free_usdc", 0.0))  # ✅ PATAISYTA: naudoti 'free_usdc'
+                # Price history (1m barai — ta pati serija kaip warmup klines)
+                warmup.add_prices(prices, cfg.history_window)
 
-                try:
-                    con = sqlite3.connect(DB_PATH)
-                    cur = con.cursor()
-                    open_cnt = int(cur.execute("SELECT COUNT(*) FROM positions WHERE state='OPEN' AND qty>0;").fetchone()[0])
-                    con.close()
-                except Exception:
-                    open_cnt = 0
-                slots_left = max(0, int(rc.max_positions) - open_cnt)
-
-                valid.sort(key=lambda x: x.get("confidence", 0), reverse=True)
-                for sig in valid[:slots_left]:
-                    sym = sig["symbol"]
-                    price_obj = prices.get(sym, {})
-                    mid_price = price_obj.get("price") if isinstance(price_obj, dict) else None
-                    if not mid_price:
-                        mid_price = exchange.get_price(sym)
-                    if not mid_price:
+                # Signalai
+                signals = []
+                min_liq = cfg.min_liquidity_usdc
+                for sym in usdc_symbols:
+                    pi = prices.get(sym, {})
+                    vol = pi.get("quoteVolume") or pi.get("volume_usdc") or 0
+                    if vol and float(vol) < min_liq:
                         continue
-
-                    q_amt = sizer.quote_for_signal(
-                        symbol=sym,
-                        confidence=float(sig["confidence"]),
-                        edge=float(sig["edge"]),
-                        price=float(mid_price),
-                        free_cash=float(free_cash),
-                        equity=float(equity_now),
-                        open_positions={},
-                        slots_left=slots_left,
-                        daily_pnl_pct=float(rsum.get("pnl_today", 0.0)),
-                    )
-
-                    if q_amt < min_per_trade or q_amt > free_cash:
+                    sigs = get_trade_signals(symbol=sym)
+                    if sigs:
+                        signals.extend(sigs)
+
+                buys = [s for s in signals if str(s.get("direction", "")).upper() == "BUY"]
+                sells = [s for s in signals if str(s.get("direction", "")).upper() == "SELL"]
+
+                # Fallback test signal (jei reikia)
+                if not buys and (cfg.debug_force_signals or cfg.dry_run):
+                    import random
+                    test_sym = random.choice(["BTCUSDC", "ETHUSDC", "SOLUSDC", "BNBUSDC"])
+                    buys = [{
+                        "symbol": test_sym,
+                        "direction": "BUY",
+                        "confidence": 0.7,
+                        "edge": 0.0015,
+                        "timestamp": datetime.now(timezone.utc).isoformat()
+                    }]
+                    logging.info(f"[AI] 📊 Sugeneruotas testinis signalas {test_sym}")
+
+                # Warmup vartai — kol istorijos per mažai, naujų pozicijų neatidarom
+                if cfg.auto_warmup and not warmup.maybe_retry(get_universe() or usdc_symbols):
+                    buys = []
+
+                # Filtravimas
+                valid = []
+                for s in buys:
+                    conf = float(s.get("confidence", 0))
+                    edge = float(s.get("edge", 0))
+                    if conf < conf_thresh or edge < edge_min:
                         continue
-
-                    res = order_executor.market_buy(
-                        symbol=sym,
-                        quote_amount=float(q_amt),
-                        expected_edge_pct=float(sig["edge"]),
-                        ai_confidence=float(sig["confidence"]),
-                    )
-                    if res and res.get("ok", False):  # ✅ PATAISYTA: patikrinti ar res nėra None
-                        try:
-                            notify(f"🟢 BUY {sym} @ {res.get('price', 0):.6f} ({q_amt:.2f} USDC)")
-                        except Exception:
-                            pass
-                        free_cash -= float(q_amt)
-                        slots_left -= 1
-                        if slots_left <= 0 or free_cash <= min_per_trade:
-                            break
-
-            # AUTO EXIT
-            auto_exits = exit_manager.check_exits(prices)
-
-            # AI SELL
-            for s in sells:
-                sym = s.get("symbol")
-                if not sym or not risk.has_position(sym):
-                    continue
-                try:
-                    qty = float(order_executor.get_available_qty(sym) or 0.0)
-                except Exception:
-                    qty = 0.0
-                if qty > 0:
-                    res = order_executor.market_sell(
-                        symbol=sym,
-                        base_qty=qty,
-                        expected_edge_pct=float(s.get("edge", 0)),
-                        ai_confidence=float(s.get("confidence", 0)),
-                        allow_partial=True,
-                        reason="AI SELL",
-                    )
-                    if res and res.get("ok", False):  # ✅ PATAISYTA: patikrinti ar res nėra None
-                        try:
-                            notify(f"🔴 SELL {sym} (AI SELL)")
-                        except Exception:
-                            pass
-
-            # Periodiškai — equity metrika į AI Performance
-            if iteration % 10 == 0 and ai_perf:
+                    sym = s["symbol"]
+                    trend = get_trend(price_history.get(sym, [])) if tf_enabled else "UP"
+                    if trend != "UP":
+                        continue
+                    valid.append(s)
+
+                # Pirkimai (vietų skaičiaus ir laisvų lėšų kontrolė — pozicijų knyga)
+                if valid:
+                    state_now = exchange.get_paper_account() or {}
+                    free_cash = float(state_now.get("free_usdc", 0.0))  # ✅ PATAISYTA: naudoti 'free_usdc'
+
+                    try:
+                        open_cnt = BOOK.count()
+                    except Exception:
+                        open_cnt = 0
+                    slots_left = max(0, cfg.max_open_positions - open_cnt)
+
+                    valid.sort(key=lambda x: x.get("confidence", 0), reverse=True)
+                    for sig in valid[:slots_left]:
+                        sym = sig["symbol"]
+                        price_obj = prices.get(sym, {})
+                        mid_price = price_obj.get("price") if isinstance(price_obj, dict) else None
+                        if not mid_price:
+                            mid_price = exchange.get_price(sym)
+                        if not mid_price:
+                            continue
+
+                        q_amt = sizer.quote_for_signal(
+                            symbol=sym,
+                            confidence=float(sig["confidence"]),
+                            edge=float(sig["edge"]),
+                            price=float(mid_price),
+                            free_cash=float(free_cash),
+                            equity=float(equity_now),
+                            open_positions={},
+                            slots_left=slots_left,
+                            daily_pnl_pct=float(rsum.get("pnl_today", 0.0)),
+                        )
+
+                        if q_amt < min_per_trade or q_amt > free_cash:
+                            continue
+
+                        res = order_executor.market_buy(
+                            symbol=sym,
+                            quote_amount=float(q_amt),
+                            expected_edge_pct=float(sig["edge"]),
+                            ai_confidence=float(sig["confidence"]),
+                        )
+                        if res and res.get("ok", False):  # ✅ PATAISYTA: patikrinti ar res nėra None
+                            try:
+                                notify(f"🟢 BUY {sym} @ {res.get('price', 0):.6f} ({q_amt:.2f} USDC)")
+                            except Exception:
+                                pass
+                            free_cash -= float(q_amt)
+                            slots_left -= 1
+                            if slots_left <= 0 or free_cash <= min_per_trade:
+                                break
+
+                # AUTO EXIT
+                auto_exits = exit_manager.check_exits(prices)
+
+                # AI SELL
+                for s in sells:
+                    sym = s.get("symbol")
+                    if not sym or not risk.has_position(sym):
+                        continue
+                    try:
+                        qty = float(order_executor.get_available_qty(sym) or 0.0)
+                    except Exception:
+                        qty = 0.0
+                    if qty > 0:
+                        res = order_executor.market_sell(
+                            symbol=sym,
+                            base_qty=qty,
+                            expected_edge_pct=float(s.get("edge", 0)),
+                            ai_confidence=float(s.get("confidence", 0)),
+                            allow_partial=True,
+                            reason="AI SELL",
+                        )
+                        if res and res.get("ok", False):  # ✅ PATAISYTA: patikrinti ar res nėra None
+                            try:
+                                notify(f"🔴 SELL {sym} (AI SELL)")
+                            except Exception:
+                                pass
+
+                # Periodiškai — equity metrika į AI Performance
+                if iteration % 10 == 0 and ai_perf:
+                    try:
+                        ai_perf.record_equity()
+                    except Exception:
+                        pass
+
+                # Sanitizer
                 try:
-                    ai_perf.record_equity()
+                    sanitizer.maybe_run(exchange, risk)
                 except Exception:
                     pass
 
-            # Sanitizer
-            try:
-                sanitizer.maybe_run(exchange, risk)
-            except Exception:
-                pass
-
-            if iteration % 5 == 0:
-                logging.info(f"[LOOP] Iter={iteration:04d} | Equity={equity_now:.2f}")
+                if iteration % 5 == 0:
+                    logging.info(f"[LOOP] Iter={iteration:04d} | Equity={equity_now:.2f}")
+                if iteration % 30 == 0:
+                    rm = rate_limiter_metrics()
+                    logging.info(
+                        f"[RATE] used_1m={rm['used_weight_1m']} ({rm['usage_pct']:.1f}%) | "
+                        f"tokens={rm['tokens']:.0f}/{rm['capacity']:.0f} | rejected={rm['rejected']} | "
+                        f"429={rm['http_429']} 418={rm['http_418']}"
+                    )
+                    wm = write_queue.get_metrics()
+                    logging.info(
+                        f"[DBW] depth={wm['depth']} (max {wm['max_depth']}) | batches={wm['batches']} "
+                        f"avg_batch={wm['avg_batch']} | commit p50={wm['commit_p50_ms']:.1f}ms "
+                        f"p99={wm['commit_p99_ms']:.1f}ms | err={wm['errors']}"
+                    )
+                    if journal.enabled():
+                        jm = journal.get_metrics()
+                        logging.info(f"[JOURNAL] seq={jm['seq']} | fsync={jm['fsyncs']} "
+                                     f"p99={jm['fsync_p99_ms']:.1f}ms | avg_group={jm['avg_group']}")
+                    for t, m in get_latency_metrics().items():
+                        logging.info(
+                            f"[ORDER] {t}: n={m['orders']} err={m['errors']} fallback={m['fallbacks']} | "
+                            f"decision->ack p50={m['p50_ms']:.1f}ms p99={m['p99_ms']:.1f}ms"
+                        )
+
+                # Periodinis warm-restart snapshot'as
+                if time.time() - last_snapshot >= SNAPSHOT_EVERY_SEC:
+                    _save_state_snapshot(price_history, warmup)
+                    last_snapshot = time.time()
 
-            time.sleep(2.0)
+                time.sleep(2.0)
 
-        except Exception as e:
-            logging.exception(f"[MAIN_LOOP] Klaida: {e}")
-            time.sleep(3.0)
+            except Exception as e:
+                logging.exception(f"[MAIN_LOOP] Klaida: {e}")
+                time.sleep(3.0)
+    finally:
+        _save_state_snapshot(price_history, warmup)
+        write_queue.flush()
 
 
 if __name__ == "__main__":
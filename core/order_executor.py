@@ -2,15 +2,15 @@
 # core/order_executor.py — pavedimų vykdymas (DB integruotas)
 # Safe AI v7.2 (2025-11-12)
 # ------------------------------------------------------------
-# - Rašo atidarytas pozicijas į DB (lentelė: positions)
+# - Rašo atidarytas pozicijas per pozicijų knygą (write-through į DB positions)
 # - Uždarius poziciją, ją pašalina arba pažymi CLOSED
 # - Suderinta su app.py /api/open_positions
+# - Pavedimai ir užpildymai registruojami žurnale (core/journal.py)
 # ============================================================
 
-import sqlite3
 import logging
-from datetime import datetime, timezone
-from core.db_manager import DB_PATH
+from core import journal
+from core.position_book import BOOK
 from core.exchange_adapter import get_adapter
 # import ai.ai_learning as ai_learning  # ❌ PAŠALINTA: ciklinis importas
 
@@ -36,6 +36,8 @@ class OrderExecutor:
             qty = quote_amount / float(price)
             
             # Vykdyti pavedimą
+            journal.append("order_submitted", {"symbol": symbol, "side": "BUY", "qty": qty,
+                                               "price": float(price), "confidence": ai_confidence})
             res = self.exchange.execute_market_order(
                 symbol=symbol,
                 side="BUY",
@@ -48,20 +50,15 @@ class OrderExecutor:
                 error_msg = res.get("error", "Nežinoma klaida") if res else "Nėra atsakymo"
                 return {"ok": False, "error": error_msg}
 
-            # Įrašome į DB lentelę positions
+            # Pozicijų knyga + DB lentelė positions (write-through)
             entry_price = float(res.get("fill_price", price))
             executed_qty = float(res.get("qty", qty))
-            opened_at = datetime.now(timezone.utc).isoformat()
+            journal.append("order_filled", {"symbol": symbol, "side": "BUY", "qty": executed_qty,
+                                            "price": entry_price}, durable=True)
 
-            con = sqlite3.connect(DB_PATH)
-            cur = con.cursor()
-            cur.execute("""
-                INSERT OR REPLACE INTO positions 
-                (symbol, entry_price, qty, opened_at, confidence, state)
-                VALUES (?, ?, ?, ?, ?, 'OPEN')
-            """, (symbol, entry_price, executed_qty, opened_at, ai_confidence))
-            con.commit()
-            con.close()
+            # Kritinis įrašas — laukiam commit'o (flush barjeras)
+            if not BOOK.open(symbol, entry_price, executed_qty, ai_confidence):
+                logging.error(f"[OrderExecutor] ❌ BUY {symbol} įvykdytas, bet pozicija neįrašyta į DB")
 
             logging.info(f"[OrderExecutor] 🟢 BUY {symbol} {executed_qty} @ {entry_price:.6f} | {quote_amount:.2f} USDC")
             return {
@@ -86,6 +83,8 @@ class OrderExecutor:
                     reason: str = "MANUAL",
                     entry_price: float = 0.0) -> dict:
         try:
+            journal.append("order_submitted", {"symbol": symbol, "side": "SELL", "qty": base_qty,
+                                               "reason": reason, "confidence": ai_confidence})
             res = self.exchange.execute_market_order(
                 symbol=symbol,
                 side="SELL",
@@ -101,22 +100,12 @@ class OrderExecutor:
             sell_price = float(res.get("fill_price", 0))
             executed_qty = float(res.get("qty", base_qty))
             usdc_gain = (sell_price - entry_price) * executed_qty if entry_price and executed_qty else 0.0
+            journal.append("order_filled", {"symbol": symbol, "side": "SELL", "qty": executed_qty,
+                                            "price": sell_price, "pnl_usdc": usdc_gain}, durable=True)
 
-            # Pašaliname poziciją iš DB arba pažymime kaip CLOSED
-            con = sqlite3.connect(DB_PATH)
-            cur = con.cursor()
-            
-            # Variantas 1: Ištriname poziciją
-            cur.execute("DELETE FROM positions WHERE symbol = ?;", (symbol,))
-            
-            # Variantas 2: Arba pažymime kaip CLOSED (išsaugo istoriją)
-            # cur.execute("""
-            #     UPDATE positions SET state='CLOSED', closed_at=?, close_price=?, pnl_usdc=?
-            #     WHERE symbol=? AND state='OPEN'
-            # """, (datetime.now(timezone.utc).isoformat(), sell_price, usdc_gain, symbol))
-            
-            con.commit()
-            con.close()
+            # Pašaliname poziciją iš knygos ir DB (kritinis įrašas — laukiam commit'o)
+            # Arba pažymėti CLOSED (išsaugo istoriją): BOOK.close
+            BOOK.remove(symbol)
 
             # Atnaujiname paper account balansą
             try:
@@ -142,17 +131,9 @@ class OrderExecutor:
     # 📊 Pagalbinės funkcijos
     # ======================================================
     def get_available_qty(self, symbol: str) -> float:
-        """Grąžina turimą kiekį DB lentelėje positions."""
+        """Grąžina turimą kiekį (pozicijų knyga, be DB užklausos)."""
         try:
-            con = sqlite3.connect(DB_PATH)
-            cur = con.cursor()
-            row = cur.execute(
-                "SELECT qty FROM positions WHERE symbol=? AND state='OPEN';", (symbol,)
-            ).fetchone()
-            con.close()
-            if not row:
-                return 0.0
-            return float(row[0] or 0.0)
+            return BOOK.qty(symbol)
         except Exception as e:
             logging.warning(f"[OrderExecutor] Nepavyko gauti qty {symbol}: {e}")
             return 0.0
\ No newline at end of file
@@ -5,11 +5,12 @@
 # Visos būsenos operacijos atliekamos per DB.
 # ============================================================
 
-import sqlite3
 import logging
 from datetime import datetime, timezone
-from core.db_manager import DB_PATH, fetch_risk_state, update_risk_state
+from core.db_manager import fetch_risk_state, update_risk_state, get_conn
 from core.config import CONFIG
+from core.position_book import BOOK
+from core import dao
 
 START_CAPITAL = 10_000.0  # testinės sąskaitos pradinis kapitalas
 
@@ -17,9 +18,7 @@ logging.basicConfig(level=logging.INFO, format="%(asctime)s [%(levelname)s] %(me
 
 
 def _get_conn():
-    con = sqlite3.connect(DB_PATH)
-    con.row_factory = sqlite3.Row
-    return con
+    return get_conn()
 
 
 def _now_iso():
@@ -31,28 +30,15 @@ def _now_iso():
 # ============================================================
 
 def get_open_positions() -> dict:
-    """Grąžina visas atidarytas pozicijas iš DB."""
-    con = _get_conn()
-    rows = con.execute("SELECT * FROM positions WHERE state='OPEN'").fetchall()
-    con.close()
-    return {
-        r["symbol"]: {
-            "entry_price": r["entry_price"],
-            "qty": r["qty"],
-            "confidence": r["confidence"],
-            "opened_at": r["opened_at"]
-        }
-        for r in rows
-    }
+    """Grąžina visas atidarytas pozicijas (boto procese — iš atminties, kitur — iš DB)."""
+    return BOOK.as_dict()
 
 
 def get_equity_from_db() -> float:
     """Grąžina paskutinį įrašą iš equity_history lentelės."""
     try:
-        con = _get_conn()
-        row = con.execute("SELECT equity FROM equity_history ORDER BY ts DESC LIMIT 1").fetchone()
-        con.close()
-        return float(row["equity"]) if row else START_CAPITAL
+        point = dao.latest_equity()
+        return point.equity if point else START_CAPITAL
     except Exception:
         return START_CAPITAL
 
@@ -154,23 +140,16 @@ def get_account_state():
         positions = get_open_positions()
 
         # 2. Pasiimame paskutinį equity įrašą
-        con = _get_conn()
-        row = con.execute("""
-            SELECT ts, equity, free_usdc, used_usdc
-            FROM equity_history
-            ORDER BY ts DESC
-            LIMIT 1
-        """).fetchone()
-        con.close()
+        point = dao.latest_equity()
 
-        if row:
+        if point:
             return {
-                "balance_usdc": float(row["free_usdc"]),
+                "balance_usdc": point.free_usdc,
                 "positions": positions,
-                "equity": float(row["equity"]),
-                "free_usdc": float(row["free_usdc"]),
-                "used_usdc": float(row["used_usdc"]),
-                "timestamp": row["ts"]
+                "equity": point.equity,
+                "free_usdc": point.free_usdc,
+                "used_usdc": point.used_usdc,
+                "timestamp": point.ts
             }
         else:
             logging.warning("[PaperAccount] Nepavyko gauti būsenos iš DB. Grąžinama pradinė būsena.")
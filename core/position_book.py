@@ -0,0 +1,252 @@
+# ============================================================
+# core/position_book.py — atvirų pozicijų knyga atmintyje
+# ------------------------------------------------------------
+# - Boto procese (storage_profile rolė "bot") knyga yra autoritetinga:
+#   užkraunama iš DB vieną kartą, visi skaitymai (has / count / qty /
+#   check_exits) vyksta tik iš atminties
+# - Pakeitimai — write-through: open() / remove() / close() įdeda įvykį
+#   į write-behind eilę (laukia commit'o) ir atnaujina atmintį. SQLite
+#   lieka žurnalu, iš kurio knyga atstatoma po restarto
+# - Kituose procesuose (dashboard, CLI) rašytojas — kitas procesas,
+#   todėl knyga kiekvieną kartą perskaitoma iš DB
+# - Išorinis reset'as (dashboard /api/test_reset, manage.py reset — kitas
+#   procesas) pažymimas journal_state.reset_ms (journal.mark_reset); boto
+#   knyga jį tikrina ne dažniau nei kas BOOK_RESET_CHECK_SEC ir pasikeitus
+#   persikrauna iš DB
+# - Indeksai: symbol -> įrašas (dict) ir (opened_at_ms, symbol) surūšiuotas
+#   sąrašas (seniausios pozicijos, laikymo limitai)
+# - arrays(): stulpeliai NumPy masyvais (check_exits), perkuriami tik
+#   pasikeitus knygai
+# ============================================================
+
+import time
+import bisect
+import logging
+import threading
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from core.config import CONFIG
+from core import dao, storage_profile, write_queue
+from core.timeutil import now_ms, ms_to_iso
+
+RESET_CHECK_SEC = 2.0
+
+
+# Atviros pozicijos įrašas (__slots__) — bendras su DAO
+PositionRecord = dao.Position
+
+
+class PositionBook:
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._by_symbol: Dict[str, PositionRecord] = {}
+        self._by_open: List[tuple] = []  # (opened_at_ms, symbol), surūšiuota
+        self._loaded_path = None
+        self._version = 0
+        self._arrays = None  # (versija, stulpeliai)
+        self._reset_ms = 0  # journal_state.reset_ms įkėlimo metu
+        self._reset_checked = 0.0
+
+    # --------------------------------------------------------
+    # Įkėlimas
+    # --------------------------------------------------------
+    @staticmethod
+    def is_authoritative() -> bool:
+        return storage_profile.get_role() == "bot"
+
+    def load(self):
+        """(Per)krauna OPEN pozicijas iš DB."""
+        from core import db_manager
+        reset_ms = self._read_reset_ms() if self.is_authoritative() else 0
+        rows = dao.open_positions()
+        with self._lock:
+            self._by_symbol = {p.symbol: p for p in rows}
+            self._by_open = sorted((p.opened_at_ms, p.symbol) for p in self._by_symbol.values())
+            self._loaded_path = db_manager.DB_PATH
+            self._reset_ms = reset_ms
+            self._reset_checked = time.monotonic()
+            self._version += 1
+        if self.is_authoritative():
+            logging.info(f"[PositionBook] 📒 Įkelta {len(rows)} atvirų pozicijų iš DB")
+        return len(rows)
+
+    @staticmethod
+    def _read_reset_ms() -> int:
+        try:
+            row = dao.fetch_one("journal_state.reset_ms")
+            return int(row[0] or 0) if row else 0
+        except Exception:
+            return 0  # sena schema / lentelės nėra — reset'ų nesekam
+
+    def _reset_elsewhere(self) -> bool:
+        """Ar kitas procesas išvalė DB po paskutinio įkėlimo (tikrinama retai)."""
+        now = time.monotonic()
+        if now - self._reset_checked < float(CONFIG.get("BOOK_RESET_CHECK_SEC", RESET_CHECK_SEC)):
+            return False
+        self._reset_checked = now
+        if self._read_reset_ms() == self._reset_ms:
+            return False
+        logging.warning("[PositionBook] 🔄 DB išvalyta kitame procese — knyga perkraunama")
+        return True
+
+    def _ensure(self):
+        from core import db_manager
+        if (not self.is_authoritative() or self._loaded_path != db_manager.DB_PATH
+                or self._reset_elsewhere()):
+            self.load()
+
+    # --------------------------------------------------------
+    # Skaitymas
+    # --------------------------------------------------------
+    def get(self, symbol: str) -> Optional[PositionRecord]:
+        self._ensure()
+        return self._by_symbol.get(symbol)
+
+    def has(self, symbol: str) -> bool:
+        p = self.get(symbol)
+        return p is not None and p.qty > 0
+
+    def qty(self, symbol: str) -> float:
+        p = self.get(symbol)
+        return p.qty if p else 0.0
+
+    def count(self) -> int:
+        self._ensure()
+        with self._lock:
+            return sum(1 for p in self._by_symbol.values() if p.qty > 0)
+
+    def by_open_time(self) -> List[PositionRecord]:
+        """Pozicijos nuo seniausios (kopija — saugu iteruoti ir uždarinėti)."""
+        self._ensure()
+        with self._lock:
+            return [self._by_symbol[s] for _, s in self._by_open]
+
+    def opened_before(self, ms: int) -> List[PositionRecord]:
+        """Pozicijos, atidarytos anksčiau nei ms (bisect pagal laiko indeksą)."""
+        self._ensure()
+        with self._lock:
+            i = bisect.bisect_left(self._by_open, (int(ms), ""))
+            return [self._by_symbol[s] for _, s in self._by_open[:i]]
+
+    def arrays(self) -> Tuple[List[str], np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Atviros pozicijos (qty > 0) stulpeliais, nuo seniausios:
+        (symbols, entry_price, qty, opened_at_ms, confidence). Nekeisti — cache.
+        """
+        self._ensure()
+        with self._lock:
+            cached = self._arrays
+            if cached is not None and cached[0] == self._version:
+                return cached[1]
+            rows = [self._by_symbol[s] for _, s in self._by_open]
+            rows = [p for p in rows if p.qty > 0]
+            cols = (
+                [p.symbol for p in rows],
+                np.array([p.entry_price for p in rows], dtype=np.float64),
+                np.array([p.qty for p in rows], dtype=np.float64),
+                np.array([p.opened_at_ms for p in rows], dtype=np.int64),
+                np.array([p.confidence for p in rows], dtype=np.float64),
+            )
+            self._arrays = (self._version, cols)
+            return cols
+
+    def as_dict(self) -> Dict[str, dict]:
+        self._ensure()
+        with self._lock:
+            return {s: p.as_dict() for s, p in self._by_symbol.items()}
+
+    # --------------------------------------------------------
+    # Rašymas (write-through)
+    # --------------------------------------------------------
+    def _put(self, rec: PositionRecord):
+        self._drop(rec.symbol)
+        self._by_symbol[rec.symbol] = rec
+        bisect.insort(self._by_open, (rec.opened_at_ms, rec.symbol))
+        self._version += 1
+
+    def _drop(self, symbol: str):
+        old = self._by_symbol.pop(symbol, None)
+        if old is not None:
+            i = bisect.bisect_left(self._by_open, (old.opened_at_ms, symbol))
+            if i < len(self._by_open) and self._by_open[i] == (old.opened_at_ms, symbol):
+                del self._by_open[i]
+            self._version += 1
+
+    def open(self, symbol: str, entry_price: float, qty: float, confidence: float = 0.0,
+             opened_at_ms: Optional[int] = None) -> bool:
+        """Nauja (arba pakeista) pozicija. Grąžina, ar įrašas pateko į DB."""
+        self._ensure()
+        opened_ms = now_ms() if opened_at_ms is None else int(opened_at_ms)
+        rec = PositionRecord(symbol, entry_price, qty, ms_to_iso(opened_ms), opened_ms, confidence)
+        ok = write_queue.submit(write_queue.PositionOpen(
+            symbol, rec.entry_price, rec.qty, rec.opened_at, rec.confidence, opened_ms), wait=True)
+        # Pavedimas jau įvykdytas — atmintis atspindi realybę net jei DB įrašas nepavyko
+        with self._lock:
+            self._put(rec)
+        return ok
+
+    def remove(self, symbol: str) -> bool:
+        """Pozicija ištrinama (SELL be istorijos)."""
+        self._ensure()
+        ok = write_queue.submit(write_queue.PositionDelete(symbol), wait=True)
+        with self._lock:
+            self._drop(symbol)
+        return ok
+
+    def close(self, symbol: str, close_price: float, pnl_pct: float, pnl_usdc: float, reason: str,
+              closed_at_ms: Optional[int] = None) -> bool:
+        """Pozicija pažymima CLOSED + CLOSE sandoris; iš knygos išimama tik po commit'o."""
+        self._ensure()
+        closed_ms = now_ms() if closed_at_ms is None else int(closed_at_ms)
+        ok = write_queue.submit(write_queue.PositionClose(
+            symbol=symbol,
+            closed_at=ms_to_iso(closed_ms),
+            close_price=close_price,
+            pnl_pct=pnl_pct,
+            pnl_usdc=pnl_usdc,
+            reason=reason,
+            closed_at_ms=closed_ms,
+        ), wait=True)
+        if ok:
+            with self._lock:
+                self._drop(symbol)
+        return ok
+
+    def close_many(self, closes: Sequence[Tuple[str, float, float, float, str]],
+                   closed_at_ms: Optional[int] = None) -> List[bool]:
+        """
+        Keli uždarymai (symbol, close_price, pnl_pct, pnl_usdc, reason) vienu
+        write-behind batch'u — laukiama vieno commit'o, ne po vieną.
+        """
+        if not closes:
+            return []
+        self._ensure()
+        closed_ms = now_ms() if closed_at_ms is None else int(closed_at_ms)
+        closed_at = ms_to_iso(closed_ms)
+        results = write_queue.submit_many([
+            write_queue.PositionClose(
+                symbol=symbol,
+                closed_at=closed_at,
+                close_price=close_price,
+                pnl_pct=pnl_pct,
+                pnl_usdc=pnl_usdc,
+                reason=reason,
+                closed_at_ms=closed_ms,
+            )
+            for symbol, close_price, pnl_pct, pnl_usdc, reason in closes
+        ], wait=True)
+        with self._lock:
+            for (symbol, *_), ok in zip(closes, results):
+                if ok:
+                    self._drop(symbol)
+        return results
+
+    def reset(self):
+        """Po išorinio positions išvalymo (test reset) — knyga perskaitoma iš DB."""
+        with self._lock:
+            self._loaded_path = None
+
+
+BOOK = PositionBook()
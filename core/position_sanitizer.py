@@ -1,6 +1,9 @@
 # ============================================================
 # core/position_sanitizer.py — ExitManager ↔ PaperAccount sanitaras
 # Tikslas: išvalyti "dangling" pozicijas ir loginti neatitikimus
+# - LIVE režime biržos balansai (user data stream) tikrinami tik pozicijų
+#   knygos simboliams: fee BNB, dulkės ir rankiniai likučiai — ne boto
+#   pozicijos, jų su ExitManager nelyginam
 # ============================================================
 
 import time
@@ -8,6 +11,8 @@ import logging
 from typing import Dict, Any
 
 from notify.notifier import notify
+from core.position_book import BOOK
+from core.user_stream import get_account_state
 
 
 class PositionSanitizer:
@@ -20,6 +25,7 @@ class PositionSanitizer:
     def __init__(self, check_interval_sec: int = 15):
         self.interval = int(check_interval_sec)
         self._last_run = 0.0
+        self._warned_live = set()  # LIVE neatitikimai — perspėjama vieną kartą
 
     def maybe_run(self, exchange, exit_manager) -> None:
         now = time.time()
@@ -41,8 +47,12 @@ class PositionSanitizer:
         except Exception:
             pass
 
-        if not pa or not isinstance(pa, dict):
-            # jei nėra paper account (LIVE režimas) – nieko nedarom
+        if not pa:
+            # LIVE režimas — balansai iš user data stream (be REST užklausų)
+            self._check_live(get_account_state())
+            return
+
+        if not isinstance(pa, dict):
             return
 
         positions: Dict[str, Any] = pa.get("positions", {}) or {}
@@ -70,3 +80,23 @@ class PositionSanitizer:
                     notify(msg, level="warn")
                 except Exception:
                     pass
+
+    def _check_live(self, account) -> None:
+        """Knygos pozicijos, kurių biržoje nebėra (balansas 0) — perspėjimas."""
+        if not account or not isinstance(account, dict):
+            return
+        balances: Dict[str, Any] = account.get("positions", {}) or {}
+        missing = set()
+        for sym in BOOK.as_dict():
+            if not BOOK.has(sym):
+                continue
+            if float(balances.get(sym, {}).get("qty", 0.0)) <= 1e-12:
+                missing.add(sym)
+        for sym in missing - self._warned_live:
+            msg = f"⚠️ [Sanitizer] Knygoje yra {sym}, bet biržos balansas 0 — patikrink poziciją."
+            logging.warning(msg)
+            try:
+                notify(msg, level="warn")
+            except Exception:
+                pass
+        self._warned_live = missing
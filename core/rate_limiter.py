@@ -0,0 +1,210 @@
+# ============================================================
+# core/rate_limiter.py — Binance request weight biudžetas + token bucket
+# ------------------------------------------------------------
+# - Kiekvienas endpoint'as turi savo "kainą" (request weight)
+# - Token bucket: talpa = REQUEST_WEIGHT_1M * SAFETY, papildoma tolygiai per minutę
+# - Sinchronizuojama su X-MBX-USED-WEIGHT-1M antrašte (birža žino geriausiai)
+# - Prioritetai: pavedimai/EXIT'ai (CRITICAL) > kainos (HIGH) > klines (NORMAL)
+#   > analitika (LOW). Žemesni prioritetai negali išnaudoti rezervo ir
+#   praleidžia laukiančius aukštesnius.
+# - 429/418: laikomasi Retry-After (laukia visi — siųsti ban'o metu tik pailgina jį)
+# - --workers režime kibiro būsena bendra visiems procesams (share_state /
+#   attach_shared): limitas yra IP/paskyros, ne proceso
+# ============================================================
+
+import time
+import logging
+import threading
+import multiprocessing as mp
+from contextlib import contextmanager
+from typing import Any, Dict, Optional
+
+CRITICAL, HIGH, NORMAL, LOW = 0, 1, 2, 3
+PRIORITY_NAMES = {CRITICAL: "critical", HIGH: "high", NORMAL: "normal", LOW: "low"}
+
+REQUEST_WEIGHT_1M = 6000
+SAFETY = 0.8
+# Kokia talpos dalis paliekama aukštesniems prioritetams
+RESERVE = {CRITICAL: 0.0, HIGH: 0.05, NORMAL: 0.15, LOW: 0.35}
+MAX_WAIT_SEC = {CRITICAL: 5.0, HIGH: 5.0, NORMAL: 15.0, LOW: 30.0}
+
+BINANCE_HOSTS = ("api.binance.com", "testnet.binance.vision")
+
+# (weight, numatytas prioritetas)
+ENDPOINTS: Dict[str, Any] = {
+    "/api/v3/order": (1, CRITICAL),      # POST; GET (užklausa) — 4, žr. endpoint_cost
+    "/api/v3/ticker/bookTicker": (2, HIGH),
+    "/api/v3/ticker/price": (2, HIGH),
+    "/api/v3/depth": (5, HIGH),
+    "/api/v3/klines": (2, NORMAL),
+    "/api/v3/ticker/24hr": (80, LOW),
+    "/api/v3/exchangeInfo": (20, LOW),
+    "/api/v3/time": (1, LOW),
+    "/api/v3/userDataStream": (2, HIGH),
+    "/api/v3/account": (20, HIGH),
+}
+
+
+class RateLimitedError(Exception):
+    """Biudžetas neleido užklausos per MAX_WAIT_SEC (arba galioja ban'as)."""
+
+
+def endpoint_cost(path: str, params: Optional[Dict[str, Any]] = None, method: str = "GET"):
+    """Grąžina (weight, prioritetas) konkrečiai užklausai."""
+    weight, prio = ENDPOINTS.get(path, (1, NORMAL))
+    params = params or {}
+    if path == "/api/v3/order" and method.upper() == "GET":
+        weight = 4
+    elif path == "/api/v3/ticker/24hr" and params.get("symbol"):
+        weight = 2
+    elif path == "/api/v3/depth":
+        limit = int(params.get("limit", 100) or 100)
+        weight = 5 if limit <= 100 else 25 if limit <= 500 else 50 if limit <= 1000 else 250
+    return weight, prio
+
+
+class WeightBudget:
+    def __init__(self, limit_1m: int = REQUEST_WEIGHT_1M, safety: float = SAFETY):
+        self.capacity = float(limit_1m) * safety
+        self.refill_per_sec = self.capacity / 60.0
+        self.tokens = self.capacity
+        self.last_refill = time.monotonic()
+        self.banned_until = 0.0
+        self.used_weight_1m = 0
+        self.shared = None  # mp.Array [tokens, last_refill, banned_until, used_weight_1m]
+        self.cond = threading.Condition()
+        self.waiting = {p: 0 for p in PRIORITY_NAMES}
+        self.stats = {
+            "acquired": {p: 0 for p in PRIORITY_NAMES},
+            "weight": {p: 0 for p in PRIORITY_NAMES},
+            "waited_sec": {p: 0.0 for p in PRIORITY_NAMES},
+            "rejected": {p: 0 for p in PRIORITY_NAMES},
+            "http_429": 0,
+            "http_418": 0,
+        }
+
+    @contextmanager
+    def _state(self):
+        """Bendra (kelių procesų) kibiro būsena: nuskaito į laukus ir įrašo atgal."""
+        if self.shared is None:
+            yield
+            return
+        with self.shared.get_lock():
+            self.tokens, self.last_refill, self.banned_until, used = self.shared[:]
+            self.used_weight_1m = int(used)
+            try:
+                yield
+            finally:
+                self.shared[:] = [self.tokens, self.last_refill, self.banned_until, float(self.used_weight_1m)]
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.last_refill) * self.refill_per_sec)
+        self.last_refill = now
+
+    def _higher_waiting(self, prio: int) -> bool:
+        return any(self.waiting[p] for p in PRIORITY_NAMES if p < prio)
+
+    def acquire(self, weight: int, prio: int = NORMAL, max_wait: Optional[float] = None) -> float:
+        """Blokuoja, kol biudžetas leidžia. Grąžina laukimo laiką sekundėmis."""
+        max_wait = MAX_WAIT_SEC.get(prio, 10.0) if max_wait is None else max_wait
+        t0 = time.monotonic()
+        deadline = t0 + max_wait
+        reserve = self.capacity * RESERVE.get(prio, 0.0)
+        with self.cond:
+            self.waiting[prio] += 1
+            try:
+                while True:
+                    with self._state():
+                        self._refill()
+                        now = time.monotonic()
+                        banned = self.banned_until > now
+                        granted = not banned and not self._higher_waiting(prio) and self.tokens - weight >= reserve
+                        if granted:
+                            self.tokens -= weight
+                    if granted:
+                        waited = now - t0
+                        self.stats["acquired"][prio] += 1
+                        self.stats["weight"][prio] += weight
+                        self.stats["waited_sec"][prio] += waited
+                        return waited
+                    if now >= deadline:
+                        self.stats["rejected"][prio] += 1
+                        raise RateLimitedError(
+                            f"weight biudžetas: {PRIORITY_NAMES[prio]} w={weight} "
+                            f"negautas per {max_wait:.1f}s (tokens={self.tokens:.0f})"
+                        )
+                    if banned:
+                        wait = self.banned_until - now
+                    else:
+                        wait = max(0.01, (weight + reserve - self.tokens) / self.refill_per_sec)
+                    self.cond.wait(timeout=min(wait, deadline - now, 1.0))
+            finally:
+                self.waiting[prio] -= 1
+                self.cond.notify_all()
+
+    def observe(self, status_code: int, headers) -> None:
+        """Atnaujina biudžetą pagal biržos atsakymą."""
+        used = headers.get("X-MBX-USED-WEIGHT-1M") or headers.get("x-mbx-used-weight-1m")
+        with self.cond, self._state():
+            if used is not None:
+                try:
+                    self.used_weight_1m = int(used)
+                    self._refill()
+                    # Birža mato ir kitų klientų (to paties IP) svorį — pasitikim ja
+                    self.tokens = min(self.tokens, self.capacity - self.used_weight_1m)
+                except ValueError:
+                    pass
+            if status_code in (429, 418):
+                self.stats["http_429" if status_code == 429 else "http_418"] += 1
+                try:
+                    retry_after = float(headers.get("Retry-After", 60))
+                except (TypeError, ValueError):
+                    retry_after = 60.0
+                self.banned_until = max(self.banned_until, time.monotonic() + retry_after)
+                self.tokens = min(self.tokens, 0.0)
+                logging.warning(f"[RATE] ⛔ HTTP {status_code} — pauzė {retry_after:.0f}s (used={self.used_weight_1m})")
+            self.cond.notify_all()
+
+    def get_metrics(self) -> Dict[str, Any]:
+        with self.cond, self._state():
+            self._refill()
+            return {
+                "capacity": round(self.capacity, 1),
+                "tokens": round(self.tokens, 1),
+                "used_weight_1m": self.used_weight_1m,
+                "usage_pct": round(self.used_weight_1m / REQUEST_WEIGHT_1M * 100, 2),
+                "banned_for_sec": round(max(0.0, self.banned_until - time.monotonic()), 1),
+                "waiting": {PRIORITY_NAMES[p]: n for p, n in self.waiting.items()},
+                "acquired": {PRIORITY_NAMES[p]: n for p, n in self.stats["acquired"].items()},
+                "weight": {PRIORITY_NAMES[p]: n for p, n in self.stats["weight"].items()},
+                "waited_sec": {PRIORITY_NAMES[p]: round(v, 3) for p, v in self.stats["waited_sec"].items()},
+                "rejected": {PRIORITY_NAMES[p]: n for p, n in self.stats["rejected"].items()},
+                "http_429": self.stats["http_429"],
+                "http_418": self.stats["http_418"],
+            }
+
+
+BUDGET = WeightBudget()
+
+
+def share_state():
+    """
+    Sukuria bendrą kibiro būseną (supervizoriuje); workeriai ją gauna per
+    Process args ir prisijungia su attach_shared().
+    """
+    with BUDGET.cond:
+        return mp.Array("d", [BUDGET.capacity, time.monotonic(), 0.0, 0.0])
+
+
+def attach_shared(state) -> None:
+    """Šio proceso BUDGET naudoja bendrą būseną — visi workeriai dalija tą patį limitą."""
+    if state is None:
+        return
+    with BUDGET.cond:
+        BUDGET.shared = state
+    logging.info("[RATE] 🔗 weight biudžetas bendras su kitais workeriais")
+
+
+def get_metrics() -> Dict[str, Any]:
+    return BUDGET.get_metrics()
@@ -0,0 +1,110 @@
+# ============================================================
+# core/read_cache.py — skaitytojo (dashboard) užklausų rezultatų cache
+# ------------------------------------------------------------
+# - Raktas: (užklausos vardas, argumentai); prie rezultato saugoma DB
+#   versija — PRAGMA data_version, kuri pasikeičia tik kai KITA jungtis
+#   (boto rašytojas) commit'ina. Reikšmės palyginamos tik toje pačioje
+#   jungtyje, todėl versija tikrinama per vieną atskirą jungtį
+# - Per ttl rezultatas grąžinamas be jokios DB užklausos (keli naršyklės
+#   tab'ai su 1.5 s atnaujinimu); po ttl — jei data_version nepasikeitė,
+#   rezultatas pratęsiamas (vienas PRAGMA), kitaip perskaičiuojamas
+# - max_age riboja ne-DB duomenų (WS kainos) senumą
+# - Vienu metu tą patį raktą skaičiuoja tik vienas thread'as
+# - Jungtys query_only (storage_profile "dashboard") — skaitytojas WAL
+#   režime rašytojo neblokuoja
+# ============================================================
+
+import time
+import sqlite3
+import logging
+import threading
+from functools import wraps
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from core import storage_profile
+
+DEFAULT_TTL_SEC = 1.0
+DEFAULT_MAX_AGE_SEC = 30.0
+
+_lock = threading.Lock()
+_entries: Dict[Tuple, list] = {}        # raktas -> [rezultatas, versija, sukurta, patikrinta]
+_key_locks: Dict[Tuple, threading.Lock] = {}
+_version_lock = threading.Lock()
+_version_conn: Optional[sqlite3.Connection] = None
+_version_path = None
+_metrics = {"hits": 0, "revalidated": 0, "misses": 0}
+
+
+def data_version() -> int:
+    """DB versija (keičiasi po kitų jungčių commit'ų); -1, jei nepavyko."""
+    global _version_conn, _version_path
+    from core.db_manager import DB_PATH
+    with _version_lock:
+        try:
+            if _version_conn is None or _version_path != DB_PATH:
+                _version_conn = sqlite3.connect(DB_PATH, check_same_thread=False)
+                storage_profile.apply(_version_conn, "dashboard")
+                _version_path = DB_PATH
+            return int(_version_conn.execute("PRAGMA data_version").fetchone()[0])
+        except Exception as e:
+            logging.debug(f"[READ_CACHE] data_version klaida: {e}")
+            _version_conn = None
+            return -1
+
+
+def _key_lock(key: Tuple) -> threading.Lock:
+    with _lock:
+        lk = _key_locks.get(key)
+        if lk is None:
+            lk = _key_locks[key] = threading.Lock()
+        return lk
+
+
+def get(name: str, fn: Callable[..., Any], *args, ttl: float = DEFAULT_TTL_SEC,
+        max_age: float = DEFAULT_MAX_AGE_SEC) -> Any:
+    """fn(*args) rezultatas iš cache arba perskaičiuotas."""
+    key = (name,) + args
+    now = time.monotonic()
+    entry = _entries.get(key)
+    if entry and now - entry[3] < ttl:
+        _metrics["hits"] += 1
+        return entry[0]
+
+    with _key_lock(key):
+        entry = _entries.get(key)
+        now = time.monotonic()
+        if entry and now - entry[3] < ttl:  # kitas thread'as ką tik perskaičiavo
+            _metrics["hits"] += 1
+            return entry[0]
+        version = data_version()
+        if entry and version >= 0 and entry[1] == version and now - entry[2] < max_age:
+            entry[3] = now
+            _metrics["revalidated"] += 1
+            return entry[0]
+        value = fn(*args)
+        _entries[key] = [value, version, now, now]
+        _metrics["misses"] += 1
+        return value
+
+
+def cached(name: Optional[str] = None, ttl: float = DEFAULT_TTL_SEC, max_age: float = DEFAULT_MAX_AGE_SEC):
+    """Dekoratorius: @cached("summary") — rezultatas pagal argumentus ir data_version."""
+    def deco(fn):
+        qname = name or fn.__name__
+
+        @wraps(fn)
+        def wrapper(*args):
+            return get(qname, fn, *args, ttl=ttl, max_age=max_age)
+        return wrapper
+    return deco
+
+
+def invalidate(name: Optional[str] = None):
+    """Išmeta visus (arba vieno vardo) įrašus."""
+    with _lock:
+        for key in [k for k in _entries if name is None or k[0] == name]:
+            _entries.pop(key, None)
+
+
+def get_metrics() -> Dict[str, int]:
+    return dict(_metrics, entries=len(_entries))
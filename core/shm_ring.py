@@ -0,0 +1,135 @@
+# ============================================================
+# core/shm_ring.py — Bendros atminties (shared memory) žiedinė eilė
+# ------------------------------------------------------------
+# - Vienas rašytojas / vienas skaitytojas (SPSC) tarp procesų
+# - Fiksuoto dydžio slotai: [u32 ilgis][JSON baitai]
+# - Antraštė: head (skaitymo indeksas), tail (rašymo indeksas), slot_size, slots
+# - Rašytojas pirma įrašo slotą, tik tada publikuoja tail (skaitytojas
+#   niekada nemato pusiau įrašyto pranešimo)
+# - Eilės segmentą sukuria supervizorius, todėl jis išlieka perkraunant workerį
+# ============================================================
+
+import json
+import time
+import struct
+import logging
+from typing import Any, List, Optional
+from multiprocessing import shared_memory
+
+_HDR = struct.Struct("<QQII")   # head, tail, slot_size, slots
+_LEN = struct.Struct("<I")
+_HDR_SIZE = 64                  # antraštė atskirai nuo duomenų (cache line)
+
+
+class ShmRing:
+    """SPSC žiedinė eilė ant multiprocessing.shared_memory segmento."""
+
+    def __init__(self, shm: shared_memory.SharedMemory, owner: bool):
+        self._shm = shm
+        self._buf = shm.buf
+        self._owner = owner
+        _, _, self.slot_size, self.slots = _HDR.unpack_from(self._buf, 0)
+        self.name = shm.name
+        self.dropped = 0
+
+    # --------------------------------------------------------
+    @classmethod
+    def create(cls, name: str, slots: int = 64, slot_size: int = 65536) -> "ShmRing":
+        size = _HDR_SIZE + slots * slot_size
+        try:
+            old = shared_memory.SharedMemory(name=name)
+            old.close()
+            old.unlink()  # likutis po nekorektiško išjungimo
+        except FileNotFoundError:
+            pass
+        shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+        _HDR.pack_into(shm.buf, 0, 0, 0, int(slot_size), int(slots))
+        return cls(shm, owner=True)
+
+    @classmethod
+    def attach(cls, name: str) -> "ShmRing":
+        # Workeriai yra supervizoriaus vaikai ir dalijasi jo resource_tracker'iu,
+        # todėl segmentas nėra ištrinamas, kai workeris nulūžta.
+        shm = shared_memory.SharedMemory(name=name)
+        return cls(shm, owner=False)
+
+    # --------------------------------------------------------
+    def _head_tail(self):
+        head, tail, _, _ = _HDR.unpack_from(self._buf, 0)
+        return head, tail
+
+    def __len__(self) -> int:
+        head, tail = self._head_tail()
+        return tail - head
+
+    def put(self, obj: Any, timeout: float = 0.0) -> bool:
+        """Įdeda pranešimą. Pilnoje eilėje laukia iki timeout, po to grąžina False."""
+        data = json.dumps(obj, separators=(",", ":")).encode("utf-8")
+        if len(data) + _LEN.size > self.slot_size:
+            raise ValueError(f"[ShmRing] Pranešimas per didelis ({len(data)} B > {self.slot_size} B)")
+
+        deadline = time.time() + timeout
+        while True:
+            head, tail = self._head_tail()
+            if tail - head < self.slots:
+                break
+            if time.time() >= deadline:
+                self.dropped += 1
+                return False
+            time.sleep(0.001)
+
+        off = _HDR_SIZE + (tail % self.slots) * self.slot_size
+        _LEN.pack_into(self._buf, off, len(data))
+        self._buf[off + _LEN.size: off + _LEN.size + len(data)] = data
+        struct.pack_into("<Q", self._buf, 8, tail + 1)  # publikuojam
+        return True
+
+    def get(self, timeout: float = 0.0) -> Optional[Any]:
+        """Paima vieną pranešimą arba None, jei eilė tuščia per timeout."""
+        deadline = time.time() + timeout
+        while True:
+            head, tail = self._head_tail()
+            if tail > head:
+                break
+            if time.time() >= deadline:
+                return None
+            time.sleep(0.001)
+
+        off = _HDR_SIZE + (head % self.slots) * self.slot_size
+        (n,) = _LEN.unpack_from(self._buf, off)
+        raw = bytes(self._buf[off + _LEN.size: off + _LEN.size + n])
+        struct.pack_into("<Q", self._buf, 0, head + 1)
+        try:
+            return json.loads(raw)
+        except Exception as e:
+            logging.warning(f"[ShmRing] Sugadintas pranešimas {self.name}: {e}")
+            return None
+
+    def drain(self, max_items: int = 1024) -> List[Any]:
+        """Paima visus šiuo metu esančius pranešimus (be laukimo)."""
+        out = []
+        for _ in range(max_items):
+            item = self.get()
+            if item is None:
+                head, tail = self._head_tail()
+                if tail <= head:
+                    break
+                continue
+            out.append(item)
+        return out
+
+    # --------------------------------------------------------
+    def close(self):
+        try:
+            self._buf = None
+            self._shm.close()
+        except Exception:
+            pass
+
+    def unlink(self):
+        if not self._owner:
+            return
+        try:
+            self._shm.unlink()
+        except FileNotFoundError:
+            pass
@@ -0,0 +1,121 @@
+# ============================================================
+# core/state_snapshot.py — Greito perkrovimo (warm restart) būsenos failas
+# ------------------------------------------------------------
+# Formatas (little-endian):
+#   [4s magic "CBSN"][u16 versija][u32 meta ilgis][meta JSON]
+#   [float64 masyvai visų simbolių price_history iš eilės][u32 crc32]
+# meta: {"ts", "universe", "symbols": [[sym, n], ...], "extra"}
+#   universe — atkuriant perduodamas start_ws_auto(); prenumerata
+#   sudaroma iš jo (atskiro "subscribed" sąrašo nesaugom)
+#
+# - Rašoma atomiškai (tmp + os.replace) periodiškai ir tvarkingai išjungiant
+# - Skaitant tikrinama magic, versija, crc ir amžius; bet kokia klaida =>
+#   snapshot'as ignoruojamas (startuojam "šaltai")
+# ============================================================
+
+import os
+import json
+import time
+import zlib
+import struct
+import logging
+from array import array
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from core.db_manager import DATA_DIR
+
+SNAPSHOT_PATH = DATA_DIR / "state_snapshot.bin"
+SNAPSHOT_MAGIC = b"CBSN"
+SNAPSHOT_VERSION = 1
+SNAPSHOT_MAX_AGE_SEC = 6 * 3600
+
+_HEAD = struct.Struct("<4sHI")
+_CRC = struct.Struct("<I")
+
+
+def save_snapshot(price_history: Dict[str, List[float]],
+                  universe: List[str],
+                  extra: Optional[Dict[str, Any]] = None,
+                  path: Path = SNAPSHOT_PATH) -> int:
+    """Įrašo snapshot'ą. Grąžina failo dydį baitais."""
+    symbols = []
+    data = array("d")
+    for sym, hist in price_history.items():
+        if not hist:
+            continue
+        symbols.append([sym, len(hist)])
+        data.extend(hist)
+
+    meta = json.dumps({
+        "ts": time.time(),
+        "universe": list(universe or []),
+        "symbols": symbols,
+        "extra": extra or {},
+    }, separators=(",", ":")).encode("utf-8")
+
+    if data.itemsize != 8:
+        raise RuntimeError("array('d') nėra 8 baitų — snapshot formatas nepalaikomas")
+    payload = _HEAD.pack(SNAPSHOT_MAGIC, SNAPSHOT_VERSION, len(meta)) + meta + data.tobytes()
+    blob = payload + _CRC.pack(zlib.crc32(payload) & 0xFFFFFFFF)
+
+    tmp = path.with_suffix(".tmp")
+    with open(tmp, "wb") as f:
+        f.write(blob)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+    return len(blob)
+
+
+def load_snapshot(path: Path = SNAPSHOT_PATH, max_age_sec: float = SNAPSHOT_MAX_AGE_SEC) -> Optional[Dict[str, Any]]:
+    """
+    Nuskaito ir patikrina snapshot'ą.
+    Grąžina {"ts", "universe", "price_history", "extra"} arba None.
+    """
+    if not path.exists():
+        return None
+    t0 = time.perf_counter()
+    try:
+        blob = path.read_bytes()
+        if len(blob) < _HEAD.size + _CRC.size:
+            raise ValueError("per trumpas failas")
+        payload, (crc,) = blob[:-_CRC.size], _CRC.unpack(blob[-_CRC.size:])
+        if zlib.crc32(payload) & 0xFFFFFFFF != crc:
+            raise ValueError("crc nesutampa")
+        magic, version, meta_len = _HEAD.unpack_from(payload, 0)
+        if magic != SNAPSHOT_MAGIC:
+            raise ValueError("neteisingas magic")
+        if version != SNAPSHOT_VERSION:
+            raise ValueError(f"nepalaikoma versija {version}")
+
+        meta_end = _HEAD.size + meta_len
+        meta = json.loads(payload[_HEAD.size:meta_end])
+        age = time.time() - float(meta.get("ts", 0))
+        if age > max_age_sec:
+            logging.info(f"[SNAPSHOT] Snapshot'as per senas ({age/60:.0f} min) — ignoruojamas")
+            return None
+
+        data = array("d")
+        data.frombytes(payload[meta_end:])
+        price_history: Dict[str, List[float]] = {}
+        pos = 0
+        for sym, n in meta.get("symbols", []):
+            price_history[sym] = data[pos:pos + n].tolist()
+            pos += n
+        if pos != len(data):
+            raise ValueError("masyvų ilgiai nesutampa su meta")
+    except Exception as e:
+        logging.warning(f"[SNAPSHOT] Netinkamas snapshot'as ({path.name}): {e}")
+        return None
+
+    logging.info(
+        f"[SNAPSHOT] ♻️ Atkurta {len(price_history)} simbolių istorija "
+        f"per {(time.perf_counter() - t0) * 1000:.1f} ms (amžius {age:.0f}s)"
+    )
+    return {
+        "ts": float(meta["ts"]),
+        "universe": meta.get("universe", []),
+        "price_history": price_history,
+        "extra": meta.get("extra", {}),
+    }
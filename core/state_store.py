@@ -0,0 +1,229 @@
+# ============================================================
+# core/state_store.py — bendra raktas -> būsena saugykla (DB)
+# ------------------------------------------------------------
+# - Lentelė state_store (key, value BLOB, updated_ms); reikšmė — kompaktiškas
+#   JSON (be tarpų), didesnė nei COMPRESS_MIN_BYTES — dar ir zlib.
+#   Pirmas baitas žymi formatą: b"j" JSON, b"z" zlib(JSON)
+# - PersistentState: būsena atmintyje, užkraunama tingiai (pirmas get());
+#   pakeitimai tik pažymi dirty — įrašymas vyksta fone ("state-flush"
+#   thread'as kas STATE_FLUSH_SEC), todėl kviečiančiam kodui jokio DB
+#   laukimo. flush_all() — išjungiant (atexit) ir pagal poreikį
+# - Rašoma tiesiogiai (kaip risk_state), ne per write-behind eilę: tai ne
+#   prekybos įvykiai, į žurnalą (core/journal.py) jie nepatenka
+# ============================================================
+
+import json
+import zlib
+import atexit
+import logging
+import threading
+import time
+from typing import Any, Callable, Dict, Optional
+
+from core.config import CONFIG
+from core import storage_profile
+
+FLUSH_INTERVAL_SEC = 5.0
+COMPRESS_MIN_BYTES = 512
+
+_FMT_JSON = b"j"
+_FMT_ZLIB = b"z"
+
+
+# ============================================================
+# Serializacija
+# ============================================================
+
+def encode(value: Any) -> bytes:
+    raw = json.dumps(value, separators=(",", ":"), ensure_ascii=False, default=str).encode("utf-8")
+    if len(raw) >= COMPRESS_MIN_BYTES:
+        packed = zlib.compress(raw, 6)
+        if len(packed) < len(raw):
+            return _FMT_ZLIB + packed
+    return _FMT_JSON + raw
+
+
+def decode(blob: bytes) -> Any:
+    blob = bytes(blob)
+    fmt, body = blob[:1], blob[1:]
+    if fmt == _FMT_ZLIB:
+        body = zlib.decompress(body)
+    elif fmt != _FMT_JSON:
+        raise ValueError(f"nežinomas formatas {fmt!r}")
+    return json.loads(body.decode("utf-8"))
+
+
+# ============================================================
+# Tiesioginis skaitymas / rašymas
+# ============================================================
+
+def load(key: str, default: Any = None) -> Any:
+    from core import dao
+    row = dao.fetch_one("state_store.get", key)
+    if row is None:
+        return default
+    return decode(row[0])
+
+
+def save(key: str, value: Any) -> int:
+    """Įrašo reikšmę iškart. Grąžina įrašytų baitų skaičių."""
+    from core import dao
+    blob = encode(value)
+    dao.execute("state_store.set", key, blob, int(time.time() * 1000))
+    return len(blob)
+
+
+def delete(key: str):
+    from core import dao
+    dao.execute("state_store.delete", key)
+
+
+# ============================================================
+# Atidėtas (debounced) išsaugojimas
+# ============================================================
+
+class PersistentState:
+    """
+    Būsena atmintyje su atidėtu įrašymu į state_store.
+    Keitimai per set_value() / update() arba tiesiogiai get() dict'e + mark_dirty().
+    """
+
+    def __init__(self, key: str, default_factory: Callable[[], Any] = dict):
+        self.key = key
+        self._default_factory = default_factory
+        self._lock = threading.RLock()
+        self._value: Any = None
+        self._loaded = False
+        self._dirty = False
+        self._saved_at = 0.0
+        self.stats = {"loads": 0, "saves": 0, "bytes": 0, "errors": 0}
+        _register(self)
+
+    # --------------------------------------------------------
+    def _ensure_loaded(self):
+        if self._loaded:
+            return
+        with self._lock:
+            if self._loaded:
+                return
+            value = None
+            try:
+                value = load(self.key)
+                self.stats["loads"] += 1
+            except Exception as e:
+                self.stats["errors"] += 1
+                logging.warning(f"[STATE] ⚠️ {self.key} neužkrauta: {e}")
+            self._value = self._default_factory() if value is None else value
+            self._loaded = True
+
+    def get(self) -> Any:
+        self._ensure_loaded()
+        return self._value
+
+    def set_value(self, key: str, value: Any):
+        self._ensure_loaded()
+        with self._lock:
+            self._value[key] = value
+            self._dirty = True
+
+    def update(self, values: Dict[str, Any]):
+        self._ensure_loaded()
+        with self._lock:
+            self._value.update(values)
+            self._dirty = True
+
+    def replace(self, value: Any):
+        with self._lock:
+            self._value = value
+            self._loaded = True
+            self._dirty = True
+
+    def mark_dirty(self):
+        self._dirty = True
+
+    @property
+    def dirty(self) -> bool:
+        return self._dirty
+
+    # --------------------------------------------------------
+    def flush(self) -> bool:
+        """Įrašo, jei yra neįrašytų pakeitimų. Grąžina, ar buvo įrašyta."""
+        if not self._dirty or not self._loaded:
+            return False
+        with self._lock:
+            self._dirty = False
+            try:
+                blob = encode(self._value)
+            except Exception as e:
+                self._dirty = True  # pakeitimai neprarandami — bandysim kitą kartą
+                self.stats["errors"] += 1
+                logging.error(f"[STATE] ❌ {self.key} neserializuojama: {e}")
+                return False
+        try:
+            from core import dao
+            dao.execute("state_store.set", self.key, blob, int(time.time() * 1000))
+        except Exception as e:
+            self._dirty = True  # bandysim kitą kartą
+            self.stats["errors"] += 1
+            logging.warning(f"[STATE] ⚠️ {self.key} neįrašyta: {e}")
+            return False
+        self.stats["saves"] += 1
+        self.stats["bytes"] = len(blob)
+        self._saved_at = time.time()
+        return True
+
+    def reset(self):
+        """Atmintis išmetama — kitas get() perskaito iš DB."""
+        with self._lock:
+            self._value = None
+            self._loaded = False
+            self._dirty = False
+
+
+# ============================================================
+# Fono flush'eris
+# ============================================================
+
+_registry: Dict[str, PersistentState] = {}
+_registry_lock = threading.Lock()
+_flusher_started = False
+
+
+def _register(state: PersistentState):
+    with _registry_lock:
+        _registry[state.key] = state
+
+
+def flush_all() -> int:
+    """Visos neįrašytos būsenos -> DB. Grąžina įrašytų skaičių."""
+    if storage_profile.get_role() == "dashboard":  # query_only jungtys
+        return 0
+    with _registry_lock:
+        states = list(_registry.values())
+    return sum(1 for s in states if s.flush())
+
+
+def start_flusher(interval_sec: Optional[float] = None):
+    """Fone: flush_all() kas STATE_FLUSH_SEC; išjungiant — paskutinis flush."""
+    global _flusher_started
+    if _flusher_started:
+        return
+    _flusher_started = True
+    interval = float(interval_sec or CONFIG.get("STATE_FLUSH_SEC", FLUSH_INTERVAL_SEC))
+
+    def _loop():
+        while True:
+            time.sleep(interval)
+            try:
+                flush_all()
+            except Exception as e:
+                logging.warning(f"[STATE] Flush klaida: {e}")
+
+    threading.Thread(target=_loop, name="state-flush", daemon=True).start()
+    atexit.register(flush_all)
+    logging.info(f"[STATE] 🟢 Būsenos įrašomos kas {interval:.0f}s")
+
+
+def get_metrics() -> Dict[str, Dict[str, Any]]:
+    with _registry_lock:
+        return {k: dict(s.stats, dirty=s.dirty) for k, s in _registry.items()}
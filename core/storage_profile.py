@@ -0,0 +1,123 @@
+# ============================================================
+# core/storage_profile.py — SQLite pragmos pagal proceso rolę
+# ------------------------------------------------------------
+# Botas (rašo) ir dashboard'as (skaito) dalijasi data/core.db, todėl:
+# - journal_mode=WAL — skaitytojai neblokuoja rašytojo ir atvirkščiai
+#   (WAL režimas išlieka faile; nustatomas rašančioje rolėje)
+# - synchronous=NORMAL — WAL režime saugu (commit'as neprarandamas
+#   crash'o atveju, gali būti prarastas tik paskutinis commit'as dingus
+#   elektrai), daug mažiau fsync
+# - busy_timeout — vietoje iškart "database is locked" laukiama
+# - cache_size / mmap_size / temp_store — mažiau I/O skaitant
+# WAL checkpoint politika (tik "bot" rolė):
+# - wal_autocheckpoint=1000 puslapių (~4 MB) — PASSIVE commit'o metu
+# - start_wal_checkpointer(): fone kas CHECKPOINT_INTERVAL_SEC PASSIVE;
+#   jei WAL failas > WAL_TRUNCATE_BYTES — TRUNCATE (failas sumažinamas);
+#   proceso pabaigoje — TRUNCATE
+# - dashboard rolė checkpoint'ų nedaro (wal_autocheckpoint=0), jungtys query_only
+# ============================================================
+
+import os
+import time
+import atexit
+import logging
+import threading
+from typing import Dict, List, Optional
+
+COMMON = {
+    "busy_timeout": 5000,
+    "temp_store": "MEMORY",
+    "cache_size": -16000,        # ~16 MB
+    "mmap_size": 268435456,      # 256 MB
+}
+
+PROFILES: Dict[str, Dict[str, object]] = {
+    # Pagrindinis rašytojas (main_loop, execution worker)
+    "bot": dict(COMMON, journal_mode="WAL", synchronous="NORMAL",
+                wal_autocheckpoint=1000, journal_size_limit=67108864),
+    # Dashboard'as: tik skaito (query_only — atsitiktinis rašymas neužima
+    # rašymo užrakto), trumpesnis laukimas, mažesnis cache
+    "dashboard": dict(COMMON, synchronous="NORMAL", busy_timeout=2000,
+                      cache_size=-8000, wal_autocheckpoint=0, query_only="ON"),
+    # Kiti procesai (strategy/ingest worker'iai, CLI) — numatytosios
+    "default": dict(COMMON, synchronous="NORMAL"),
+}
+
+CHECKPOINT_INTERVAL_SEC = 60
+WAL_TRUNCATE_BYTES = 64 * 1024 * 1024
+
+_role = os.environ.get("CRYPTO_DB_ROLE", "default")
+
+
+def set_role(role: str):
+    """Nustato šio proceso rolę (kviečiama prieš pirmą get_conn())."""
+    global _role
+    if role not in PROFILES:
+        raise ValueError(f"Nežinoma DB rolė: {role}")
+    _role = role
+
+
+def get_role() -> str:
+    return _role
+
+
+def pragma_statements(role: Optional[str] = None) -> List[str]:
+    """PRAGMA sakiniai rolei (journal_mode — pirmas, kad kiti galiotų WAL)."""
+    prof = PROFILES.get(role or _role, PROFILES["default"])
+    keys = sorted(prof, key=lambda k: (k != "journal_mode", k))
+    return [f"PRAGMA {k}={prof[k]}" for k in keys]
+
+
+def apply(conn, role: Optional[str] = None):
+    for stmt in pragma_statements(role):
+        try:
+            conn.execute(stmt).fetchall()
+        except Exception as e:
+            # pvz. journal_mode=WAL, kai kitas procesas laiko rašymo užraktą
+            logging.warning(f"[DB] ⚠️ {stmt} nepavyko: {e}")
+
+
+# ------------------------------------------------------------
+# WAL checkpoint'ai (tik rašančiai rolei)
+# ------------------------------------------------------------
+def checkpoint(conn, db_path, mode: Optional[str] = None) -> Dict[str, int]:
+    """PASSIVE checkpoint; TRUNCATE — jei WAL failas išaugo per daug."""
+    wal = f"{db_path}-wal"
+    size = os.path.getsize(wal) if os.path.exists(wal) else 0
+    mode = mode or ("TRUNCATE" if size > WAL_TRUNCATE_BYTES else "PASSIVE")
+    busy, log_pages, done = conn.execute(f"PRAGMA wal_checkpoint({mode})").fetchone()
+    return {"mode": mode, "wal_bytes": size, "busy": busy, "log_pages": log_pages, "checkpointed": done}
+
+
+_checkpointer_started = False
+
+
+def _final_checkpoint():
+    try:
+        from core.db_manager import get_conn, DB_PATH
+        res = checkpoint(get_conn(), DB_PATH, "TRUNCATE")
+        logging.info(f"[DB] 🧹 WAL checkpoint (pabaiga) {res}")
+    except Exception as e:
+        logging.debug(f"[DB] WAL checkpoint pabaigoje nepavyko: {e}")
+
+
+def start_wal_checkpointer(interval_sec: float = CHECKPOINT_INTERVAL_SEC):
+    """Fone daro checkpoint'us; kviečia tik rašantis procesas (rolė "bot")."""
+    global _checkpointer_started
+    if _checkpointer_started:
+        return
+    _checkpointer_started = True
+    atexit.register(_final_checkpoint)
+
+    def _loop():
+        from core.db_manager import get_conn, DB_PATH
+        while True:
+            time.sleep(interval_sec)
+            try:
+                res = checkpoint(get_conn(), DB_PATH)
+                if res["mode"] == "TRUNCATE" or res["busy"]:
+                    logging.info(f"[DB] 🧹 WAL checkpoint {res}")
+            except Exception as e:
+                logging.debug(f"[DB] WAL checkpoint klaida: {e}")
+
+    threading.Thread(target=_loop, name="wal-checkpoint", daemon=True).start()
@@ -0,0 +1,47 @@
+# ============================================================
+# core/timeutil.py — laikas kaip epoch milisekundės (int)
+# ------------------------------------------------------------
+# DB laiko stulpeliai *_ms (ts_ms, opened_at_ms, closed_at_ms) saugo UTC
+# epoch ms. Palyginimai ir intervalai skaičiuojami sveikais skaičiais;
+# į ISO tekstą verčiama tik API / dashboard'o riboje (ms_to_iso).
+# ============================================================
+
+import time
+from datetime import datetime, timezone
+
+DAY_MS = 86_400_000
+
+# SQLite išraiška ISO tekstui -> epoch ms (migracijai ir trigger'iams)
+SQL_ISO_TO_MS = "CAST(ROUND((julianday({col}) - 2440587.5) * 86400000) AS INTEGER)"
+
+
+def now_ms() -> int:
+    return int(time.time() * 1000)
+
+
+def iso_to_ms(value) -> int:
+    """ISO tekstas (su zona arba be jos — laikoma UTC) -> epoch ms; 0, jei neparsinasi."""
+    try:
+        dt = datetime.fromisoformat(str(value).replace("Z", "+00:00"))
+    except Exception:
+        return 0
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return int(dt.timestamp() * 1000)
+
+
+def ms_to_iso(ms) -> str:
+    return datetime.fromtimestamp(int(ms) / 1000, tz=timezone.utc).isoformat()
+
+
+def utc_day_start_ms(ms: int = None) -> int:
+    """UTC paros pradžia (epoch ms) duotam momentui (numatyta — dabar)."""
+    ms = now_ms() if ms is None else int(ms)
+    return ms - ms % DAY_MS
+
+
+def local_day_start_ms(ms: int = None) -> int:
+    """Vietinės (serverio laiko juostos) paros pradžia epoch ms — dienos rizikos riba."""
+    ms = now_ms() if ms is None else int(ms)
+    midnight = datetime.fromtimestamp(ms / 1000).replace(hour=0, minute=0, second=0, microsecond=0)
+    return int(midnight.timestamp() * 1000)
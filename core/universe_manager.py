@@ -1,14 +1,13 @@
 import time
 import math
-import requests
 from typing import List, Dict, Tuple
 from core.config import CONFIG
+from core import http_client
 
 BINANCE_REST_MAIN = "https://api.binance.com"
-TIMEOUT = 5
 
 def _fetch_24h() -> list:
-    r = requests.get(f"{BINANCE_REST_MAIN}/api/v3/ticker/24hr", timeout=TIMEOUT)
+    r = http_client.get(f"{BINANCE_REST_MAIN}/api/v3/ticker/24hr")
     r.raise_for_status()
     return r.json()
 
@@ -0,0 +1,356 @@
+# ============================================================
+# core/user_stream.py — Binance User Data Stream (LIVE režimui)
+# ------------------------------------------------------------
+# - listenKey: sukūrimas (POST), keepalive kas 30 min (PUT), naujas raktas
+#   gavus listenKeyExpired arba nutrūkus jungčiai
+# - Įvykiai taikomi atmintyje esančiai ACCOUNT būsenai:
+#     executionReport         -> pavedimų / fill'ų būsena
+#     outboundAccountPosition -> balansai (free / locked)
+#     balanceUpdate           -> indėliai / išėmimai
+# - Balansų "seed" — pasirašytas GET /api/v3/account kiekvieno WS
+#   (pa)prisijungimo metu (įvykiai per pertrauką prarandami); tarp
+#   prisijungimų — tik WS įvykiai (jokio REST polling'o)
+# - get_account_state() grąžina tokios pat formos dict kaip
+#   paper_account.get_state() — naudoja PositionSanitizer ir equity_tracker
+# - rest_base / ws_base konfigūruojami: testuojama su bench/fake_user_stream.py
+# ============================================================
+
+import json
+import time
+import logging
+import threading
+from collections import deque
+from typing import Any, Callable, Dict, Optional
+
+try:
+    import websocket  # websocket-client
+except Exception:
+    websocket = None
+
+from core.config import CONFIG
+from core import http_client
+from core.binance_auth import sign
+
+REST_MAIN = "https://api.binance.com"
+REST_TEST = "https://testnet.binance.vision"
+WS_MAIN = "wss://stream.binance.com:9443/ws"
+WS_TEST = "wss://testnet.binance.vision/ws"
+
+KEEPALIVE_SEC = 30 * 60
+RECONNECT_MAX_SEC = 60
+DUST_USDC = 1.0          # mažesnės vertės likučiai nelaikomi pozicijomis
+MAX_ORDERS_KEPT = 500
+
+
+# ============================================================
+# Sąskaitos būsena atmintyje
+# ============================================================
+
+class AccountState:
+    def __init__(self):
+        self.cond = threading.Condition()
+        self.balances: Dict[str, Dict[str, float]] = {}   # {"BTC": {"free", "locked", "u"}}
+        self.orders: Dict[int, Dict[str, Any]] = {}        # orderId -> paskutinė būsena
+        self.fills = deque(maxlen=MAX_ORDERS_KEPT)
+        self.ready = False                                 # ar jau turim pradinius balansus
+        self.last_event_ts = 0.0
+        self.events = 0
+
+    # --------------------------------------------------------
+    def seed_balances(self, account: Dict[str, Any]):
+        """GET /api/v3/account atsakymas -> pradiniai balansai."""
+        u = int(account.get("updateTime", 0) or 0)
+        with self.cond:
+            for b in account.get("balances", []) or []:
+                free, locked = float(b.get("free", 0) or 0), float(b.get("locked", 0) or 0)
+                if free or locked:
+                    self.balances[b["asset"]] = {"free": free, "locked": locked, "u": u}
+            self.ready = True
+            self.cond.notify_all()
+
+    def apply_event(self, evt: Dict[str, Any]):
+        # WS API prenumerata ({"event": ...}) ir combined stream ({"data": ...}) formos
+        if "event" in evt and isinstance(evt["event"], dict):
+            evt = evt["event"]
+        elif "data" in evt and isinstance(evt["data"], dict):
+            evt = evt["data"]
+        et = evt.get("e")
+        with self.cond:
+            self.events += 1
+            self.last_event_ts = time.time()
+            if et == "executionReport":
+                self._on_execution(evt)
+            elif et == "outboundAccountPosition":
+                self._on_account_position(evt)
+            elif et == "balanceUpdate":
+                b = self.balances.setdefault(evt.get("a", ""), {"free": 0.0, "locked": 0.0, "u": 0})
+                b["free"] += float(evt.get("d", 0) or 0)
+            self.cond.notify_all()
+        return et
+
+    def _on_account_position(self, evt: Dict[str, Any]):
+        u = int(evt.get("u", 0) or 0)
+        for b in evt.get("B", []) or []:
+            cur = self.balances.get(b.get("a", ""))
+            if cur is not None and cur.get("u", 0) > u:
+                continue  # senesnis įvykis nei jau turima būsena
+            self.balances[b["a"]] = {"free": float(b.get("f", 0) or 0), "locked": float(b.get("l", 0) or 0), "u": u}
+
+    def _on_execution(self, evt: Dict[str, Any]):
+        oid = int(evt.get("i", 0) or 0)
+        cum_qty = float(evt.get("z", 0) or 0)
+        cum_quote = float(evt.get("Z", 0) or 0)
+        self.orders[oid] = {
+            "order_id": oid,
+            "client_order_id": evt.get("c", ""),
+            "symbol": evt.get("s", ""),
+            "side": evt.get("S", ""),
+            "type": evt.get("o", ""),
+            "status": evt.get("X", ""),
+            "cum_qty": cum_qty,
+            "cum_quote": cum_quote,
+            "avg_price": cum_quote / cum_qty if cum_qty > 0 else 0.0,
+            "ts": int(evt.get("T", evt.get("E", 0)) or 0),
+        }
+        if evt.get("x") == "TRADE":
+            self.fills.append({
+                "order_id": oid,
+                "symbol": evt.get("s", ""),
+                "side": evt.get("S", ""),
+                "qty": float(evt.get("l", 0) or 0),
+                "price": float(evt.get("L", 0) or 0),
+                "commission": float(evt.get("n", 0) or 0),
+                "commission_asset": evt.get("N"),
+                "ts": int(evt.get("T", 0) or 0),
+            })
+        if len(self.orders) > MAX_ORDERS_KEPT:
+            for k in sorted(self.orders, key=lambda k: self.orders[k]["ts"])[:len(self.orders) - MAX_ORDERS_KEPT]:
+                self.orders.pop(k, None)
+
+    # --------------------------------------------------------
+    def get_order(self, order_id: int) -> Optional[Dict[str, Any]]:
+        with self.cond:
+            o = self.orders.get(int(order_id))
+            return dict(o) if o else None
+
+    def wait_order_filled(self, order_id: int, timeout: float = 1.0) -> Optional[Dict[str, Any]]:
+        """Laukia FILLED executionReport (pvz. kai REST atsakyme nėra fills)."""
+        deadline = time.time() + timeout
+        with self.cond:
+            while True:
+                o = self.orders.get(int(order_id))
+                if o and o["status"] in ("FILLED", "CANCELED", "EXPIRED", "REJECTED"):
+                    return dict(o)
+                left = deadline - time.time()
+                if left <= 0:
+                    return dict(o) if o else None
+                self.cond.wait(left)
+
+    def to_state(self, price_fn: Callable[[str], Optional[float]], base_quote: str = "USDC") -> Dict[str, Any]:
+        """Būsena paper_account.get_state() formatu (vertinama pagal price_fn)."""
+        with self.cond:
+            balances = {a: dict(b) for a, b in self.balances.items()}
+        quote = balances.get(base_quote, {"free": 0.0, "locked": 0.0})
+        free_usdc = quote["free"]
+        used_usdc = quote["locked"]
+        positions = {}
+        for asset, b in balances.items():
+            if asset == base_quote:
+                continue
+            qty = b["free"] + b["locked"]
+            if qty <= 0:
+                continue
+            sym = f"{asset}{base_quote}"
+            px = price_fn(sym) or 0.0
+            if px and qty * px < DUST_USDC:
+                continue
+            # Be kainos pozicija paliekama (sanitizer neturi jos "išvalyti")
+            positions[sym] = {"qty": qty, "price": px}
+            used_usdc += qty * px
+        equity = free_usdc + used_usdc
+        return {
+            "balance_usdc": equity,
+            "equity": equity,
+            "free_usdc": free_usdc,
+            "used_usdc": used_usdc,
+            "positions": positions,
+            "open_positions": len(positions),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S+00:00", time.gmtime()),
+            "source": "user_stream",
+        }
+
+
+ACCOUNT = AccountState()
+
+
+# ============================================================
+# listenKey + WS klientas
+# ============================================================
+
+def _signed(params: Dict[str, Any], secret: str) -> Dict[str, Any]:
+    return sign(dict(params, timestamp=int(time.time() * 1000)), secret)
+
+
+class UserDataStream:
+    def __init__(self, api_key: str, api_secret: str = "", rest_base: str = REST_MAIN,
+                 ws_base: str = WS_MAIN, account: AccountState = ACCOUNT,
+                 keepalive_sec: float = KEEPALIVE_SEC):
+        self.api_key = api_key
+        self.api_secret = api_secret
+        self.rest_base = rest_base.rstrip("/")
+        self.ws_base = ws_base.rstrip("/")
+        self.account = account
+        self.keepalive_sec = keepalive_sec
+        self.listen_key: Optional[str] = None
+        self.connected = False
+        self.stop_flag = threading.Event()
+        self.app = None
+        self.renewals = 0
+        self._thread: Optional[threading.Thread] = None
+
+    # --------------------------------------------------------
+    # REST: listenKey ir pradinis balansas
+    # --------------------------------------------------------
+    def _headers(self):
+        return {"X-MBX-APIKEY": self.api_key}
+
+    def _create_listen_key(self) -> str:
+        r = http_client.post(f"{self.rest_base}/api/v3/userDataStream", headers=self._headers())
+        r.raise_for_status()
+        return r.json()["listenKey"]
+
+    def _keepalive(self) -> bool:
+        try:
+            r = http_client.request("PUT", f"{self.rest_base}/api/v3/userDataStream",
+                                    params={"listenKey": self.listen_key}, headers=self._headers())
+            return r.status_code == 200
+        except Exception as e:
+            logging.warning(f"[USTREAM] keepalive klaida: {e}")
+            return False
+
+    def _seed_account(self):
+        if not self.api_secret:
+            return
+        try:
+            r = http_client.get(f"{self.rest_base}/api/v3/account",
+                                params=_signed({"omitZeroBalances": "true"}, self.api_secret),
+                                headers=self._headers())
+            r.raise_for_status()
+            self.account.seed_balances(r.json())
+            logging.info(f"[USTREAM] 💰 Pradiniai balansai: {len(self.account.balances)} aktyvų")
+        except Exception as e:
+            logging.warning(f"[USTREAM] Nepavyko gauti pradinių balansų: {e}")
+
+    # --------------------------------------------------------
+    # WS
+    # --------------------------------------------------------
+    def _on_message(self, ws, message: str):
+        try:
+            evt = json.loads(message)
+        except Exception:
+            return
+        et = self.account.apply_event(evt)
+        if et == "listenKeyExpired":
+            logging.warning("[USTREAM] listenKey nebegalioja — jungiamasi iš naujo")
+            self.listen_key = None
+            ws.close()
+
+    def _on_open(self, ws):
+        self.connected = True
+        logging.info("[USTREAM] ✅ Prisijungta prie user data stream")
+        # Kiekvieno (pa)prisijungimo metu: įvykiai, praleisti per pertrauką,
+        # nebeateis — balansai perskaitomi iš REST. Jungtis jau atidaryta, o
+        # pranešimai apdorojami tik po šio callback'o, todėl nieko neprarandam
+        self._seed_account()
+
+    def _on_close(self, ws, code=None, reason=None):
+        self.connected = False
+
+    def _keepalive_loop(self, key: str):
+        while not self.stop_flag.wait(self.keepalive_sec):
+            if self.listen_key != key:
+                return
+            if not self._keepalive():
+                # Raktas nebegalioja — uždarom, _run sukurs naują
+                self.listen_key = None
+                if self.app is not None:
+                    self.app.close()
+                return
+
+    def _run(self):
+        backoff = 1
+        while not self.stop_flag.is_set():
+            try:
+                if websocket is None:
+                    logging.error("[USTREAM] 'websocket-client' biblioteka neįdiegta.")
+                    return
+                self.listen_key = self._create_listen_key()
+                key = self.listen_key
+                threading.Thread(target=self._keepalive_loop, args=(key,), daemon=True).start()
+                self.app = websocket.WebSocketApp(
+                    f"{self.ws_base}/{key}",
+                    on_open=self._on_open,
+                    on_message=self._on_message,
+                    on_close=self._on_close,
+                )
+                t0 = time.time()
+                self.app.run_forever(ping_interval=60, ping_timeout=10)
+                if time.time() - t0 > 60:
+                    backoff = 1
+                self.renewals += 1
+            except Exception as e:
+                logging.warning(f"[USTREAM] Klaida: {e}")
+            finally:
+                self.connected = False
+                self.app = None
+            if not self.stop_flag.is_set():
+                self.stop_flag.wait(backoff)
+                backoff = min(RECONNECT_MAX_SEC, backoff * 2)
+
+    def start(self) -> "UserDataStream":
+        self._thread = threading.Thread(target=self._run, name="user-stream", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.stop_flag.set()
+        if self.app is not None:
+            try:
+                self.app.close()
+            except Exception:
+                pass
+        if self.listen_key:
+            try:
+                http_client.request("DELETE", f"{self.rest_base}/api/v3/userDataStream",
+                                    params={"listenKey": self.listen_key}, headers=self._headers(), retries=0)
+            except Exception:
+                pass
+
+
+# ------------------------------------------------------------
+# Globalus srautas
+# ------------------------------------------------------------
+STREAM: Optional[UserDataStream] = None
+
+
+def start_user_stream(api_key: str, api_secret: str, testnet: bool = False) -> Optional[UserDataStream]:
+    global STREAM
+    if STREAM is not None:
+        return STREAM
+    if not api_key:
+        logging.warning("[USTREAM] Nėra API_KEY — user data stream nepaleidžiamas")
+        return None
+    STREAM = UserDataStream(
+        api_key, api_secret,
+        rest_base=REST_TEST if testnet else REST_MAIN,
+        ws_base=WS_TEST if testnet else WS_MAIN,
+    ).start()
+    return STREAM
+
+
+def get_account_state() -> Optional[Dict[str, Any]]:
+    """LIVE sąskaitos būsena iš srauto; None — jei srautas nepaleistas ar dar be duomenų."""
+    if STREAM is None or not ACCOUNT.ready:
+        return None
+    from core import ws_bridge
+    return ACCOUNT.to_state(ws_bridge.get_price, (CONFIG.get("BASE_QUOTE", "USDC") or "USDC").upper())
@@ -0,0 +1,206 @@
+# ============================================================
+# core/warmup.py — Lygiagretus UNIVERSE "warmup" po paleidimo
+# ------------------------------------------------------------
+# - AI_SETTINGS.AUTO_WARMUP: ar vykdyti warmup
+# - AI_SETTINGS.WARMUP_MIN_READY_RATIO: kokia dalis simbolių turi būti
+#   paruošta (>= EMA_SLOW taškų), kad būtų leidžiama prekiauti
+# - AI_SETTINGS.WARMUP_FORCE_SYMBOL: simbolis, kuris visada įtraukiamas
+#   (ir turi būti paruoštas, kad prekyba prasidėtų)
+# - Istorija imama iš 1m klines (uždarymo kainos) ir įrašoma į price_history,
+#   todėl trend filtras neturi laukti 50 ciklo iteracijų.
+# - price_history — vienalytė 1m serija: gyvos kainos (kas ~2 s) sutraukiamos
+#   į minutės barus (add_prices: ta pati minutė perrašo paskutinį tašką),
+#   o klines dedamos pagal atidarymo minutę. Taip EMA / trend filtras
+#   nemaišo 2 s tick'ų su 1m žvakėmis
+# ============================================================
+
+import time
+import logging
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from core.config import get_snapshot
+
+WARMUP_MAX_WORKERS = 8
+WARMUP_INTERVAL = "1m"
+WARMUP_RETRY_SEC = 60
+BAR_SEC = 60  # = WARMUP_INTERVAL
+
+
+def _minute(ts: float) -> int:
+    return int(ts // BAR_SEC)
+
+
+class UniverseWarmup:
+    """Sėja price_history iš klines ir seka, ar pasiektas paruoštumo slenkstis."""
+
+    def __init__(self, exchange, price_history: Dict[str, List[float]]):
+        self.exchange = exchange
+        self.price_history = price_history
+        # Paskutinio baro minutė simboliui; atkurtos istorijos paskutinis baras —
+        # snapshot'o momento minutė (nustatoma backfill'e)
+        self.bar_minute: Dict[str, int] = {}
+        self.ready = False
+        self._last_attempt = 0.0
+        self._started_at = time.time()
+
+    # --------------------------------------------------------
+    def _min_points(self) -> int:
+        return max(1, get_snapshot().tf_ema_slow)
+
+    def _symbols(self, symbols: Iterable[str]) -> List[str]:
+        cfg = get_snapshot()
+        out = [s.upper() for s in symbols if s and s.upper().endswith(cfg.base_quote)]
+        force = cfg.warmup_force_symbol
+        if force and force not in out:
+            out.insert(0, force)
+        return out
+
+    def _fetch(self, symbol: str, limit: int) -> List[Tuple[int, float]]:
+        """(atidarymo minutė, close) — paskutinė žvakė gali būti dar nebaigta."""
+        klines = self.exchange.get_klines(symbol, interval=WARMUP_INTERVAL, limit=limit) or []
+        return [(_minute(k["timestamp"] / 1000.0), float(k["close"])) for k in klines if k.get("close")]
+
+    def add_prices(self, prices: Dict, window: int, ts: Optional[float] = None):
+        """Gyvos kainos -> 1m barai (ta pati minutė perrašo paskutinį tašką)."""
+        minute = _minute(time.time() if ts is None else ts)
+        for sym, pi in prices.items():
+            p = pi.get("price") if isinstance(pi, dict) else pi
+            try:
+                p = float(p)
+            except Exception:
+                p = None
+            if not p:
+                continue
+            arr = self.price_history.setdefault(sym, [])
+            if arr and self.bar_minute.get(sym) == minute:
+                arr[-1] = p
+            else:
+                arr.append(p)
+                self.bar_minute[sym] = minute
+                if len(arr) > window:
+                    del arr[:len(arr) - window]
+
+    def readiness(self, symbols: Iterable[str]):
+        """Grąžina (paruoštų kiekis, viso, santykis)."""
+        syms = self._symbols(symbols)
+        need = self._min_points()
+        ready = sum(1 for s in syms if len(self.price_history.get(s, [])) >= need)
+        total = len(syms)
+        return ready, total, (ready / total if total else 0.0)
+
+    # --------------------------------------------------------
+    def run(self, symbols: Iterable[str]) -> bool:
+        """Lygiagrečiai parsiunčia istoriją trūkstamiems simboliams."""
+        cfg = get_snapshot()
+        syms = self._symbols(symbols)
+        need = self._min_points()
+        limit = max(need, min(cfg.history_window, 1000))
+        todo = [s for s in syms if len(self.price_history.get(s, [])) < need]
+        self._last_attempt = time.time()
+        if not todo:
+            return self._evaluate(syms)
+
+        t0 = time.time()
+        logging.info(f"[WARMUP] 🔥 Kraunama istorija {len(todo)}/{len(syms)} simbolių (limit={limit})...")
+        done = 0
+        with ThreadPoolExecutor(max_workers=min(WARMUP_MAX_WORKERS, len(todo))) as pool:
+            futures = {pool.submit(self._fetch, s, limit): s for s in todo}
+            for fut in as_completed(futures):
+                sym = futures[fut]
+                done += 1
+                try:
+                    closes = fut.result()
+                except Exception as e:
+                    logging.debug(f"[WARMUP] {sym} klaida: {e}")
+                    closes = []
+                if closes:
+                    # Klines baigiasi einamąja minute — jos pakeičia per tą
+                    # laiką surinktus gyvų kainų barus
+                    self.price_history[sym] = [c for _, c in closes][-cfg.history_window:]
+                    self.bar_minute[sym] = closes[-1][0]
+                if done % 10 == 0 or done == len(todo):
+                    r, n, ratio = self.readiness(syms)
+                    logging.info(f"[WARMUP] ⏳ {done}/{len(todo)} | paruošta {r}/{n} ({ratio:.0%})")
+
+        logging.info(f"[WARMUP] ⏱️ Istorija užkrauta per {time.time() - t0:.2f}s")
+        return self._evaluate(syms)
+
+    def backfill(self, symbols: Iterable[str], since_ts: float) -> int:
+        """
+        Po warm-restart: parsiunčia tik tarpą nuo snapshot'o laiko (1m klines)
+        ir prijungia jį prie atkurtos istorijos. Snapshot'o minutės baras buvo
+        nebaigtas — jį pakeičia tos minutės žvakė. Grąžina papildytų simbolių kiekį.
+        """
+        since_min = _minute(since_ts)
+        for sym, hist in self.price_history.items():
+            if hist:
+                self.bar_minute.setdefault(sym, since_min)
+        cfg = get_snapshot()
+        gap_min = _minute(time.time()) - since_min + 1  # su snapshot'o minute
+        if gap_min <= 1:
+            return 0
+        limit = min(gap_min, cfg.history_window)
+        syms = [s for s in self._symbols(symbols) if self.price_history.get(s)]
+        if not syms:
+            return 0
+
+        t0 = time.time()
+        filled = 0
+        with ThreadPoolExecutor(max_workers=min(WARMUP_MAX_WORKERS, len(syms))) as pool:
+            futures = {pool.submit(self._fetch, s, limit): s for s in syms}
+            for fut in as_completed(futures):
+                sym = futures[fut]
+                try:
+                    closes = fut.result()
+                except Exception:
+                    closes = []
+                hist = self.price_history.get(sym, [])
+                gap = [(m, c) for m, c in closes if m >= since_min]
+                if gap:
+                    if gap[0][0] == since_min:
+                        hist = hist[:-1]
+                    hist = hist + [c for _, c in gap]
+                    self.price_history[sym] = hist[-cfg.history_window:]
+                    self.bar_minute[sym] = gap[-1][0]
+                    filled += 1
+        logging.info(f"[WARMUP] 🩹 Tarpo backfill ({gap_min - 1} min): {filled}/{len(syms)} simbolių per {time.time() - t0:.2f}s")
+        return filled
+
+    def _evaluate(self, syms: List[str]) -> bool:
+        cfg = get_snapshot()
+        r, n, ratio = self.readiness(syms)
+        force = cfg.warmup_force_symbol
+        force_ok = not force or len(self.price_history.get(force, [])) >= self._min_points()
+        was_ready = self.ready
+        self.ready = n > 0 and ratio >= cfg.warmup_min_ready_ratio and force_ok
+        if self.ready and not was_ready:
+            logging.info(
+                f"[WARMUP] ✅ Prekyba leidžiama: paruošta {r}/{n} ({ratio:.0%} >= "
+                f"{cfg.warmup_min_ready_ratio:.0%}) po {time.time() - self._started_at:.1f}s nuo starto"
+            )
+        elif not self.ready:
+            logging.info(
+                f"[WARMUP] ⛔ Prekyba stabdoma: paruošta {r}/{n} ({ratio:.0%} < "
+                f"{cfg.warmup_min_ready_ratio:.0%}){'' if force_ok else f', {force} nepasiruošęs'}"
+            )
+        return self.ready
+
+    def maybe_retry(self, symbols: Iterable[str]) -> bool:
+        """Kviečiama iš ciklo: kol nepasiruošta — kartais pakartoja warmup."""
+        if self.ready:
+            return True
+        if time.time() - self._last_attempt < WARMUP_RETRY_SEC:
+            return self._evaluate_quiet(symbols)
+        return self.run(symbols)
+
+    def _evaluate_quiet(self, symbols: Iterable[str]) -> bool:
+        # Gyvos kainos irgi pildo istoriją — tikrinam be papildomų REST užklausų
+        cfg = get_snapshot()
+        syms = self._symbols(symbols)
+        _, n, ratio = self.readiness(syms)
+        force = cfg.warmup_force_symbol
+        force_ok = not force or len(self.price_history.get(force, [])) >= self._min_points()
+        if n > 0 and ratio >= cfg.warmup_min_ready_ratio and force_ok:
+            return self._evaluate(syms)
+        return False
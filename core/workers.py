@@ -0,0 +1,495 @@
+# ============================================================
+# core/workers.py — Daugiaprocesis režimas (manage.py start --workers)
+# ------------------------------------------------------------
+# Trys atskiri procesai (kiekvienas su savo GIL):
+#   ingest    — WS/REST kainos → "prices.strategy" ir "prices.exec" eilės
+#   strategy  — kainų istorija, AI signalai, trend filtras → "orders" eilė
+#   execution — dydis, pavedimai, EXIT'ai, DB rašymai, equity, sanitizer
+# Procesai bendrauja per bendros atminties žiedines eiles (core/shm_ring.py).
+# Kainų momentinė kopija skaidoma į kelis pranešimus, kad tilptų į slotą;
+# skaitytojas juos sujungia (naujesni perrašo senesnius).
+# Strategy istorija / warmup / snapshot'as — ta pati logika kaip main_loop.
+# Supervizorius perkrauna nulūžusį workerį, kitų neliesdamas.
+# ============================================================
+
+import os
+import sys
+import json
+import time
+import signal
+import logging
+import multiprocessing as mp
+from datetime import datetime, timezone
+from typing import Dict, List
+
+from core import rate_limiter
+from core.shm_ring import ShmRing
+
+RING_PREFIX = f"cryptobot_{os.getpid()}"
+RINGS = {
+    # pavadinimas: (slotai, slot'o dydis)
+    "prices.strategy": (32, 65536),
+    "prices.exec": (32, 65536),
+    "orders": (256, 4096),
+}
+
+PRICE_PUSH_SEC = 1.0
+PRICE_WAIT_SEC = 30
+STRATEGY_LOOP_SEC = 2.0
+EXEC_LOOP_SEC = 0.5
+
+RESTART_BACKOFF_MAX_SEC = 60
+RESTART_STABLE_SEC = 300
+
+
+def _setup_logging(name: str):
+    logging.basicConfig(
+        level=logging.INFO,
+        format=f"%(asctime)s [%(levelname)s] [{name}] %(message)s",
+        datefmt="%H:%M:%S",
+        force=True,
+    )
+
+
+def _compact_prices(prices: Dict[str, Dict]) -> Dict[str, Dict]:
+    """Palieka tik tai, ko reikia kitiems procesams (telpa į vieną slotą)."""
+    out = {}
+    for sym, pi in prices.items():
+        if not isinstance(pi, dict) or not pi.get("price"):
+            continue
+        row = {"price": pi["price"], "bid": pi.get("bid", 0), "ask": pi.get("ask", 0), "ts": pi.get("ts", 0)}
+        if pi.get("volume_usdc") is not None:
+            row["volume_usdc"] = pi["volume_usdc"]
+        out[sym] = row
+    return out
+
+
+def _exit_on_sigterm():
+    """Supervizoriaus terminate() (SIGTERM) -> sys.exit: suveikia finally ir atexit."""
+    signal.signal(signal.SIGTERM, lambda *_: sys.exit(0))
+
+
+def _price_chunks(prices: Dict[str, Dict], slot_size: int) -> List[Dict[str, Dict]]:
+    """Skaido kainas į dalis, kurių kiekviena telpa į vieną slotą (su atsarga antraštei)."""
+    budget = slot_size - 256
+    chunks, cur, size = [], {}, 0
+    for sym, row in prices.items():
+        n = len(json.dumps(row, separators=(",", ":"))) + len(sym) + 6
+        if n > budget:
+            logging.warning(f"[INGEST] ⚠️ {sym} kaina netelpa į slotą ({n} B) — praleista")
+            continue
+        if cur and size + n > budget:
+            chunks.append(cur)
+            cur, size = {}, 0
+        cur[sym] = row
+        size += n
+    if cur:
+        chunks.append(cur)
+    return chunks
+
+
+def _publish_prices(ring: ShmRing, prices: Dict[str, Dict]):
+    # Kainoms svarbiausia naujausia reikšmė — pilnoje eilėje tiesiog praleidžiam
+    ts = time.time()
+    for chunk in _price_chunks(prices, ring.slot_size):
+        try:
+            ring.put({"type": "prices", "ts": ts, "prices": chunk})
+        except ValueError as e:
+            logging.warning(f"[INGEST] ⚠️ {e}")
+
+
+def _latest_prices(ring: ShmRing) -> Dict[str, Dict]:
+    """Sujungia visas eilėje esančias kainų dalis (naujesnės perrašo senesnes)."""
+    latest: Dict[str, Dict] = {}
+    for msg in ring.drain():
+        if msg and msg.get("type") == "prices":
+            latest.update(msg.get("prices") or {})
+    return latest
+
+
+# ============================================================
+# Workeriai
+# ============================================================
+
+def ingest_worker(ring_names: Dict[str, str], budget_state=None):
+    """Rinkos duomenų priėmimas: WS tiltas + periodinė kainų publikacija."""
+    _setup_logging("ingest")
+    _exit_on_sigterm()
+    rate_limiter.attach_shared(budget_state)
+    from dotenv import load_dotenv
+    from core.config import get_snapshot, start_config_watcher
+    from core.ws_bridge import start_ws_auto, get_all_prices
+    from core.state_snapshot import load_snapshot
+
+    load_dotenv()
+    start_config_watcher()
+    out_strategy = ShmRing.attach(ring_names["prices.strategy"])
+    out_exec = ShmRing.attach(ring_names["prices.exec"])
+
+    snap = load_snapshot()  # warm restart: universas be REST atrankos
+    start_ws_auto(testnet=get_snapshot().use_testnet, universe=snap["universe"] if snap else None)
+    logging.info("[INGEST] 🟢 WS tiltas paleistas")
+
+    while True:
+        prices = _compact_prices(get_all_prices() or {})
+        if prices:
+            _publish_prices(out_strategy, prices)
+            _publish_prices(out_exec, prices)
+        time.sleep(PRICE_PUSH_SEC)
+
+
+def strategy_worker(ring_names: Dict[str, str], budget_state=None):
+    """Signalų skaičiavimas: kainų istorija + AI signalai + trend filtras."""
+    _setup_logging("strategy")
+    _exit_on_sigterm()
+    rate_limiter.attach_shared(budget_state)
+    from dotenv import load_dotenv
+    from core.config import get_snapshot, start_config_watcher
+    from core.ws_bridge import ingest_external_prices
+    from core.exchange_adapter import get_adapter
+    from core.state_snapshot import load_snapshot
+    from core.main import get_trend, _loop_filters, _start_warmup, _save_state_snapshot, \
+        SNAPSHOT_EVERY_SEC
+    from ai.ai_signals import get_trade_signals
+
+    load_dotenv()
+    start_config_watcher()
+    prices_in = ShmRing.attach(ring_names["prices.strategy"])
+    orders_out = ShmRing.attach(ring_names["orders"])
+
+    # Pirmos kainos (universas žinomas tik ingest procese)
+    prices: Dict[str, Dict] = {}
+    deadline = time.time() + PRICE_WAIT_SEC
+    while not prices and time.time() < deadline:
+        prices = _latest_prices(prices_in)
+        if not prices:
+            time.sleep(PRICE_PUSH_SEC)
+    ingest_external_prices(prices)
+
+    # Istorija iš snapshot'o + warmup (kaip main_loop)
+    snap = load_snapshot()
+    price_history: Dict[str, list] = snap["price_history"] if snap else {}
+    universe = (snap["universe"] if snap else None) or sorted(prices)
+    warmup = _start_warmup(get_adapter(), price_history, snap, universe, get_snapshot())
+    last_snapshot = time.time()
+    logging.info("[STRATEGY] 🟢 Paleistas")
+
+    try:
+        while True:
+            t0 = time.time()
+            cfg = get_snapshot()
+            conf_thresh, edge_min, tf_enabled = _loop_filters(cfg)
+
+            fresh = _latest_prices(prices_in)
+            if fresh:
+                prices.update(fresh)
+                ingest_external_prices(fresh)
+                warmup.add_prices(fresh, cfg.history_window)
+
+            # Warmup vartai — kol istorijos per mažai, BUY signalų neskelbiam
+            buys_ok = not cfg.auto_warmup or warmup.maybe_retry(sorted(prices))
+
+            for sym in [s for s in prices.keys() if s.endswith(cfg.base_quote)]:
+                vol = prices[sym].get("volume_usdc") or 0
+                if vol and float(vol) < cfg.min_liquidity_usdc:
+                    continue
+                for sig in get_trade_signals(symbol=sym) or []:
+                    direction = str(sig.get("direction", "")).upper()
+                    if direction == "BUY":
+                        if not buys_ok:
+                            continue
+                        if float(sig.get("confidence", 0)) < conf_thresh or float(sig.get("edge", 0)) < edge_min:
+                            continue
+                        trend = get_trend(price_history.get(sym, [])) if tf_enabled else "UP"
+                        if trend != "UP":
+                            continue
+                    elif direction != "SELL":
+                        continue
+                    intent = {
+                        "type": "signal",
+                        "symbol": sym,
+                        "direction": direction,
+                        "confidence": float(sig.get("confidence", 0)),
+                        "edge": float(sig.get("edge", 0)),
+                        "price": float(prices[sym].get("price", 0)),
+                        "ts": sig.get("timestamp") or datetime.now(timezone.utc).isoformat(),
+                    }
+                    # Signalų nenorim prarasti — trumpai palaukiam vietos
+                    if not orders_out.put(intent, timeout=1.0):
+                        logging.warning(f"[STRATEGY] ⚠️ orders eilė pilna — signalas {sym} praleistas")
+
+            # Warm-restart snapshot'as (WS tiltas — ingest procese: universas iš kainų)
+            if time.time() - last_snapshot >= SNAPSHOT_EVERY_SEC:
+                _save_state_snapshot(price_history, warmup, universe=sorted(prices))
+                last_snapshot = time.time()
+
+            time.sleep(max(0.0, STRATEGY_LOOP_SEC - (time.time() - t0)))
+    finally:
+        # Išjungiant — paskutinis warm-restart snapshot'as
+        _save_state_snapshot(price_history, warmup, universe=sorted(prices))
+
+
+def execution_worker(ring_names: Dict[str, str], budget_state=None):
+    """Vykdymas ir persistencija: pavedimai, EXIT'ai, DB, equity, sanitizer."""
+    _setup_logging("execution")
+    _exit_on_sigterm()
+    rate_limiter.attach_shared(budget_state)
+    from dotenv import load_dotenv
+    from core.config import CONFIG, get_snapshot, start_config_watcher
+    from core.db_init import init_full_db
+    from core import journal, state_store, storage_profile, write_queue
+    from core.position_book import BOOK
+    from core.ws_bridge import ingest_external_prices
+    from core.exchange_adapter import get_adapter
+    from core.order_executor import OrderExecutor
+    from core.exit_manager import ExitManager
+    from core.position_sanitizer import PositionSanitizer
+    from core.user_stream import start_user_stream
+    from risk.risk_manager import RiskManager, RiskConfig, follow_config
+    from notify.notifier import notify
+
+    load_dotenv()
+    storage_profile.set_role("bot")
+    init_full_db()
+    journal.recover()
+    journal.start_checkpointer()
+    state_store.start_flusher()
+    storage_profile.start_wal_checkpointer()
+    BOOK.load()
+    start_config_watcher()
+    prices_in = ShmRing.attach(ring_names["prices.exec"])
+    orders_in = ShmRing.attach(ring_names["orders"])
+
+    cfg = get_snapshot()
+    exchange = get_adapter()
+
+    # LIVE: fill'ai ir balansai per user data stream (sanitizer / equity tracker)
+    if not exchange.dry_run:
+        try:
+            start_user_stream(CONFIG.get("API_KEY", ""), CONFIG.get("API_SECRET", ""), testnet=cfg.use_testnet)
+        except Exception as e:
+            logging.warning(f"[EXEC] User data stream nepaleistas: {e}")
+    rc = RiskConfig.from_snapshot(cfg)
+    risk = RiskManager(rc, exchange=exchange, dry_run=exchange.dry_run)
+    order_executor = OrderExecutor(exchange=exchange, daily_guard=risk)
+    exit_manager = ExitManager(risk_cfg=rc, order_executor=order_executor,
+                               paper_account=exchange.get_paper_account())
+    follow_config(risk, exit_manager)  # karštai perkrauti rizikos parametrai
+    sanitizer = PositionSanitizer(check_interval_sec=15)
+
+    if cfg.sizer_debug_enabled:
+        from ai.ai_sizer_debug import AISizerDebug as AISizer
+    else:
+        from ai.ai_sizer import AISizer
+    sizer = AISizer(CONFIG)
+
+    try:
+        from core.equity_tracker import start_equity_auto_tracker
+        start_equity_auto_tracker(interval_sec=300)
+    except Exception as e:
+        logging.warning(f"[EXEC] Equity tracker neprieinamas: {e}")
+    try:
+        from core.archive import start_export_loop
+        start_export_loop()
+    except Exception as e:
+        logging.warning(f"[EXEC] Archyvo eksportas neprieinamas: {e}")
+
+    prices: Dict[str, Dict] = {}
+    logging.info(f"[EXEC] 🟢 Paleistas (dry_run={exchange.dry_run})")
+
+    try:
+        while True:
+            t0 = time.time()
+            try:
+                cfg = get_snapshot()
+                fresh = _latest_prices(prices_in)
+                if fresh:
+                    prices = fresh
+                    ingest_external_prices(fresh)
+
+                st = exchange.get_paper_account() or {}
+                equity_now = float(st.get("equity", 0.0))
+                risk.update_equity(equity_now)
+                rsum = risk.get_summary() or {}
+                guard_stop = str(rsum.get("guard_status") or "OK").upper() == "STOP"
+
+                intents = [m for m in orders_in.drain() if m and m.get("type") == "signal"]
+                buys = [m for m in intents if m["direction"] == "BUY"]
+                sells = [m for m in intents if m["direction"] == "SELL"]
+
+                if buys and not guard_stop:
+                    free_cash = float(st.get("free_usdc", 0.0))
+                    open_cnt = int(st.get("open_positions", 0))
+                    slots_left = max(0, cfg.max_open_positions - open_cnt)
+                    buys.sort(key=lambda x: x.get("confidence", 0), reverse=True)
+                    for sig in buys[:slots_left]:
+                        sym = sig["symbol"]
+                        if risk.has_position(sym):
+                            continue
+                        mid_price = (prices.get(sym) or {}).get("price") or sig.get("price") or exchange.get_price(sym)
+                        if not mid_price:
+                            continue
+                        q_amt = sizer.quote_for_signal(
+                            symbol=sym,
+                            confidence=float(sig["confidence"]),
+                            edge=float(sig["edge"]),
+                            price=float(mid_price),
+                            free_cash=float(free_cash),
+                            equity=float(equity_now),
+                            open_positions={},
+                            slots_left=slots_left,
+                            daily_pnl_pct=float(rsum.get("pnl_today", 0.0)),
+                        )
+                        if q_amt < cfg.min_per_trade_usdc or q_amt > free_cash:
+                            continue
+                        res = order_executor.market_buy(
+                            symbol=sym,
+                            quote_amount=float(q_amt),
+                            expected_edge_pct=float(sig["edge"]),
+                            ai_confidence=float(sig["confidence"]),
+                        )
+                        if res and res.get("ok", False):
+                            try:
+                                notify(f"🟢 BUY {sym} @ {res.get('price', 0):.6f} ({q_amt:.2f} USDC)")
+                            except Exception:
+                                pass
+                            free_cash -= float(q_amt)
+                            slots_left -= 1
+                            if slots_left <= 0 or free_cash <= cfg.min_per_trade_usdc:
+                                break
+
+                exit_manager.check_exits(prices)
+
+                for sig in sells:
+                    sym = sig["symbol"]
+                    if not risk.has_position(sym):
+                        continue
+                    qty = float(order_executor.get_available_qty(sym) or 0.0)
+                    if qty > 0:
+                        res = order_executor.market_sell(
+                            symbol=sym,
+                            base_qty=qty,
+                            expected_edge_pct=float(sig.get("edge", 0)),
+                            ai_confidence=float(sig.get("confidence", 0)),
+                            allow_partial=True,
+                            reason="AI SELL",
+                        )
+                        if res and res.get("ok", False):
+                            try:
+                                notify(f"🔴 SELL {sym} (AI SELL)")
+                            except Exception:
+                                pass
+
+                try:
+                    sanitizer.maybe_run(exchange, risk)
+                except Exception:
+                    pass
+            except Exception as e:
+                logging.exception(f"[EXEC] Klaida: {e}")
+                time.sleep(3.0)
+
+            time.sleep(max(0.0, EXEC_LOOP_SEC - (time.time() - t0)))
+    finally:
+        # Išjungiant — laukiantys DB / žurnalo įrašai ir būsenos
+        write_queue.flush()
+        state_store.flush_all()
+
+
+WORKERS = {
+    "ingest": ingest_worker,
+    "strategy": strategy_worker,
+    "execution": execution_worker,
+}
+
+
+# ============================================================
+# Supervizorius
+# ============================================================
+
+class Supervisor:
+    """Paleidžia workerius, seka jų būseną ir perkrauna nulūžusius (su backoff)."""
+
+    def __init__(self, check_interval_sec: float = 1.0):
+        self.check_interval = check_interval_sec
+        self.ring_names = {k: f"{RING_PREFIX}_{k.replace('.', '_')}" for k in RINGS}
+        self.rings = {}
+        self.budget_state = None  # bendras weight biudžetas (core/rate_limiter.py)
+        self.procs: Dict[str, mp.Process] = {}
+        self.restarts: Dict[str, int] = {name: 0 for name in WORKERS}
+        self.started_at: Dict[str, float] = {}
+        self.next_start: Dict[str, float] = {}
+        self._stop = False
+
+    def _create_rings(self):
+        for key, (slots, slot_size) in RINGS.items():
+            self.rings[key] = ShmRing.create(self.ring_names[key], slots=slots, slot_size=slot_size)
+        self.budget_state = rate_limiter.share_state()
+
+    def _spawn(self, name: str):
+        p = mp.Process(target=WORKERS[name], args=(self.ring_names, self.budget_state), name=f"bot-{name}", daemon=False)
+        p.start()
+        self.procs[name] = p
+        self.started_at[name] = time.time()
+        logging.info(f"[SUPERVISOR] ▶️ {name} paleistas (PID={p.pid}, restartai={self.restarts[name]})")
+
+    def _check(self):
+        now = time.time()
+        for name in WORKERS:
+            p = self.procs.get(name)
+            if p is not None and p.is_alive():
+                if now - self.started_at.get(name, now) > RESTART_STABLE_SEC:
+                    self.restarts[name] = 0
+                continue
+
+            if p is not None:
+                # Nulūžo — planuojam perkrovimą su eksponentiniu backoff
+                code = p.exitcode
+                p.join(timeout=0)
+                self.procs[name] = None
+                delay = min(RESTART_BACKOFF_MAX_SEC, 2 ** self.restarts[name])
+                self.restarts[name] += 1
+                self.next_start[name] = now + delay
+                logging.error(f"[SUPERVISOR] ❌ {name} nulūžo (exitcode={code}) — perkrausiu po {delay}s")
+                try:
+                    from notify.notifier import notify
+                    notify(f"⚠️ Workeris {name} nulūžo (exitcode={code}), perkraunamas", category="RISK")
+                except Exception:
+                    pass
+
+            if now >= self.next_start.get(name, 0):
+                self._spawn(name)
+
+    def stop(self, *_):
+        self._stop = True
+
+    def run(self):
+        self._create_rings()
+        signal.signal(signal.SIGINT, self.stop)
+        signal.signal(signal.SIGTERM, self.stop)
+        logging.info(f"[SUPERVISOR] 🚀 Paleidžiami workeriai: {', '.join(WORKERS)}")
+        try:
+            while not self._stop:
+                self._check()
+                time.sleep(self.check_interval)
+        finally:
+            self.shutdown()
+
+    def shutdown(self):
+        logging.info("[SUPERVISOR] 🔴 Stabdomi workeriai...")
+        for name, p in self.procs.items():
+            if p is not None and p.is_alive():
+                p.terminate()
+        for p in self.procs.values():
+            if p is not None:
+                p.join(timeout=5)
+        for ring in self.rings.values():
+            ring.close()
+            ring.unlink()
+        logging.info("[SUPERVISOR] ✅ Sustabdyta")
+
+
+if __name__ == "__main__":
+    _setup_logging("supervisor")
+    if sys.platform != "win32":
+        mp.set_start_method("spawn", force=True)
+    Supervisor().run()
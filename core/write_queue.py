@@ -0,0 +1,432 @@
+# ============================================================
+# core/write_queue.py — write-behind DB rašymas (vienas rašytojas)
+# ------------------------------------------------------------
+# - Prekybos thread'as DB nerašo: submit() įdeda tipizuotą įvykį į eilę
+#   ir iškart grįžta
+# - Vienas "db-writer" thread'as valdo rašymo jungtį ir grupuoja įvykius
+#   į transakcijas: iki BATCH_MAX įvykių arba BATCH_WINDOW_MS nuo pirmo
+# - Kritiniai rašymai (pozicijos atidarymas/uždarymas) — submit(..., wait=True):
+#   laukiama, kol transakcija su šiuo įvykiu bus commit'inta (flush barjeras).
+#   flush() — barjeras visai eilei (pvz. prieš išjungimą)
+# - Klaida transakcijoje -> rollback ir įvykiai kartojami po vieną,
+#   kad vienas blogas įrašas nepražudytų kitų
+# - get_metrics(): eilės gylis, batch'ai, commit latency p50/p99, klaidos
+#   Išjungiama CONFIG["DB_WRITE_BEHIND"] = False (rašoma sinchroniškai)
+# - Žurnalas (core/journal.py): batch'as pirma įrašomas į append-only
+#   žurnalą (vienas fsync), tada pritaikomas SQLite projekcijoms kartu su
+#   journal_state.applied_seq. Įvykiai atkuriami iš žurnalo per
+#   to_record() / from_record(). Žurnalo klaidos atveju batch'as vis tiek
+#   pritaikomas, bet pažymima spraga (journal_state.gap_ms)
+# ============================================================
+
+import time
+import queue
+import atexit
+import logging
+import threading
+from collections import deque
+from dataclasses import asdict, dataclass, is_dataclass
+from typing import Any, Dict, List, Optional, Tuple
+
+from core.config import CONFIG
+from core import journal
+from core.db_manager import get_write_conn
+from core.timeutil import iso_to_ms
+
+BATCH_MAX = 200
+BATCH_WINDOW_MS = 50
+FLUSH_TIMEOUT_SEC = 10.0
+LATENCY_WINDOW = 500
+
+
+# ============================================================
+# Rašymo įvykiai
+# ============================================================
+
+class WriteEvent:
+    """Bazinė klasė: apply(cur) įvykdo SQL esamoje transakcijoje."""
+    kind = "event"
+
+    def apply(self, cur):
+        raise NotImplementedError
+
+
+@dataclass
+class TradeInsert(WriteEvent):
+    ts: str
+    event: str
+    symbol: str
+    price: float = 0.0
+    qty: float = 0.0
+    usd_value: float = 0.0
+    pnl_pct: float = 0.0
+    reason: str = ""
+    hold_sec: float = 0.0
+    confidence: float = 0.0
+    ts_ms: int = 0
+    kind = "trade"
+
+    def apply(self, cur):
+        cur.execute("""
+            INSERT INTO trades
+            (ts, ts_ms, event, symbol, price, qty, usd_value, pnl_pct, reason, hold_sec, confidence)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        """, (self.ts, self.ts_ms or iso_to_ms(self.ts), self.event, self.symbol, self.price, self.qty,
+              self.usd_value, self.pnl_pct, self.reason, self.hold_sec, self.confidence))
+
+
+@dataclass
+class PositionOpen(WriteEvent):
+    symbol: str
+    entry_price: float
+    qty: float
+    opened_at: str
+    confidence: float = 0.0
+    opened_at_ms: int = 0
+    kind = "position_open"
+
+    def apply(self, cur):
+        # Konfliktas — tik su ux_positions_open_symbol (OPEN eilutė); CLOSED istorija lieka
+        cur.execute("""
+            INSERT OR REPLACE INTO positions
+            (symbol, entry_price, qty, opened_at, opened_at_ms, confidence, state)
+            VALUES (?, ?, ?, ?, ?, ?, 'OPEN')
+        """, (self.symbol, self.entry_price, self.qty, self.opened_at,
+              self.opened_at_ms or iso_to_ms(self.opened_at), self.confidence))
+
+
+@dataclass
+class PositionDelete(WriteEvent):
+    symbol: str
+    kind = "position_delete"
+
+    def apply(self, cur):
+        cur.execute("DELETE FROM positions WHERE symbol = ? AND state='OPEN'", (self.symbol,))
+
+
+@dataclass
+class PositionClose(WriteEvent):
+    """Pozicija pažymima CLOSED ir įrašomas CLOSE sandoris (viena transakcija)."""
+    symbol: str
+    closed_at: str
+    close_price: float
+    pnl_pct: float
+    pnl_usdc: float
+    reason: str
+    closed_at_ms: int = 0
+    kind = "position_close"
+
+    def apply(self, cur):
+        closed_ms = self.closed_at_ms or iso_to_ms(self.closed_at)
+        row = cur.execute("SELECT id FROM positions WHERE symbol=? AND state='OPEN'", (self.symbol,)).fetchone()
+        if row is None:
+            return
+        cur.execute("""
+            UPDATE positions
+            SET state='CLOSED', closed_at=?, closed_at_ms=?, close_price=?, pnl_pct=?, pnl_usdc=?, close_reason=?
+            WHERE id=?
+        """, (self.closed_at, closed_ms, self.close_price, self.pnl_pct, self.pnl_usdc, self.reason, row[0]))
+        # trades INSERT trigger'is (trg_ai_trade_stats) čia pat atnaujina AI agregatus
+        cur.execute("""
+            INSERT INTO trades
+            (ts, ts_ms, event, symbol, price, qty, usd_value, pnl_pct, pnl_usdc, reason, confidence, edge, hold_sec)
+            SELECT ?, ?, 'CLOSE', symbol, ?, qty, qty * ?, ?, ?, ?, confidence, edge,
+                   CASE WHEN opened_at_ms > 0 THEN MAX((? - opened_at_ms) / 1000.0, 0) ELSE 0 END
+            FROM positions WHERE id=?
+        """, (self.closed_at, closed_ms, self.close_price, self.close_price, self.pnl_pct, self.pnl_usdc,
+              self.reason, closed_ms, row[0]))
+
+
+@dataclass
+class EquityRow(WriteEvent):
+    ts: str
+    equity: float
+    day_pnl_pct: float = 0.0
+    equity_pct_from_start: float = 0.0
+    free_usdc: float = 0.0
+    used_usdc: float = 0.0
+    positions: int = 0
+    replace: bool = False
+    ts_ms: int = 0
+    kind = "equity"
+
+    def apply(self, cur):
+        verb = "INSERT OR REPLACE" if self.replace else "INSERT"
+        cur.execute(f"""
+            {verb} INTO equity_history
+            (ts, ts_ms, equity, day_pnl_pct, equity_pct_from_start, free_usdc, used_usdc, positions)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+        """, (self.ts, self.ts_ms or iso_to_ms(self.ts), self.equity, self.day_pnl_pct,
+              self.equity_pct_from_start, self.free_usdc, self.used_usdc, self.positions))
+
+
+class EquityPrune(WriteEvent):
+    """equity_history / equity_rollup retencija (core/equity_rollup.py)."""
+    kind = "equity_prune"
+
+    def apply(self, cur):
+        from core.equity_rollup import prune
+        prune(cur)
+
+    def __repr__(self):
+        return "EquityPrune()"
+
+
+@dataclass
+class StateReset(WriteEvent):
+    """Testinis reset: pozicijos ir equity istorija išvalomos, pradinis kapitalas."""
+    ts: str
+    equity: float = 10000.0
+    kind = "state_reset"
+
+    def apply(self, cur):
+        cur.execute("DELETE FROM positions")
+        cur.execute("DELETE FROM equity_history")
+        cur.execute("DELETE FROM equity_rollup")
+        cur.execute("""
+            INSERT INTO equity_history
+            (ts, ts_ms, equity, day_pnl_pct, equity_pct_from_start, free_usdc, used_usdc, positions)
+            VALUES (?, ?, ?, 0, 0, ?, 0, 0)
+        """, (self.ts, iso_to_ms(self.ts), self.equity, self.equity))
+
+
+EVENT_TYPES = {cls.kind: cls for cls in (
+    TradeInsert, PositionOpen, PositionDelete, PositionClose, EquityRow, EquityPrune, StateReset,
+)}
+
+
+def to_record(event: WriteEvent) -> Tuple[str, Dict[str, Any]]:
+    """Įvykis -> (kind, laukai) žurnalui."""
+    return event.kind, (asdict(event) if is_dataclass(event) else {})
+
+
+def from_record(kind: str, fields: Dict[str, Any]) -> Optional[WriteEvent]:
+    """(kind, laukai) -> įvykis; None — ne projekcijos įvykis (pvz. order_filled)."""
+    cls = EVENT_TYPES.get(kind)
+    return cls(**fields) if cls else None
+
+
+class _Barrier:
+    """Flush barjeras: nustatomas, kai viskas prieš jį commit'inta."""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.ok = True
+
+
+# ============================================================
+# Rašytojas
+# ============================================================
+
+class WriteBehindQueue:
+    def __init__(self, batch_max: int = BATCH_MAX, window_ms: float = BATCH_WINDOW_MS):
+        self.batch_max = batch_max
+        self.window_sec = window_ms / 1000.0
+        self.q: "queue.Queue[Tuple[Any, Optional[_Barrier]]]" = queue.Queue()
+        self._thread: Optional[threading.Thread] = None
+        self._start_lock = threading.Lock()
+        self._mlock = threading.Lock()
+        self._commit_ms: deque = deque(maxlen=LATENCY_WINDOW)
+        self.stats = {"events": 0, "batches": 0, "errors": 0, "max_depth": 0, "flushes": 0}
+
+    # --------------------------------------------------------
+    def _ensure_started(self):
+        if self._thread is not None:
+            return
+        with self._start_lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="db-writer", daemon=True)
+                self._thread.start()
+
+    def submit(self, event: WriteEvent, wait: bool = False, timeout: float = FLUSH_TIMEOUT_SEC) -> bool:
+        """
+        Įdeda įvykį į eilę. wait=True — grįžta po commit'o
+        (True, jei įvykis įrašytas; False — klaida arba timeout).
+        """
+        if not CONFIG.get("DB_WRITE_BEHIND", True):
+            return self._apply_now(event)
+        self._ensure_started()
+        barrier = _Barrier() if wait else None
+        self.q.put((event, barrier))
+        depth = self.q.qsize()
+        if depth > self.stats["max_depth"]:
+            self.stats["max_depth"] = depth
+        if barrier is None:
+            return True
+        if not barrier.done.wait(timeout):
+            logging.warning(f"[DBW] ⚠️ {event.kind} neįrašytas per {timeout:.0f}s (eilė={self.q.qsize()})")
+            return False
+        return barrier.ok
+
+    def submit_many(self, events: List[WriteEvent], wait: bool = False,
+                    timeout: float = FLUSH_TIMEOUT_SEC) -> List[bool]:
+        """
+        Keli įvykiai iš karto — rašytojas juos paprastai commit'ina vienu
+        batch'u. wait=True — grįžta po commit'o su kiekvieno įvykio rezultatu.
+        """
+        if not CONFIG.get("DB_WRITE_BEHIND", True):
+            return [self._apply_now(ev) for ev in events]
+        self._ensure_started()
+        barriers = [_Barrier() if wait else None for _ in events]
+        for ev, barrier in zip(events, barriers):
+            self.q.put((ev, barrier))
+        depth = self.q.qsize()
+        if depth > self.stats["max_depth"]:
+            self.stats["max_depth"] = depth
+        if not wait:
+            return [True] * len(events)
+        deadline = time.monotonic() + timeout
+        out = []
+        for ev, barrier in zip(events, barriers):
+            if not barrier.done.wait(max(0.0, deadline - time.monotonic())):
+                logging.warning(f"[DBW] ⚠️ {ev.kind} neįrašytas per {timeout:.0f}s (eilė={self.q.qsize()})")
+                out.append(False)
+            else:
+                out.append(barrier.ok)
+        return out
+
+    def flush(self, timeout: float = FLUSH_TIMEOUT_SEC) -> bool:
+        """Barjeras: laukia, kol visi ankstesni įvykiai bus commit'inti."""
+        if self._thread is None:
+            return True
+        barrier = _Barrier()
+        self.q.put((None, barrier))
+        return barrier.done.wait(timeout) and barrier.ok
+
+    # --------------------------------------------------------
+    def _journal(self, events) -> Optional[List[int]]:
+        """
+        Įvykius įrašo į žurnalą (vienas fsync). Grąžina jų seq ([] — be žurnalo,
+        None — žurnalo klaida: įvykiai taikomi su journal.mark_gap).
+        """
+        if not events or not journal.enabled():
+            return []
+        try:
+            return journal.JOURNAL.append_many([to_record(ev) for ev in events], durable=True)
+        except Exception as e:
+            with self._mlock:
+                self.stats["journal_errors"] = self.stats.get("journal_errors", 0) + 1
+            logging.error(f"[DBW] ❌ Žurnalo klaida ({len(events)} įvykiai): {e} — DB pažymima spraga, "
+                          f"rebuild draudžiamas iki naujo checkpoint'o")
+            return None
+
+    def _apply_now(self, event: WriteEvent) -> bool:
+        seqs = self._journal([event])
+        con = get_write_conn()
+        try:
+            cur = con.cursor()
+            event.apply(cur)
+            if seqs is None:
+                journal.mark_gap(cur)
+            elif seqs:
+                journal.set_applied_seq(cur, seqs[-1])
+            con.commit()
+            return True
+        except Exception as e:
+            con.rollback()
+            logging.warning(f"[DBW] ⚠️ {event.kind} įrašymo klaida: {e}")
+            return False
+
+    def _collect(self):
+        batch = [self.q.get()]
+        deadline = time.monotonic() + self.window_sec
+        while len(batch) < self.batch_max:
+            # Barjeras uždaro batch'ą — nelaukiam lango pabaigos
+            if batch[-1][1] is not None:
+                break
+            left = deadline - time.monotonic()
+            if left <= 0:
+                break
+            try:
+                batch.append(self.q.get(timeout=left))
+            except queue.Empty:
+                break
+        return batch
+
+    def _commit(self, con, events, seq: int = 0, gap: bool = False) -> bool:
+        t0 = time.perf_counter()
+        try:
+            cur = con.cursor()
+            for ev in events:
+                ev.apply(cur)
+            if gap and events:
+                journal.mark_gap(cur)
+            if seq:
+                journal.set_applied_seq(cur, seq)
+            con.commit()
+        except Exception:
+            con.rollback()
+            return False
+        if not events:
+            return True
+        with self._mlock:
+            self._commit_ms.append((time.perf_counter() - t0) * 1000)
+            self.stats["batches"] += 1
+            self.stats["events"] += len(events)
+        return True
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+            events = [ev for ev, _ in batch if ev is not None]
+            failed = set()
+            try:
+                seqs = self._journal(events)
+                gap = seqs is None
+                seqs = seqs or [0] * len(events)
+                con = get_write_conn()
+                if events and not self._commit(con, events, seqs[-1], gap):
+                    # Kartojam po vieną — randam kaltą įvykį
+                    for ev, seq in zip(events, seqs):
+                        if not self._commit(con, [ev], seq, gap):
+                            failed.add(id(ev))
+                            with self._mlock:
+                                self.stats["errors"] += 1
+                            logging.warning(f"[DBW] ⚠️ {ev.kind} įrašymo klaida: {ev}")
+                    # Nepritaikomi įvykiai nekartojami ir atkuriant
+                    self._commit(con, [], seqs[-1])
+            except Exception as e:
+                failed.update(id(ev) for ev in events)
+                with self._mlock:
+                    self.stats["errors"] += len(events)
+                logging.error(f"[DBW] ❌ Batch'as ({len(events)}) neįrašytas: {e}")
+            for ev, barrier in batch:
+                if barrier is not None:
+                    barrier.ok = (id(ev) not in failed) if ev is not None else not failed
+                    barrier.done.set()
+                    with self._mlock:
+                        self.stats["flushes"] += 1
+
+    # --------------------------------------------------------
+    def get_metrics(self) -> Dict[str, Any]:
+        with self._mlock:
+            lat = sorted(self._commit_ms)
+            out = dict(self.stats)
+        n = len(lat)
+        out.update({
+            "depth": self.q.qsize(),
+            "commit_p50_ms": round(lat[n // 2], 2) if n else 0.0,
+            "commit_p99_ms": round(lat[min(n - 1, int(n * 0.99))], 2) if n else 0.0,
+            "avg_batch": round(out["events"] / out["batches"], 1) if out["batches"] else 0.0,
+        })
+        return out
+
+
+WRITER = WriteBehindQueue()
+atexit.register(WRITER.flush)
+
+
+def submit(event: WriteEvent, wait: bool = False) -> bool:
+    return WRITER.submit(event, wait=wait)
+
+
+def submit_many(events: List[WriteEvent], wait: bool = False) -> List[bool]:
+    return WRITER.submit_many(events, wait=wait)
+
+
+def flush(timeout: float = FLUSH_TIMEOUT_SEC) -> bool:
+    return WRITER.flush(timeout)
+
+
+def get_metrics() -> Dict[str, Any]:
+    return WRITER.get_metrics()
@@ -25,8 +25,9 @@ try:
 except Exception:
     websocket = None
 
-import requests
 from core.config import CONFIG
+from core import http_client
+from core import exchange_info
 
 # Jei yra — naudosime dinaminę atranką
 try:
@@ -37,7 +38,6 @@ except Exception:
 # ------------------------------------------------------------
 # Konfigai
 # ------------------------------------------------------------
-REST_TIMEOUT = 5
 ORDERBOOK_DEPTH = 5
 
 WS_PING_MIN_SEC = int(CONFIG.get("WS_PING_MIN_SEC", 3))
@@ -83,6 +83,7 @@ class _WSState:
         # Prenumeratų ir atrankos dalis
         self.universe: List[str] = []      # target (norimas) sąrašas
         self.subscribed: Set[str] = set()  # realiai prenumeruojami
+        self.universe_ts = 0.0             # kada universas atrinktas (0 = dar ne)
 
         self.use_testnet = False
         self.refresh_sec_arg = 120  # iš start_ws_auto()
@@ -109,7 +110,7 @@ def _rest_base() -> str:
 def _rest_get_bookticker(symbol: str) -> Optional[Dict]:
     try:
         url = f"{_rest_base()}/api/v3/ticker/bookTicker"
-        r = requests.get(url, params={"symbol": symbol}, timeout=REST_TIMEOUT)
+        r = http_client.get(url, params={"symbol": symbol})
         if r.status_code == 200:
             return r.json()
     except Exception:
@@ -119,7 +120,7 @@ def _rest_get_bookticker(symbol: str) -> Optional[Dict]:
 def _rest_get_depth(symbol: str, limit: int = ORDERBOOK_DEPTH) -> Optional[Dict]:
     try:
         url = f"{_rest_base()}/api/v3/depth"
-        r = requests.get(url, params={"symbol": symbol, "limit": limit}, timeout=REST_TIMEOUT)
+        r = http_client.get(url, params={"symbol": symbol, "limit": limit})
         if r.status_code == 200:
             return r.json()
     except Exception:
@@ -135,7 +136,7 @@ def _prepare_universe(limit: int) -> List[str]:
     - Jei UNIVERSE nurodytas config.json — naudojamas kaip pirminis rinkinys.
     - Jei tuščias arba <5:
         * Jei turime core.universe_manager.select_universe -> naudojam pagal TOP likvidumą/stabilumą.
-        * Kitu atveju /exchangeInfo -> visos TRADING poros su BASE_QUOTE.
+        * Kitu atveju exchangeInfo cache -> visos TRADING poros su BASE_QUOTE.
     - limit riboja kiek porų imti (0 = visos).
     """
     base_quote = (CONFIG.get("BASE_QUOTE", "USDC") or "USDC").upper()
@@ -151,15 +152,8 @@ def _prepare_universe(limit: int) -> List[str]:
                 uni = []
         if not uni:
             try:
-                print(f"[WS] 🔍 exchangeInfo užklausa ({base_quote}) ...")
-                url = f"{_rest_base()}/api/v3/exchangeInfo"
-                r = requests.get(url, timeout=REST_TIMEOUT)
-                if r.status_code == 200:
-                    symbols = r.json().get("symbols", [])
-                    for s in symbols:
-                        sym = s.get("symbol", "")
-                        if sym.endswith(base_quote) and s.get("status") == "TRADING":
-                            uni.append(sym)
+                print(f"[WS] 🔍 exchangeInfo cache ({base_quote}) ...")
+                uni = exchange_info.list_symbols(base_quote, base_url=_rest_base())
                 print(f"[WS] ✅ Rasta {len(uni)} aktyvių {base_quote} porų.")
             except Exception as e:
                 print(f"[WS] ⚠️ Nepavyko gauti exchangeInfo: {e}")
@@ -363,7 +357,7 @@ def _ws_loop():
     # Testnet sveikatos patikra — jei neprieinamas, fallback į mainnet
     if "testnet" in ws_url:
         try:
-            r = requests.get(f"{BINANCE_REST_TEST}/api/v3/time", timeout=3)
+            r = http_client.get(f"{BINANCE_REST_TEST}/api/v3/time", retries=0)
             if r.status_code != 200:
                 print("[WS] ⚠️ Binance TESTNET WS neveikia. Naudojamas MAINNET kainų srautas.")
                 ws_url = BINANCE_WS_MAIN
@@ -420,7 +414,7 @@ def _ws_loop():
 # Periodinė priežiūra: REST fallback + periodinis delta refresh + 24h volume
 # ------------------------------------------------------------
 def _periodic_maintenance():
-    last_resub = 0.0
+    last_resub = STATE.universe_ts  # atkurtas universas — refresh atidedamas
     last_volume_update = 0.0
     while not STATE.stop:
         try:
@@ -453,7 +447,7 @@ def _periodic_maintenance():
             if (now - last_volume_update) > 60:
                 try:
                     url = f"{_rest_base()}/api/v3/ticker/24hr"
-                    r = requests.get(url, timeout=REST_TIMEOUT)
+                    r = http_client.get(url)
                     if r.status_code == 200:
                         tickers = r.json()
                         with STATE.lock:
@@ -483,18 +477,21 @@ def _periodic_maintenance():
 # ------------------------------------------------------------
 # Vieša API
 # ------------------------------------------------------------
-def start_ws_auto(limit: int = 0, testnet: bool = False, refresh_sec: int = 120):
+def start_ws_auto(limit: int = 0, testnet: bool = False, refresh_sec: int = 120,
+                  universe: Optional[List[str]] = None):
     """
     Suderinamumas išsaugotas:
     - limit: paliekam; jei UNIVERSE tuščias — imsim TOP pagal atranką.
     - testnet: jei True — bandome TESTNET, kitaip MAINNET (su automatiniu fallback).
     - refresh_sec: paliekam atgaliniam suderinamumui (UNIVERSE delta refresh valdo CONFIG["UNIVERSE_REFRESH_MINUTES"]).
+    - universe: atkurtas (pvz. iš warm-restart snapshot'o) sąrašas — atranka per REST praleidžiama.
     """
     with STATE.lock:
         if STATE.ws is not None:
             return
         # Pirminis universas
-        STATE.universe = _prepare_universe(limit)
+        STATE.universe = [s.upper() for s in universe] if universe else _prepare_universe(limit)
+        STATE.universe_ts = time.time() if universe else 0.0
         STATE.subscribed = set()
         STATE.use_testnet = bool(testnet)
         STATE.refresh_sec_arg = int(refresh_sec) if refresh_sec is not None else 120
@@ -508,6 +505,11 @@ def start_ws_auto(limit: int = 0, testnet: bool = False, refresh_sec: int = 120)
     t_mt = threading.Thread(target=_periodic_maintenance, daemon=True)
     t_mt.start()
 
+def get_universe() -> List[str]:
+    """Grąžina dabartinį (norimą) UNIVERSE sąrašą."""
+    with STATE.lock:
+        return list(STATE.universe)
+
 def is_connected() -> bool:
     with STATE.lock:
         return bool(STATE.ws) and (time.time() - STATE.last_update) <= WS_STALE_SECONDS
@@ -580,6 +582,18 @@ def get_orderbook_top(symbol: str) -> Tuple[float, float, float, List[Tuple[floa
     asks_depth = [(ask, 10.0)] if ask > 0 else []
     return bid, ask, mid, bids_depth, asks_depth
 
+def ingest_external_prices(prices: Dict[str, Dict]):
+    """
+    Įrašo kainas, gautas iš kito proceso (--workers režimas), į vietinį STATE,
+    kad get_price()/get_all_prices() veiktų be nuosavo WS ir be REST.
+    """
+    now = time.time()
+    with STATE.lock:
+        for sym, row in (prices or {}).items():
+            if isinstance(row, dict) and row.get("price"):
+                STATE.price[sym.upper()] = dict(row)
+        STATE.last_update = now
+
 def stop_ws():
     with STATE.lock:
         STATE.stop = True
@@ -0,0 +1,228 @@
+# ============================================================
+# core/ws_order_transport.py — Pavedimai per Binance WebSocket API
+# ------------------------------------------------------------
+# - Viena nuolatinė WS API jungtis (ws-api.binance.com/ws-api/v3),
+#   pavedimai siunčiami "order.place" su correlation id (= newClientOrderId)
+# - Parašas: HMAC-SHA256 nuo abėcėliškai surikiuotų parametrų (core/binance_auth.py).
+#   session.logon reikalauja Ed25519 raktų, todėl su HMAC raktais
+#   pasirašoma kiekviena užklausa — jungtis vis tiek išlieka šilta
+# - Timeout / atsijungimas -> OrderTransportError; ExchangeAdapter tada
+#   patikrina pavedimą per REST (origClientOrderId) ir tik jei jo nėra —
+#   siunčia per REST (be dvigubo pavedimo)
+# - LATENCY: sprendimo -> ack latency kiekvienam transportui ("rest", "ws_api")
+#   Įjungiama CONFIG["ORDER_TRANSPORT"] = "ws_api" (numatyta "rest")
+# ============================================================
+
+import json
+import time
+import uuid
+import logging
+import threading
+from collections import deque
+from typing import Any, Dict, Optional
+
+try:
+    import websocket  # websocket-client
+except Exception:
+    websocket = None
+
+from core.binance_auth import sign
+
+WS_API_MAIN = "wss://ws-api.binance.com:443/ws-api/v3"
+WS_API_TEST = "wss://ws-api.testnet.binance.vision/ws-api/v3"
+
+ORDER_TIMEOUT_SEC = 5.0
+CONNECT_TIMEOUT_SEC = 5.0
+RECONNECT_MAX_SEC = 30
+LATENCY_WINDOW = 500
+
+
+class OrderTransportError(Exception):
+    """WS API pavedimas nepasiekė biržos arba atsakymas negautas laiku."""
+
+    def __init__(self, msg: str, sent: bool = False):
+        super().__init__(msg)
+        self.sent = sent  # ar užklausa jau buvo išsiųsta (būsena biržoje nežinoma)
+
+
+class OrderRejectedError(Exception):
+    """Birža atmetė pavedimą (atsakymas su error) — REST fallback neturi prasmės."""
+
+
+# ============================================================
+# Latency metrikos (abiems transportams)
+# ============================================================
+
+class LatencyStats:
+    def __init__(self, window: int = LATENCY_WINDOW):
+        self.lock = threading.Lock()
+        self.window = window
+        self.samples: Dict[str, deque] = {}
+        self.counts: Dict[str, Dict[str, int]] = {}
+
+    def record(self, transport: str, ms: float, ok: bool = True):
+        with self.lock:
+            self.samples.setdefault(transport, deque(maxlen=self.window)).append(ms)
+            c = self.counts.setdefault(transport, {"orders": 0, "errors": 0, "fallbacks": 0})
+            c["orders"] += 1
+            if not ok:
+                c["errors"] += 1
+
+    def fallback(self, transport: str):
+        with self.lock:
+            self.counts.setdefault(transport, {"orders": 0, "errors": 0, "fallbacks": 0})["fallbacks"] += 1
+
+    def get_metrics(self) -> Dict[str, Any]:
+        out = {}
+        with self.lock:
+            for t, c in self.counts.items():
+                lat = sorted(self.samples.get(t, ()))
+                n = len(lat)
+                out[t] = dict(c, **{
+                    "mean_ms": round(sum(lat) / n, 2) if n else 0.0,
+                    "p50_ms": round(lat[n // 2], 2) if n else 0.0,
+                    "p99_ms": round(lat[min(n - 1, int(n * 0.99))], 2) if n else 0.0,
+                })
+        return out
+
+
+LATENCY = LatencyStats()
+
+
+def get_latency_metrics() -> Dict[str, Any]:
+    return LATENCY.get_metrics()
+
+
+# ============================================================
+# WS API sesija
+# ============================================================
+
+class WsOrderTransport:
+    def __init__(self, api_key: str, api_secret: str, url: str = WS_API_MAIN):
+        self.api_key = api_key
+        self.api_secret = api_secret
+        self.url = url
+        self.app = None
+        self.connected = threading.Event()
+        self.stop_flag = threading.Event()
+        self._pending: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+
+    # --------------------------------------------------------
+    def _on_open(self, ws):
+        self.connected.set()
+        logging.info("[WSAPI] ✅ Prisijungta prie WebSocket API")
+
+    def _on_message(self, ws, message: str):
+        try:
+            msg = json.loads(message)
+        except Exception:
+            return
+        with self._lock:
+            slot = self._pending.get(str(msg.get("id")))
+        if slot is not None:
+            slot["resp"] = msg
+            slot["event"].set()
+
+    def _on_close(self, ws, code=None, reason=None):
+        self.connected.clear()
+        # Laukiantys nebesulauks atsakymo — pažadinam (būsena nežinoma)
+        with self._lock:
+            for slot in self._pending.values():
+                slot["event"].set()
+
+    def _run(self):
+        backoff = 1
+        while not self.stop_flag.is_set():
+            try:
+                if websocket is None:
+                    logging.error("[WSAPI] 'websocket-client' biblioteka neįdiegta.")
+                    return
+                self.app = websocket.WebSocketApp(
+                    self.url, on_open=self._on_open, on_message=self._on_message, on_close=self._on_close,
+                )
+                t0 = time.time()
+                self.app.run_forever(ping_interval=30, ping_timeout=10)
+                if time.time() - t0 > 60:
+                    backoff = 1
+            except Exception as e:
+                logging.warning(f"[WSAPI] Klaida: {e}")
+            finally:
+                self.connected.clear()
+                self.app = None
+            if not self.stop_flag.is_set():
+                self.stop_flag.wait(backoff)
+                backoff = min(RECONNECT_MAX_SEC, backoff * 2)
+
+    def start(self) -> "WsOrderTransport":
+        self._thread = threading.Thread(target=self._run, name="ws-order-api", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.stop_flag.set()
+        if self.app is not None:
+            try:
+                self.app.close()
+            except Exception:
+                pass
+
+    # --------------------------------------------------------
+    def place_market_order(self, symbol: str, side: str, qty_str: str, client_order_id: str,
+                           timeout: Optional[float] = None) -> Dict[str, Any]:
+        """
+        Siunčia MARKET pavedimą. Grąžina "result" (FULL atsakymas su fills).
+        OrderRejectedError — birža atmetė; OrderTransportError — transporto klaida.
+        """
+        timeout = ORDER_TIMEOUT_SEC if timeout is None else timeout
+        if not self.connected.wait(CONNECT_TIMEOUT_SEC if self.app is None else 0):
+            raise OrderTransportError("WS API neprisijungęs", sent=False)
+
+        params = sign({
+            "apiKey": self.api_key,
+            "newClientOrderId": client_order_id,
+            "newOrderRespType": "FULL",
+            "quantity": qty_str,
+            "side": side,
+            "symbol": symbol,
+            "timestamp": int(time.time() * 1000),
+            "type": "MARKET",
+        }, self.api_secret)
+        req_id = client_order_id
+        slot = {"event": threading.Event(), "resp": None}
+        with self._lock:
+            self._pending[req_id] = slot
+        try:
+            try:
+                self.app.send(json.dumps({"id": req_id, "method": "order.place", "params": params}))
+            except Exception as e:
+                raise OrderTransportError(f"siuntimo klaida: {e}", sent=False)
+            slot["event"].wait(timeout)
+            resp = slot["resp"]
+            if resp is None:
+                raise OrderTransportError(f"atsakymas negautas per {timeout:.1f}s", sent=True)
+            if resp.get("status") != 200:
+                err = resp.get("error") or {}
+                raise OrderRejectedError(f"{err.get('code')}: {err.get('msg')}")
+            return resp.get("result") or {}
+        finally:
+            with self._lock:
+                self._pending.pop(req_id, None)
+
+
+def new_client_order_id() -> str:
+    # Binance: iki 36 simbolių, [a-zA-Z0-9-_]
+    return f"cb{uuid.uuid4().hex[:30]}"
+
+
+_TRANSPORT: Optional[WsOrderTransport] = None
+_TRANSPORT_LOCK = threading.Lock()
+
+
+def get_transport(api_key: str, api_secret: str, testnet: bool = False) -> WsOrderTransport:
+    global _TRANSPORT
+    with _TRANSPORT_LOCK:
+        if _TRANSPORT is None:
+            _TRANSPORT = WsOrderTransport(api_key, api_secret, WS_API_TEST if testnet else WS_API_MAIN).start()
+        return _TRANSPORT
@@ -8,7 +8,7 @@ from pathlib import Path
 from flask import Flask, jsonify, request, render_template
 from threading import RLock
 
-from core.config import CONFIG
+from core.config import CONFIG, save_config
 from core.db_manager import (
     DB_PATH,
     fetch_recent_trades,
@@ -18,6 +18,22 @@ from ai.ai_sizer import AISizer
 from ai.ai_performance import get_ai_performance
 from core.ws_bridge import get_price
 from core.paper_account import get_account_state, get_open_positions
+from core import dao, storage_profile, equity_rollup, read_cache
+from core.timeutil import now_ms, ms_to_iso, DAY_MS
+
+storage_profile.set_role("dashboard")  # skaitytojo pragmos (query_only), checkpoint'ų nedaro
+
+# DB skaitymai per rezultatų cache (core/read_cache.py): keli tab'ai su
+# 1.5 s atnaujinimu DB paliečia ne dažniau nei kartą per TTL, o po jo —
+# tik jei botas kažką commit'ino (PRAGMA data_version)
+_account_state = read_cache.cached("account_state")(get_account_state)
+_open_positions = read_cache.cached("open_positions")(get_open_positions)
+_recent_trades = read_cache.cached("recent_trades")(fetch_recent_trades)
+
+
+@read_cache.cached("ai_summary")
+def _ai_summary() -> dict:
+    return get_ai_performance().get_summary()
 
 app = Flask(__name__)
 
@@ -53,8 +69,8 @@ def compat_page():
 
 @app.route("/api/summary")
 def api_summary():
-    acc = get_account_state()
-    perf = get_ai_performance().get_summary()  # ✅ PATAISYTA: pridėti .get_summary()
+    acc = _account_state()
+    perf = _ai_summary()
 
     balance = acc.get("balance_usdc", 0)
     total_equity = acc.get("equity", balance)
@@ -82,7 +98,7 @@ def api_summary():
 
 @app.route("/api/open_positions")
 def api_open_positions():
-    positions = get_open_positions()
+    positions = _open_positions()
     out = []
     
     for symbol, pos in positions.items():
@@ -105,18 +121,56 @@ def api_open_positions():
 
 @app.route("/api/live_positions")
 def api_live_positions():
-    positions = get_open_positions()
+    positions = _open_positions()
     return jsonify(positions)
 
 
 @app.route("/api/ai_summary")
 def api_ai_summary():
-    return jsonify(get_ai_performance().get_summary())  # ✅ PATAISYTA: pridėti .get_summary()
+    return jsonify(_ai_summary())
+
+
+# Grafiko intervalai -> trukmė ms (None — visa istorija, 1d rollup'ai)
+EQUITY_RANGES = {"1d": DAY_MS, "7d": 7 * DAY_MS, "30d": 30 * DAY_MS, "1y": 365 * DAY_MS, "all": None}
+EQUITY_RANGE_DEFAULT = "7d"
+
+
+def _equity_chart(range_key: str) -> dict:
+    """Nežinomas intervalas -> numatytasis: cache'o raktų aibė lieka baigtinė."""
+    if range_key not in EQUITY_RANGES:
+        range_key = EQUITY_RANGE_DEFAULT
+    return _equity_chart_cached(range_key)
+
+
+@read_cache.cached("equity_chart")
+def _equity_chart_cached(range_key: str) -> dict:
+    """Equity grafiko taškai iš tinkamos rezoliucijos rollup'o (ISO — tik čia, API riboje)."""
+    span = EQUITY_RANGES[range_key]
+    since = now_ms() - span if span else 0
+    res_ms, points = equity_rollup.get_series(since, res_ms=None if span else equity_rollup.RES_1D)
+    base = points[0]["open"] if points else 0.0
+    return {
+        "range": range_key,
+        "resolution_sec": res_ms // 1000,
+        "labels": [ms_to_iso(p["ts_ms"]) for p in points],
+        "equity": [p["close"] for p in points],
+        "equity_pct": [round((p["close"] / base - 1.0) * 100.0, 4) if base else 0.0 for p in points],
+    }
+
+
+@app.route("/api/equity_history")
+def api_equity_history():
+    return jsonify(_equity_chart(request.args.get("range", EQUITY_RANGE_DEFAULT)))
 
 
 @app.route("/api/ai_performance")
 def api_ai_performance():
-    return jsonify(get_ai_performance().get_summary())  # ✅ PATAISYTA: pridėti .get_summary()
+    data = dict(_ai_summary())  # kopija — cache'o objektas nekeičiamas
+    try:
+        data.update(_equity_chart(request.args.get("range", EQUITY_RANGE_DEFAULT)))  # grafikams (labels/equity_pct)
+    except Exception as e:
+        logging.warning(f"[DASHBOARD] Equity grafikas neprieinamas: {e}")
+    return jsonify(data)
 
 
 @app.route("/api/ai_sizer")
@@ -142,19 +196,19 @@ def api_ai_sizer():
 @app.route("/api/ai_metrics")
 def api_ai_metrics():
     limit = int(request.args.get("limit", 100))
-    trades = fetch_recent_trades(limit)
+    trades = _recent_trades(limit)
     return jsonify(trades)
 
 
 @app.route("/api/runtime")
 def api_runtime():
     uptime = round(time.time() - APP_START_TS)
-    return jsonify({"uptime_sec": uptime})
+    return jsonify({"uptime_sec": uptime, "read_cache": read_cache.get_metrics(), "dao": dao.get_metrics()})
 
 
 @app.route("/api/risk_summary")
 def api_risk_summary():
-    acc = get_account_state()
+    acc = _account_state()
     balance = acc.get("balance_usdc", 0)
     equity = acc.get("equity", balance)
     
@@ -198,20 +252,21 @@ def api_check_matrix():
 
 @app.route("/api/save_config", methods=["POST"])
 def api_save_config():
-    data = request.json
+    data = request.json or {}
     with _state_lock:
-        # Atnaujinti CONFIG
+        # Atnaujinti CONFIG (naujas dict — senas snapshot'as lieka nepaliestas iki įrašymo)
+        new_cfg = json.loads(json.dumps(CONFIG))
         for k, v in data.items():
-            CONFIG[k] = v
-        
-        # Išsaugoti config.json
+            new_cfg[k] = v
+
+        # Išsaugoti config.json (atomiškai); boto procesas pasiims per config watcher'į
         try:
-            CONFIG_PATH.write_text(json.dumps(CONFIG, indent=2), encoding="utf-8")
+            changed = save_config(new_cfg)
         except Exception as e:
             logging.error(f"Klaida išsaugant config: {e}")
             return jsonify({"status": "error", "msg": str(e)})
-            
-    return jsonify({"status": "ok"})
+
+    return jsonify({"status": "ok", "changed": sorted(changed)})
 
 
 @app.route("/api/get_config")
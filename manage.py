@@ -31,61 +31,10 @@ START_CAPITAL = 10_000.0
 # ============================================================
 
 def init_db_structure():
-    """Užtikrina, kad lentelės egzistuoja."""
-    con = sqlite3.connect(DB_PATH)
-    cur = con.cursor()
-    cur.executescript("""
-    CREATE TABLE IF NOT EXISTS positions (
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        symbol TEXT NOT NULL,
-        qty REAL DEFAULT 0,
-        entry_price REAL DEFAULT 0,
-        opened_at TEXT,
-        confidence REAL DEFAULT 0,
-        state TEXT DEFAULT 'OPEN'
-    );
-
-    CREATE TABLE IF NOT EXISTS equity_history (
-        ts TEXT,
-        equity REAL DEFAULT 0,
-        day_pnl_pct REAL DEFAULT 0,
-        equity_pct_from_start REAL DEFAULT 0,
-        free_usdc REAL DEFAULT 0,
-        used_usdc REAL DEFAULT 0,
-        positions INTEGER DEFAULT 0
-    );
-
-    CREATE TABLE IF NOT EXISTS ai_metrics (
-        ts TEXT,
-        avg_confidence REAL,
-        avg_pnl REAL,
-        win_rate REAL,
-        trades_count INTEGER,
-        avg_hold_sec REAL
-    );
-
-    CREATE TABLE IF NOT EXISTS risk_state (
-        key TEXT PRIMARY KEY,
-        value TEXT
-    );
-
-    CREATE TABLE IF NOT EXISTS trades (
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        ts TEXT,
-        event TEXT,
-        symbol TEXT,
-        price REAL,
-        qty REAL,
-        usd_value REAL,
-        confidence REAL,
-        pnl_pct REAL,
-        reason TEXT,
-        hold_sec REAL,
-        hold_time_str TEXT
-    );
-    """)
-    con.commit()
-    con.close()
+    """Užtikrina, kad lentelės egzistuoja (kanoninė schema, be duomenų praradimo)."""
+    from core.db_migrations import run_migrations
+    version = run_migrations(DB_PATH)
+    logging.info(f"🗄️ DB schemos versija: v{version}")
 
 
 def reset_database():
@@ -96,7 +45,8 @@ def reset_database():
     con = sqlite3.connect(DB_PATH)
     cur = con.cursor()
 
-    for t in ["positions", "trades", "ai_metrics", "risk_state", "equity_history"]:
+    for t in ["positions", "trades", "ai_metrics", "risk_state", "equity_history", "equity_rollup", "ai_trade_stats",
+              "state_store"]:
         try:
             cur.execute(f"DELETE FROM {t};")
         except Exception:
@@ -127,11 +77,19 @@ def reset_database():
 
     con.commit()
     con.close()
+
+    # Žurnalas: senesni įvykiai nebeatkuriami (naujas checkpoint'as)
+    from core.journal import mark_reset
+    mark_reset(DB_PATH)
     logging.info("✅ DB išvalyta ir baziniai duomenys įrašyti.")
 
 
-def start_bot():
-    """Paleidžia botą ir dashboard. TEST režime patikrina kapitalą."""
+def start_bot(workers: bool = False):
+    """
+    Paleidžia botą ir dashboard. TEST režime patikrina kapitalą.
+    workers=True — botas paleidžiamas kaip atskiri ingest/strategy/execution
+    procesai su supervizoriumi (core.workers).
+    """
     python_exe = sys.executable
     logging.info("🟢 Paleidžiamas botas ir dashboard...")
 
@@ -157,7 +115,8 @@ def start_bot():
             logging.warning(f"⚠️ Nepavyko inicializuoti TEST kapitalo: {e}")
 
     # Paleidžiamas bot ir dashboard
-    subprocess.Popen([python_exe, "-m", "core.main"], stdout=None, stderr=None)
+    bot_module = "core.workers" if workers else "core.main"
+    subprocess.Popen([python_exe, "-m", bot_module], stdout=None, stderr=None)
     subprocess.Popen([python_exe, "-m", "dashboard.app"], stdout=None, stderr=None)
     logging.info("✅ Abu procesai paleisti.")
 
@@ -169,7 +128,7 @@ def stop_bot():
     for p in psutil.process_iter(attrs=["pid", "cmdline"]):
         try:
             cl = " ".join(p.info["cmdline"] or [])
-            if any(x in cl for x in ["core.main", "dashboard.app"]):
+            if any(x in cl for x in ["core.main", "core.workers", "dashboard.app"]):
                 p.terminate()
                 logging.info(f"🛑 Sustabdytas procesas PID={p.info['pid']}")
         except Exception:
@@ -178,10 +137,10 @@ def stop_bot():
     logging.info("✅ Visi procesai sustabdyti.")
 
 
-def restart_bot():
+def restart_bot(workers: bool = False):
     """Išvalo procesus ir paleidžia botą iš naujo."""
     stop_bot()
-    start_bot()
+    start_bot(workers=workers)
 
 
 def check_db():
@@ -195,6 +154,23 @@ def check_db():
     logging.info(f"📊 Rasta {len(tables)} lentelių: {', '.join(tables)}")
 
 
+def export_archive():
+    """Inkrementinis trades / equity_history eksportas į data/archive (core/archive.py)."""
+    init_db_structure()
+    from core.archive import export, ARCHIVE_DIR
+    out = export(DB_PATH)
+    logging.info(f"📦 Archyvas atnaujintas ({ARCHIVE_DIR}): "
+                 + ", ".join(f"{t} +{n}" for t, n in out.items()))
+
+
+def rebuild_projections():
+    """positions / trades / equity_history atstatomos iš žurnalo (botas turi būti sustabdytas)."""
+    init_db_structure()
+    from core.journal import rebuild
+    n = rebuild(DB_PATH)
+    logging.info(f"🔁 Projekcijos atstatytos iš žurnalo (+{n} įvykių po checkpoint'o)")
+
+
 def full_test_reset():
     """Atlieka pilną testinį režimo reset + startą."""
     reset_database()
@@ -207,26 +183,34 @@ def full_test_reset():
 # ============================================================
 if __name__ == "__main__":
     cmd = sys.argv[1] if len(sys.argv) > 1 else ""
+    use_workers = "--workers" in sys.argv[2:]
 
     if cmd == "start":
-        start_bot()
+        start_bot(workers=use_workers)
     elif cmd == "stop":
         stop_bot()
     elif cmd == "reset":
         reset_database()
     elif cmd == "restart":
-        restart_bot()
+        restart_bot(workers=use_workers)
     elif cmd == "checkdb":
         check_db()
     elif cmd == "test":
         full_test_reset()
+    elif cmd == "export":
+        export_archive()
+    elif cmd == "rebuild":
+        rebuild_projections()
     else:
         print("""
 Naudojimas:
     python manage.py start     — paleidžia botą ir dashboard
+    python manage.py start --workers — botas kaip atskiri procesai (ingest/strategy/execution)
     python manage.py stop      — sustabdo botą ir dashboard
     python manage.py reset     — išvalo DB ir įrašo bazinius duomenis
     python manage.py restart   — perkrauna botą
     python manage.py checkdb   — tikrina DB struktūrą
     python manage.py test      — pilnas testavimo paleidimas (reset + start)
+    python manage.py export    — trades / equity_history -> data/archive (stulpeliniai .npz pagal mėnesį)
+    python manage.py rebuild   — DB projekcijos iš žurnalo (checkpoint + replay; botas sustabdytas)
         """)
@@ -11,6 +11,7 @@ import requests
 from datetime import datetime, timezone, timedelta
 
 from core.config import CONFIG
+from core import http_client
 
 # ---- Konfigai ----
 notify_cfg = CONFIG.get("NOTIFY", {})
@@ -85,7 +86,7 @@ def _send_raw(msg: str) -> bool:
         "parse_mode": "MarkdownV2"
     }
     try:
-        r = requests.post(url, json=payload, timeout=10)
+        r = http_client.post(url, json=payload)
         if r.status_code == 200:
             print(f"📨 [TELEGRAM] {msg}")
             return True
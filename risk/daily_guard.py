@@ -2,12 +2,34 @@
 # risk/daily_guard.py
 # Dienos ir valandinės rizikos kontrolė
 # Atnaujinta: 2025-11-05 (pridėtas can_open_positions)
+# ------------------------------------------------------------
+# - Būsena laikoma atmintyje ir įrašoma į state_store (raktas
+#   "daily_guard") atidėtai — kas STATE_FLUSH_SEC ir išjungiant
+#   (core/state_store.py); register_equity() failų nebeperrašo
+# - Valandiniai checkpoint'ai — 24 elementų sąrašas pagal valandą (O(1))
+# - Senas data/daily_guard_state.json perskaitomas vieną kartą, jei DB
+#   būsenos dar nėra
 # ============================================================
 
 import json
 import logging
-from datetime import datetime, timedelta
+from datetime import datetime
 from pathlib import Path
+from typing import Optional
+
+from core.state_store import PersistentState
+
+STATE_KEY = "daily_guard"
+
+
+def _new_day_state(day: str, start_equity: Optional[float] = None) -> dict:
+    return {
+        "day": day,
+        "daily_start_equity": start_equity,
+        "hourly_checkpoints": [None] * 24,
+        "max_drawdown_pct": 0.0,
+        "daily_status": "OK"
+    }
 
 
 class DailyGuard:
@@ -16,76 +38,50 @@ class DailyGuard:
     Atskirtas nuo RiskManager, kad būtų aiškesnė atsakomybė.
     """
     def __init__(self, data_dir="data", max_daily_dd_pct=3.0, max_hourly_dd_pct=1.5):
-        self.state_file = Path(data_dir) / "daily_guard_state.json"
+        self.state_file = Path(data_dir) / "daily_guard_state.json"  # tik senos būsenos importui
         self.max_daily_dd_pct = max_daily_dd_pct
         self.max_hourly_dd_pct = max_hourly_dd_pct
+        self._store = PersistentState(STATE_KEY, default_factory=self._legacy_state)
         self._load_state()
 
     # -------------------------
     # Būsenos valdymas
     # -------------------------
 
-    def _load_state(self):
-        if self.state_file.exists():
-            try:
-                with open(self.state_file, "r") as f:
-                    self.state = json.load(f)
-            except Exception:
-                self.state = {}
-        else:
-            self.state = {}
+    @property
+    def state(self) -> dict:
+        return self._store.get()
 
-        now = datetime.utcnow()
-        today_str = now.strftime("%Y-%m-%d")
+    def _legacy_state(self) -> dict:
+        """Vienkartinis importas iš seno JSON failo (kai state_store tuščias)."""
+        try:
+            if self.state_file.exists():
+                with open(self.state_file, "r") as f:
+                    state = json.load(f)
+                hourly = state.get("hourly_checkpoints")
+                if isinstance(hourly, dict):  # {"HH:00": equity} -> [24]
+                    slots = [None] * 24
+                    for k, v in hourly.items():
+                        slots[int(k[:2]) % 24] = v
+                    state["hourly_checkpoints"] = slots
+                logging.info(f"[DailyGuard] Būsena perkelta iš {self.state_file} į DB")
+                return state
+        except Exception as e:
+            logging.warning(f"[DailyGuard] Nepavyko perskaityti {self.state_file}: {e}")
+        return {}
 
-        if "day" not in self.state or self.state.get("day") != today_str:
-            self.state = {
-                "day": today_str,
-                "daily_start_equity": None,
-                "hourly_checkpoints": {},
-                "max_drawdown_pct": 0.0,
-                "daily_status": "OK"
-            }
-            self._save_state()
+    def _load_state(self):
+        today_str = datetime.utcnow().strftime("%Y-%m-%d")
+        if self.state.get("day") != today_str:
+            self._store.replace(_new_day_state(today_str))
 
     def _save_state(self):
-        """Saugo dienos būseną su .tmp apsauga ir automatiniais bandymais (Windows-friendly)."""
-        tmp = Path(str(self.state_file) + ".tmp")
-        attempt = 0
-        max_attempts = 3
-
-        while attempt < max_attempts:
-            try:
-                # 1️⃣ Rašom į laikiną failą
-                with tmp.open("w", encoding="utf-8") as f:
-                    json.dump(self.state, f, indent=2)
-
-                # 2️⃣ Pašalinam seną failą, jei toks yra
-                if self.state_file.exists():
-                    try:
-                        self.state_file.unlink()
-                    except PermissionError:
-                        logging.warning(f"[DailyGuard] Nepavyko pašalinti seno failo (bandymas {attempt+1})")
-                        time.sleep(0.3)
-                        attempt += 1
-                        continue  # pakartoti bandymą
-
-                # 3️⃣ Pervadinam laikiną -> pagrindinį
-                tmp.rename(self.state_file)
-                logging.debug(f"[DailyGuard] Būsena išsaugota: {self.state_file}")
-                break  # ✅ Sėkminga operacija — išeinam
-
-            except PermissionError as e:
-                attempt += 1
-                logging.warning(f"[DailyGuard] PermissionError ({attempt}/{max_attempts}) — bandysiu dar kartą...")
-                time.sleep(0.3)
-            except Exception as e:
-                logging.exception(f"[DailyGuard] Klaida saugant būseną: {e}")
-                break
-        else:
-            logging.error(f"[DailyGuard] Nepavyko įrašyti {self.state_file} po {max_attempts} bandymų.")
-
+        """Pažymi būseną įrašymui (DB — fone, ne dažniau nei kas STATE_FLUSH_SEC)."""
+        self._store.mark_dirty()
 
+    def flush(self) -> bool:
+        """Priverstinis įrašymas (pvz. prieš išjungimą)."""
+        return self._store.flush()
 
     # -------------------------
     # Atnaujinimai
@@ -99,14 +95,7 @@ class DailyGuard:
         # Nauja diena -> reset
         if self.state.get("day") != today_str:
             logging.info("[DailyGuard] Nauja diena — resetinu dienos skaitiklius.")
-            self.state = {
-                "day": today_str,
-                "daily_start_equity": equity_now,
-                "hourly_checkpoints": {},
-                "max_drawdown_pct": 0.0,
-                "daily_status": "OK"
-            }
-            self._save_state()
+            self._store.replace(_new_day_state(today_str, equity_now))
             return
 
         # Inicializuojame startinį equity, jei trūksta
@@ -120,9 +109,9 @@ class DailyGuard:
         dd_pct = (equity_now - start_equity) / start_equity * 100.0
         self.state["max_drawdown_pct"] = min(self.state.get("max_drawdown_pct", 0.0), dd_pct)
 
-        hour_key = now.strftime("%H:00")
-        if hour_key not in self.state["hourly_checkpoints"]:
-            self.state["hourly_checkpoints"][hour_key] = equity_now
+        hourly = self.state["hourly_checkpoints"]
+        if hourly[now.hour] is None:
+            hourly[now.hour] = equity_now
 
         # Jei viršytas dienos DD limitas
         if dd_pct <= -self.max_daily_dd_pct:
@@ -133,6 +122,16 @@ class DailyGuard:
 
         self._save_state()
 
+    def hourly_equity(self, hour: Optional[int] = None) -> Optional[float]:
+        """Valandos pradžios equity (šiandien); None — jei dar neužfiksuota."""
+        h = datetime.utcnow().hour if hour is None else int(hour) % 24
+        return self.state["hourly_checkpoints"][h]
+
+    def hourly_dd_pct(self, equity_now: float) -> float:
+        """Pokytis nuo einamosios valandos checkpoint'o, %."""
+        base = self.hourly_equity()
+        return (equity_now - base) / base * 100.0 if base else 0.0
+
     # -------------------------
     # Patikrinimai
     # -------------------------
@@ -161,5 +160,5 @@ class DailyGuard:
             "day": self.state.get("day"),
             "status": self.state.get("daily_status", "OK"),
             "max_dd_pct": self.state.get("max_drawdown_pct", 0.0),
-            "hourly_points": len(self.state.get("hourly_checkpoints", {}))
+            "hourly_points": sum(1 for v in self.state.get("hourly_checkpoints", []) if v is not None)
         }
@@ -4,16 +4,18 @@
 # ------------------------------------------------------------
 # - update_equity ignoruoja equity<=0 (nestabdo starto)
 # - get_summary grąžina guard_status ir pnl_today
-# - has_position tikrina DB lentelę positions
+# - has_position tikrina pozicijų knygą (core/position_book.py)
 # - minimalus DailyGuard su max DD per dieną
+# - follow_config(): EXIT.*, PORTFOLIO.* ir DAILY_MAX_DRAWDOWN_PCT pakeitimai
+#   (config watcher'is) pritaikomi veikiančiam RiskManager / ExitManager
 # ============================================================
 
-import sqlite3
 import logging
 from dataclasses import dataclass
-from datetime import datetime, timezone, date
 
-from core.db_manager import DB_PATH
+from core.position_book import BOOK
+from core.timeutil import local_day_start_ms
+from core import equity_rollup
 
 
 @dataclass
@@ -31,6 +33,24 @@ class RiskConfig:
     max_positions: int = 8
     max_exposure_pct: float = 85.0
 
+    @classmethod
+    def from_snapshot(cls, cfg) -> "RiskConfig":
+        """RiskConfig iš core.config.ConfigSnapshot."""
+        return cls(
+            daily_max_loss_pct=cfg.daily_max_drawdown_pct,
+            tp_base=cfg.tp_base,
+            sl_base=cfg.sl_base,
+            tsl_base=cfg.tsl_base,
+            min_hold_time_h=cfg.min_hold_time_h,
+            ai_exit_min_hold_h=cfg.ai_exit_min_hold_h,
+            hold_timeout_h=cfg.hold_timeout_h,
+            max_hold_h=cfg.max_hold_h,
+            vol_scale=cfg.vol_scale,
+            confidence_scale=cfg.confidence_scale,
+            max_positions=cfg.max_open_positions,
+            max_exposure_pct=cfg.max_exposure_pct,
+        )
+
 
 class DailyGuard:
     def __init__(self, max_dd_pct: float):
@@ -48,16 +68,10 @@ class DailyGuard:
 
     def set_sod_equity_if_needed(self, equity_now: float):
         try:
-            today = date.today().isoformat()
-            con = sqlite3.connect(DB_PATH)
-            cur = con.cursor()
-            row = cur.execute(
-                "SELECT equity FROM equity_history WHERE ts LIKE ? ORDER BY ts ASC LIMIT 1;",
-                (f"{today}%",),
-            ).fetchone()
-            con.close()
-            if row:
-                self.sod_equity = float(row[0] or 0.0)
+            # šiandienos (vietinė para) pirmasis equity — rollup'o open
+            day = equity_rollup.get_day(local_day_start_ms())
+            if day:
+                self.sod_equity = day[0]
             else:
                 self.sod_equity = float(equity_now or 0.0)
         except Exception:
@@ -74,6 +88,11 @@ class RiskManager:
         self.dry_run = dry_run
         self.daily_guard = DailyGuard(max_dd_pct=cfg.daily_max_loss_pct)
 
+    def apply_config(self, cfg: RiskConfig):
+        """Nauji limitai; dienos pradžios equity ir guard būsena išlieka."""
+        self.cfg = cfg
+        self.daily_guard.max_dd_pct = float(cfg.daily_max_loss_pct)
+
     # kviečiama iš main
     def update_equity(self, equity_now: float):
         # Saugiklis, kad nestabdytų su 0
@@ -89,23 +108,11 @@ class RiskManager:
     def get_summary(self) -> dict:
         """Grąžina dashboard'ui reikalingą santrauką (įskaitant dd ir pnl_today)."""
         try:
-            today = date.today().isoformat()
-            con = sqlite3.connect(DB_PATH)
-            cur = con.cursor()
-            # šiandieninis pirmasis equity įrašas
-            first = cur.execute(
-                "SELECT equity FROM equity_history WHERE ts LIKE ? ORDER BY ts ASC LIMIT 1;",
-                (f"{today}%",),
-            ).fetchone()
-            last = cur.execute(
-                "SELECT equity FROM equity_history WHERE ts LIKE ? ORDER BY ts DESC LIMIT 1;",
-                (f"{today}%",),
-            ).fetchone()
-            con.close()
-
-            if first and last:
-                sod = float(first[0] or 0.0)
-                eod = float(last[0] or 0.0)
+            # šiandienos (vietinė para) pirmasis ir paskutinis equity — rollup'o open/close
+            day = equity_rollup.get_day(local_day_start_ms())
+
+            if day:
+                sod, eod = day
                 pnl_today = ((eod / sod - 1.0) * 100.0) if sod > 0 else 0.0
             else:
                 pnl_today = 0.0
@@ -120,14 +127,7 @@ class RiskManager:
 
     def has_position(self, symbol: str) -> bool:
         try:
-            con = sqlite3.connect(DB_PATH)
-            cur = con.cursor()
-            row = cur.execute(
-                "SELECT 1 FROM positions WHERE symbol=? AND state='OPEN' AND qty>0 LIMIT 1;",
-                (symbol,),
-            ).fetchone()
-            con.close()
-            return bool(row)
+            return BOOK.has(symbol)
         except Exception:
             return False
 
@@ -141,24 +141,12 @@ class RiskManager:
                   False, jei limito viršytas.
         """
         try:
-            con = sqlite3.connect(DB_PATH)
-            cur = con.cursor()
-            # Suskaičiuojame visas atviras pozicijas, kurios nėra uždarytos (state='OPEN')
-            # ir kurių kiekis (qty) yra didesnis už nulį.
-            row = cur.execute(
-                "SELECT COUNT(symbol) FROM positions WHERE state='OPEN' AND qty>0;"
-            ).fetchone()
-            con.close()
-
-            if row:
-                open_positions_count = int(row[0])
-                max_allowed = self.cfg.max_positions
-                
-                # Jei atvirų pozicijų skaičius mažesnis arba lygus max_allowed
-                return open_positions_count <= max_allowed
-            
-            # Jei nepavyko gauti skaičiaus, leidžiame tęsti
-            return True
+            # Atviros pozicijos (state='OPEN', qty > 0) — iš pozicijų knygos
+            open_positions_count = BOOK.count()
+            max_allowed = self.cfg.max_positions
+
+            # Jei atvirų pozicijų skaičius mažesnis arba lygus max_allowed
+            return open_positions_count <= max_allowed
         except Exception as e:
             logging.error(f"[RiskManager] Klaida tikrinant max pozicijas: {e}")
             # Kilus klaidai, neblokuojame pirkimo, kad neužblokuoti sistemos
@@ -168,4 +156,26 @@ class RiskManager:
     def register_entry(self, symbol: str, entry_price: float, confidence: float):
         # įrašymas atliekamas OrderExecutor'e; čia – no-op
         return
-    
\ No newline at end of file
+    
+
+
+# Konfigūracijos raktai (taškais sujungti), nuo kurių priklauso RiskConfig
+RISK_CONFIG_KEYS = ("EXIT.", "PORTFOLIO.", "DAILY_MAX_DRAWDOWN_PCT")
+
+
+def follow_config(risk, exit_manager=None):
+    """Prenumeruoja config pakeitimus: RiskConfig perkuriamas ir pritaikomas."""
+    from core.config import subscribe
+
+    def _on_change(snap, changed):
+        if not any(k.startswith(RISK_CONFIG_KEYS) for k in changed):
+            return
+        rc = RiskConfig.from_snapshot(snap)
+        if hasattr(risk, "apply_config"):
+            risk.apply_config(rc)
+        if hasattr(exit_manager, "apply_config"):
+            exit_manager.apply_config(rc)
+        logging.info(f"[RiskManager] ⚙️ Rizikos parametrai atnaujinti (v{snap.version})")
+
+    subscribe(_on_change)
+    return _on_change